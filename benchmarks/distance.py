@@ -0,0 +1,96 @@
+"""
+Compares the cost of computing the distance from the original chromosome after every simulation step.
+
+    editdistance: editdistance.eval on the whole sequences (the distance computation of the earlier simulations). It
+        needs memory proportional to the product of the lengths, so it's only measured on the small cases.
+    myers: the bit-parallel algorithm on the whole sequences
+    tracker/n: DistanceTracker computing the distance in every n-th step
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.distance
+"""
+import time
+
+import editdistance
+import numpy
+
+from applications.GeneticModeling.benchmarks.parse import generate_description
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.distance import DistanceTracker, myers_edit_distance
+from applications.GeneticModeling.modules.transformation import Inversion
+
+# (number of genes, minimum region length, maximum region length)
+CASES = [(100, 10, 100), (1000, 10, 100), (3000, 10, 100)]
+
+NUMBER_OF_STEPS = 10
+INTERVALS = [1, 10]
+
+# the longest sequence editdistance.eval is measured on
+EDITDISTANCE_LIMIT = 20000
+
+# the longest sequence the bit-parallel algorithm is measured on without the tracker
+MYERS_LIMIT = 200000
+
+
+def measure(description, compute):
+    """
+    Runs inversions on the chromosome and computes the distance after every step
+
+    :returns the average time of the distance computations in milliseconds
+    """
+    chromosome = Chromosome.parse(description)
+    numpy.random.seed(0)
+    elapsed = 0.0
+    for step in range(NUMBER_OF_STEPS):
+        Inversion(chromosome, random_error=0.0).transform()
+
+        start = time.time()
+        compute(step, chromosome)
+        elapsed += time.time() - start
+    return elapsed / NUMBER_OF_STEPS * 1000
+
+
+def measure_tracker(description, original, interval):
+    tracker = DistanceTracker(original)
+
+    # sampled like the distance_interval of run_simulation
+    def compute(step, chromosome):
+        if (step + 1) % interval == 0:
+            tracker.update(chromosome.represent())
+
+    return measure(description, compute)
+
+
+def main():
+    columns = ['editdistance', 'myers'] + ['tracker/%d' % interval for interval in INTERVALS]
+    print "%10s %12s %s" % ('genes', 'MB', ' '.join(['%14s' % column for column in columns]))
+    print "%10s %12s %s" % ('', '', ' '.join(['%14s' % 'ms/step' for column in columns]))
+
+    for number_of_genes, minimum_length, maximum_length in CASES:
+        numpy.random.seed(0)
+        description = generate_description(number_of_genes, minimum_length, maximum_length)
+        original = Chromosome.parse(description).represent()
+
+        results = []
+        if len(original) <= EDITDISTANCE_LIMIT:
+            results.append(measure(description,
+                                   lambda step, chromosome: editdistance.eval(original, chromosome.represent())))
+        else:
+            results.append(None)
+
+        if len(original) <= MYERS_LIMIT:
+            results.append(measure(description,
+                                   lambda step, chromosome: myers_edit_distance(original, chromosome.represent())))
+        else:
+            results.append(None)
+
+        results += [measure_tracker(description, original, interval) for interval in INTERVALS]
+
+        print "%10d %12.2f %s" % (number_of_genes, len(original) / 10.0 ** 6,
+                                  ' '.join(['%14s' % ('-' if value is None else '%.1f' % value)
+                                            for value in results]))
+
+
+if __name__ == '__main__':
+    main()
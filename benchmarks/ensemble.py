@@ -0,0 +1,46 @@
+"""
+Compares the replicates of an ensemble run one after the other and in a process pool (see ensemble.py).
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.ensemble
+"""
+import multiprocessing
+import time
+
+import numpy
+
+from applications.GeneticModeling.benchmarks.parse import generate_description
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.ensemble import run_ensemble
+
+# (number of genes in a chromosome, number of steps, number of replicates)
+CASES = [(1000, 200, 16), (5000, 200, 16)]
+
+
+def measure(left, right, number_of_steps, replicates, processes):
+    start = time.time()
+    run_ensemble(left, right, seeds=range(replicates), processes=processes, number_of_transformations=number_of_steps,
+                 rate_of_translocations=30, random_error=0.0)
+    return time.time() - start
+
+
+def main():
+    results = []
+    for number_of_genes, number_of_steps, replicates in CASES:
+        numpy.random.seed(0)
+        description = generate_description(number_of_genes, 10, 100)
+        left, right = Chromosome.parse(description), Chromosome.parse(description)
+
+        results.append((number_of_genes, number_of_steps, replicates,
+                        measure(left, right, number_of_steps, replicates, 1),
+                        measure(left, right, number_of_steps, replicates, None)))
+
+    print "%d cores" % multiprocessing.cpu_count()
+    print "%8s %8s %10s %10s %10s" % ('genes', 'steps', 'replicates', 'serial s', 'pool s')
+    for result in results:
+        print "%8d %8d %10d %10.2f %10.2f" % result
+
+
+if __name__ == '__main__':
+    main()
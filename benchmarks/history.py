@@ -0,0 +1,61 @@
+"""
+Compares the size of the simulation history with the gene orders copied in every step and the delta encoded history
+(see history.py) when it's serialized to JSON like the scheduler stores the results.
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.history
+"""
+import json
+import time
+
+import numpy
+
+from applications.GeneticModeling.benchmarks.parse import generate_description
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.history import order_at
+from applications.GeneticModeling.modules.simulation import run_simulation
+
+# (number of genes in a chromosome, number of steps)
+CASES = [(1000, 1000), (5000, 2000)]
+
+KEYFRAME_INTERVAL = 1000
+
+
+def simulate(description, number_of_steps, compact_history):
+    """
+    :returns the history, the time of the simulation and the time of the serialization in seconds
+    """
+    left, right = Chromosome.parse(description), Chromosome.parse(description)
+    start = time.time()
+    history = run_simulation(left, right, number_of_transformations=number_of_steps, rate_of_translocations=30,
+                             random_error=0.0, compute_gene_order=False, compact_history=compact_history,
+                             keyframe_interval=KEYFRAME_INTERVAL, seed=0)['history']
+    simulated = time.time()
+    serialized = json.dumps(history)
+    return history, len(serialized), simulated - start, time.time() - simulated
+
+
+def main():
+    print "%8s %8s %12s %12s %12s %12s %12s %12s %14s" % ('genes', 'steps', 'list MB', 'list s', 'json s',
+                                                           'compact MB', 'compact s', 'json s', 'order_at ms')
+
+    for number_of_genes, number_of_steps in CASES:
+        numpy.random.seed(0)
+        description = generate_description(number_of_genes, 10, 100)
+
+        results = []
+        for compact_history in [False, True]:
+            history, size, simulation_time, serialization_time = simulate(description, number_of_steps, compact_history)
+            results += [size / 10.0 ** 6, simulation_time, serialization_time]
+
+        # the gene orders in the middle of the last keyframe interval
+        start = time.time()
+        order_at(history, number_of_steps - KEYFRAME_INTERVAL // 2)
+        results.append((time.time() - start) * 1000)
+
+        print "%8d %8d %s" % (number_of_genes, number_of_steps, ' '.join(['%12.2f' % value for value in results]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Measures the cost of the diff strategies (see metrics.py) after a number of inversions.
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.metrics
+"""
+import time
+
+import numpy
+
+from applications.GeneticModeling.benchmarks.parse import generate_description
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.metrics import METRICS
+from applications.GeneticModeling.modules.transformation import Inversion
+
+# (number of genes, minimum region length, maximum region length)
+CASES = [(1000, 10, 100), (10000, 10, 100), (100000, 10, 100)]
+
+NUMBER_OF_INVERSIONS = 5
+
+# the metrics whose cost grows with the square of the chromosome length are only measured up to this length
+QUADRATIC_METRICS = ['EditDistance']
+QUADRATIC_LIMIT = 200000
+
+
+def main():
+    names = sorted(METRICS)
+    print "%10s %12s %s" % ('genes', 'MB', ' '.join(['%21s' % name for name in names]))
+    print "%10s %12s %s" % ('', '', ' '.join(['%21s' % 'ms' for name in names]))
+
+    for number_of_genes, minimum_length, maximum_length in CASES:
+        numpy.random.seed(0)
+        chromosome = Chromosome.parse(generate_description(number_of_genes, minimum_length, maximum_length))
+        metrics = dict((name, METRICS[name]([chromosome])) for name in names)
+        length = len(metrics['Hamming'].original)
+
+        for i in range(NUMBER_OF_INVERSIONS):
+            Inversion(chromosome, random_error=0.0).transform()
+        # the lazily reversed regions are rewritten when they are read first
+        chromosome.represent()
+
+        results = []
+        for name in names:
+            if name in QUADRATIC_METRICS and length > QUADRATIC_LIMIT:
+                results.append('-')
+                continue
+            start = time.time()
+            metrics[name].measure([chromosome])
+            results.append('%.1f' % ((time.time() - start) * 1000))
+
+        print "%10d %12.2f %s" % (number_of_genes, length / 10.0 ** 6, ' '.join(['%21s' % value for value in results]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the throughput of the chromosome description parsers.
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.parse
+"""
+import time
+from StringIO import StringIO
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, scan_description
+from applications.GeneticModeling.modules.compact_chromosome import CompactChromosome
+
+# (number of genes, minimum region length, maximum region length)
+CASES = [(100000, 10, 100), (10000, 1000, 10000)]
+
+
+def generate_description(number_of_genes, minimum_length, maximum_length):
+    """
+    Generates a description in the format of the generate controller (intergenic regions and genes alternating)
+    """
+    lengths = numpy.random.randint(minimum_length, maximum_length, size=2 * number_of_genes + 1)
+    bases = numpy.frombuffer('ACGT', dtype=numpy.uint8)[numpy.random.randint(0, 4, size=lengths.sum())].tobytes()
+
+    parts = []
+    offset = 0
+    for i, length in enumerate(lengths):
+        content = bases[offset:offset + length]
+        offset += length
+        if i == 0 or i == len(lengths) - 1:
+            parts.append('<' + content + '>')
+        elif i % 2 == 0:
+            parts.append('(' + content + ')')
+        else:
+            parts.append(content)
+    return "".join(parts)
+
+
+def measure(function, description):
+    start = time.time()
+    function(description)
+    return len(description) / (time.time() - start) / 10 ** 6
+
+
+def main():
+    print "%10s %12s %14s %14s %14s" % ('genes', 'MB', 'scan MB/s', 'parse MB/s', 'compact MB/s')
+    for number_of_genes, minimum_length, maximum_length in CASES:
+        description = generate_description(number_of_genes, minimum_length, maximum_length)
+
+        print "%10d %12.1f %14.1f %14.1f %14.1f" % (
+            number_of_genes, len(description) / 10.0 ** 6,
+            measure(lambda text: sum(1 for region in scan_description([text])), description),
+            measure(lambda text: Chromosome.parse_file(StringIO(text)), description),
+            measure(lambda text: CompactChromosome.parse_file(StringIO(text)), description))
+
+
+if __name__ == '__main__':
+    main()
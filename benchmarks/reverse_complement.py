@@ -0,0 +1,43 @@
+"""
+Measures the throughput of the reverse complement implementations.
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.reverse_complement
+"""
+import timeit
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import DnaBaseMappings
+
+SIZES = [10 ** 3, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+def per_character(sequence):
+    """
+    The original implementation: dictionary lookup for each character, then a second join for the reversal
+    """
+    return "".join(reversed("".join([DnaBaseMappings.MAPPINGS[c.upper()] for c in sequence])))
+
+
+def measure(function, argument, size):
+    repeat = max(1, 10 ** 7 / size / 10)
+    seconds = min(timeit.repeat(lambda: function(argument), number=repeat, repeat=3)) / repeat
+    return size / seconds / 10 ** 6
+
+
+def main():
+    print "%12s %16s %16s %16s" % ('bases', 'per char MB/s', 'translate MB/s', 'lookup MB/s')
+    for size in SIZES:
+        sequence = "".join(numpy.random.choice(['A', 'T', 'C', 'G'], size=size))
+        array = numpy.frombuffer(sequence, dtype=numpy.uint8)
+
+        print "%12d %16.1f %16.1f %16.1f" % (size,
+                                           measure(per_character, sequence, size),
+                                           measure(DnaBaseMappings.reverse_complement, sequence, size),
+                                           measure(DnaBaseMappings.reverse_complement_array, array, size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the time of a random translocation on the list based Chromosome and the TreapChromosome. The time of the
+list grows linearly with the number of genes, the time of the treap logarithmically (describing the chromosomes for
+the debug log would make it linear again).
+
+Run it from the web2py folder:
+
+    python -m applications.GeneticModeling.benchmarks.translocation
+"""
+import time
+
+import numpy
+
+from applications.GeneticModeling.benchmarks.parse import generate_description
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.randomness import create_random_source
+from applications.GeneticModeling.modules.transformation import Translocation
+from applications.GeneticModeling.modules.treap_chromosome import TreapChromosome
+
+# (number of genes in a chromosome, minimum region length, maximum region length)
+CASES = [(5000, 10, 100), (50000, 10, 100)]
+
+NUMBER_OF_STEPS = 200
+
+
+def measure(left, right):
+    """
+    Runs random translocations between the chromosomes
+
+    :returns the average time of a translocation in milliseconds
+    """
+    rng = create_random_source(0)
+    start = time.time()
+    for step in range(NUMBER_OF_STEPS):
+        Translocation(left, right, random_error=0.0, rng=rng).transform()
+    return (time.time() - start) / NUMBER_OF_STEPS * 1000
+
+
+def main():
+    print "%8s %12s %12s" % ('genes', 'list ms', 'treap ms')
+
+    for number_of_genes, minimum_length, maximum_length in CASES:
+        numpy.random.seed(0)
+        left_description = generate_description(number_of_genes, minimum_length, maximum_length)
+        right_description = generate_description(number_of_genes, minimum_length, maximum_length)
+
+        results = []
+        for convert in [lambda chromosome: chromosome, TreapChromosome.from_chromosome]:
+            left = convert(Chromosome.parse(left_description))
+            right = convert(Chromosome.parse(right_description))
+            results.append(measure(left, right))
+
+        print "%8d %s" % (number_of_genes, ' '.join(['%12.3f' % value for value in results]))
+
+
+if __name__ == '__main__':
+    main()
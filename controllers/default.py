@@ -51,9 +51,22 @@ def _get_simulation_form():
               label=T('Essential genes in window to prevent breaking')),
         Field('use_coexpression', 'boolean',
               label=T('Use coexpression')),
-        Field('compute_diff', 'boolean',
+        Field('compute_diffs', 'boolean',
               label=T('Compute diffs'),
-              default=False)
+              default=False),
+        Field('distance_interval', 'integer',
+              default=1,
+              requires=IS_INT_IN_RANGE(minimum=1),
+              label=T('Compute the distance in every n-th step')),
+        Field('compute_gene_order', 'boolean',
+              label=T('Compute the gene order metrics'),
+              default=False),
+        Field('gene_order_interval', 'integer',
+              requires=IS_EMPTY_OR(IS_INT_IN_RANGE(minimum=1)),
+              label=T('Compute the gene order metrics in every n-th step (the distance interval if empty)')),
+        Field('seed', 'integer',
+              requires=IS_EMPTY_OR(IS_INT_IN_RANGE(minimum=0, maximum=2 ** 63)),
+              label=T('Seed (empty for a random one)'))
     )
 
     return form
@@ -65,7 +78,10 @@ def _get_diff_strategies():
         'EditDistance': T('Levenshtein distance'),
         'Hamming': T('Hamming distance'),
         'SMC': T('SMC'),
-        'Entropy': T('Entropy')
+        'Entropy': T('Entropy'),
+        'BreakpointDistance': T('Breakpoint distance'),
+        'Adjacencies': T('Preserved adjacencies'),
+        'ReversalDistance': T('Reversal distance')
     }
 
 
@@ -2,7 +2,14 @@
 Controller for generating random chromosomes
 """
 
-from numpy import random
+import numpy
+
+from applications.GeneticModeling.modules.randomness import RandomSource, create_generator, new_seed
+
+BASES = numpy.array(['A', 'T', 'C', 'G'])
+
+# the probability of an essential gene
+ESSENTIAL_GENE_PROBABILITY = 0.2
 
 
 def index():
@@ -12,8 +19,9 @@ def index():
     form = _get_generator_form().process()
 
     if form.accepted:
-        session.flash = T('Generating the chromosome')
-        filename = generate_chromosome_description(form)
+        seed = form.vars['seed'] if form.vars['seed'] is not None else new_seed()
+        filename = generate_chromosome_description(form, RandomSource(create_generator(seed)))
+        session.flash = T('The chromosome was generated with the seed %s') % seed
         redirect(URL('generate', 'download', args=[filename]))
 
     return dict(form=form)
@@ -52,16 +60,21 @@ def _get_generator_form():
               label=T('Maximum intergenic region length')),
         Field('generate_essential_genes', 'boolean',
               default=False,
-              label=T('Generate essential genes'))
+              label=T('Generate essential genes')),
+        Field('seed', 'integer',
+              requires=IS_EMPTY_OR(IS_INT_IN_RANGE(minimum=0, maximum=2 ** 63)),
+              label=T('Seed (empty for a random one)'))
     )
 
     return form
 
 
-def generate_chromosome_description(form):
+def generate_chromosome_description(form, rng):
     """
     Generates a chromosome description based on the form parameters. The chromosome description is in a format parseable
     by the Chromosome class.
+
+    :param rng the RandomSource of the content. The same seed and parameters give the same description.
     """
     generate_essential_genes = form.vars['generate_essential_genes']
     number_of_genes = form.vars['number_of_genes']
@@ -70,14 +83,16 @@ def generate_chromosome_description(form):
     minimum_intergenic_region_length = form.vars['minimum_intergenic_region_length']
     maximum_intergenic_region_length = form.vars['maximum_intergenic_region_length']
 
-    index = random.randint(1, high=10000)
+    # the file name doesn't depend on the seed, so the files generated with the same seed don't overwrite each other
+    index = 1 + RandomSource(create_generator()).randint(9999)
     filename = 'generated-chromosome' + str(index) + '.txt'
     with open(os.path.join(request.folder, 'uploads/' + filename), 'w') as output:
         # generate the opening non-breakable region
-        start = _generate_random_region(random.randint(minimum_intergenic_region_length, high=maximum_intergenic_region_length))
+        start = _generate_random_region(rng, _random_length(rng, minimum_intergenic_region_length,
+                                                            maximum_intergenic_region_length))
         output.write('<' + start + '>')
 
-        write_intergenic_region(maximum_intergenic_region_length, minimum_intergenic_region_length, output)
+        write_intergenic_region(rng, maximum_intergenic_region_length, minimum_intergenic_region_length, output)
         # generate the genes and intergenics in sequence
         next_is_gene = True
         count = number_of_genes
@@ -85,10 +100,10 @@ def generate_chromosome_description(form):
         while count > 0:
             count -= 1
             if next_is_gene:
-                gene =  _generate_random_region(random.randint(minimum_gene_length, high=maximum_gene_length))
+                gene = _generate_random_region(rng, _random_length(rng, minimum_gene_length, maximum_gene_length))
 
                 if generate_essential_genes:
-                    essential = random.choice([True, False], p=[0.2, 0.8])
+                    essential = rng.random() < ESSENTIAL_GENE_PROBABILITY
                 else:
                     essential = False
 
@@ -97,24 +112,31 @@ def generate_chromosome_description(form):
                     output.write(';')
                 output.write(')')
             else:
-                write_intergenic_region(maximum_intergenic_region_length, minimum_intergenic_region_length, output)
+                write_intergenic_region(rng, maximum_intergenic_region_length, minimum_intergenic_region_length, output)
             next_is_gene = not next_is_gene
 
         # generate the opening non-breakable region
-        write_intergenic_region(maximum_intergenic_region_length, minimum_intergenic_region_length, output)
-        end = _generate_random_region(
-            random.randint(minimum_intergenic_region_length, high=maximum_intergenic_region_length))
+        write_intergenic_region(rng, maximum_intergenic_region_length, minimum_intergenic_region_length, output)
+        end = _generate_random_region(rng, _random_length(rng, minimum_intergenic_region_length,
+                                                          maximum_intergenic_region_length))
         output.write('<' + end + '>')
 
     return filename
 
 
-def write_intergenic_region(maximum_intergenic_region_length, minimum_intergenic_region_length, output):
-    intergenic = _generate_random_region(
-        random.randint(minimum_intergenic_region_length, high=maximum_intergenic_region_length))
+def write_intergenic_region(rng, maximum_intergenic_region_length, minimum_intergenic_region_length, output):
+    intergenic = _generate_random_region(rng, _random_length(rng, minimum_intergenic_region_length,
+                                                             maximum_intergenic_region_length))
     output.write(intergenic)
 
 
-def _generate_random_region(length):
-    return "".join(random.choice(['A', 'T', 'C', 'G'], size=length))
+def _random_length(rng, minimum, maximum):
+    """
+    Returns a length from [minimum, maximum)
+    """
+    return minimum + rng.randint(maximum - minimum)
+
+
+def _generate_random_region(rng, length):
+    return "".join(BASES[rng.randint(4, size=length)])
 
@@ -1,4 +1,25 @@
-import os
+import bisect
+import time
+
+import numpy
+
+from applications.GeneticModeling.modules.export import FORMATS, GZIP_CONTENT_TYPE, chunks, format_lines, \
+    gzip_chunks, is_byte_range, parse_range, slice_stream
+from applications.GeneticModeling.modules.history import CHROMOSOME_KEYS, history_items, history_steps
+from applications.GeneticModeling.modules.metrics import GENE_ORDER_METRICS
+from applications.GeneticModeling.modules.result_store import FINAL_CHROMOSOME_FILES, gene_order_columns, \
+    is_manifest
+from applications.GeneticModeling.modules.tasks import PENDING_STATUSES, task_status
+
+# the statuses of the runs that ended without a result
+STOPPED_STATUSES = ['FAILED', 'TIMEOUT', 'STOPPED']
+
+# the longest wait of a progress request and the interval of its checks in seconds
+MAXIMUM_PROGRESS_WAIT = 25.0
+PROGRESS_CHECK_INTERVAL = 0.5
+
+# a running simulation without a progress report for this many seconds is reported stalled
+STALLED_AFTER = 15 * PROGRESS_INTERVAL
 
 
 def index():
@@ -15,6 +36,11 @@ def index():
     use_essential_gene_pairs = 'True' == request.vars['use_essential_gene_pairs']
 
     compute_diffs = 'True' == request.vars['compute_diffs']
+    diff_strategy = request.vars['diff_strategy'] or 'EditDistance'
+    distance_interval = int(request.vars['distance_interval'] or 1)
+    compute_gene_order = 'True' == request.vars['compute_gene_order']
+    gene_order_interval = int(request.vars['gene_order_interval'] or distance_interval)
+    seed = int(request.vars['seed']) if request.vars['seed'] else None
 
     sequence_patterns = request.vars['sequence_patterns']
 
@@ -38,7 +64,12 @@ def index():
                      random_error=random_error,
                                        essential_genes_in_window=essential_genes_in_window,
                                        essential_genes_window_size=essential_genes_window_size,
-                                       compute_diffs=compute_diffs)
+                                       compute_diffs=compute_diffs,
+                                       diff_strategy=diff_strategy,
+                                       distance_interval=distance_interval,
+                                       compute_gene_order=compute_gene_order,
+                                       gene_order_interval=gene_order_interval,
+                                       seed=seed)
 
     redirect(URL('simulation', 'result', vars=dict(task_id=task.id)))
 
@@ -51,54 +82,259 @@ def result():
     result = status.result
 
     data = dict(traceback=BEAUTIFY(traceback),
-                status=status)
-    if status.scheduler_run.status == 'COMPLETED':
-        # write the gene orders to files
-        left_ordinals_file = "left-chromosome-ordinals.txt"
-        _write_ordinals_to_file(result['history'], 'left', left_ordinals_file)
+                status=status,
+                resume_url=None,
+                progress_url=URL('simulation', 'progress', vars=dict(task_id=task_id)))
+    if status.scheduler_run.status == 'COMPLETED' and is_manifest(result):
+        data.update(_stored_result_data(task_id, result))
+    elif status.scheduler_run.status == 'COMPLETED':
+        # the earlier simulations returned the whole result
+        data.update(_full_result_data(task_id, result))
+    elif status.scheduler_run.status in STOPPED_STATUSES and has_checkpoint(status) \
+            and get_resuming_task(status) is None:
+        data['resume_url'] = URL('simulation', 'resume', vars=dict(task_id=task_id))
+
+    return data
+
+
+def progress():
+    """
+    Returns the progress of a simulation task as JSON (see _progress_data). If the step the page has already shown is
+    given then the response waits (long polling) until a newer report, the end of the task or the timeout.
+
+    vars: task_id, step (the last shown step), wait (the longest wait in seconds)
+    """
+    task_id = int(request.vars['task_id'])
+    shown_step = int(request.vars['step']) if request.vars['step'] else None
+    deadline = time.time() + min(float(request.vars['wait'] or 0), MAXIMUM_PROGRESS_WAIT)
+
+    while True:
+        status = get_task_status(task_id)
+        if status is None:
+            raise HTTP(404)
+
+        data = _progress_data(status)
+        if shown_step is None or data['step'] != shown_step or data['status'] not in PENDING_STATUSES \
+                or time.time() >= deadline:
+            return response.json(data)
+
+        # the new reports are visible in a new transaction
+        db.commit()
+        time.sleep(PROGRESS_CHECK_INTERVAL)
+
+
+def _progress_data(status):
+    """
+    Returns the status of a task and the fields of its last progress report (see progress.py) with the number of
+    seconds since the report and whether the simulation seems stalled. The fields are None before the first report.
+    """
+    run_status = task_status(status)
+    data = dict(status=run_status, step=None, total=None, steps_per_second=None, eta=None, distance=None,
+                seconds_since_update=None, stalled=False)
+
+    report = get_task_progress(status)
+    if report is not None:
+        for key in ['step', 'total', 'steps_per_second', 'eta', 'distance']:
+            data[key] = report[key]
+        data['seconds_since_update'] = time.time() - report.updated
+        data['stalled'] = run_status == 'RUNNING' and data['seconds_since_update'] > STALLED_AFTER
+    return data
+
+
+def resume():
+    """
+    Continues a stopped simulation from its last checkpoint in a new task
+    """
+    task_id = int(request.vars['task_id'])
+    status = get_task_status(task_id)
+    if status is None or not has_checkpoint(status):
+        raise HTTP(404)
+
+    # a simulation is resumed only once, the repeated requests show the task that continues it
+    task = get_resuming_task(status)
+    if task is None:
+        scheduler, task = resume_simulation(status)
+    redirect(URL('simulation', 'result', vars=dict(task_id=task.id)))
+
+
+def _stored_result_data(task_id, manifest):
+    """
+    Creates the data of the result page from a stored result (see result_store.py). Only the values of the steps are
+    read for the charts.
+    """
+    task_name = manifest['name']
+    data = _history_download_urls(task_id)
+
+    for key in CHROMOSOME_KEYS:
+        data[key + '_result_download_url'] = _get_result_download_url(task_name, FINAL_CHROMOSOME_FILES[key])
+
+    columns = result_store.load_steps(manifest)
+    distances = columns['distance']
+    data['dataset'] = distances[~numpy.isnan(distances)].tolist()
 
-        right_ordinals_file = "right-chromosome-ordinals.txt"
-        _write_ordinals_to_file(result['history'], 'left', right_ordinals_file)
+    # the gene order metrics are sampled in the same steps
+    gene_order = gene_order_columns(columns)
+    sampled = ~numpy.isnan(gene_order.values()[0]) if gene_order else numpy.zeros(manifest['step_count'], dtype=bool)
+    data['steps'] = (numpy.flatnonzero(sampled) + 1).tolist()
+    # the earlier manifests have no seed
+    data['seed'] = manifest.get('seed')
+    data['gene_order_datasets'] = [(name, gene_order[name][sampled].astype(numpy.int64).tolist())
+                                   for name in GENE_ORDER_METRICS if name in gene_order]
+    return data
 
-        left_result_file = 'left-chromosome-result.txt'
-        _write_chromosome_to_file(result['final_left'], left_result_file)
 
-        right_result_file = 'right-chromosome-result.txt'
-        _write_chromosome_to_file(result['final_right'], right_result_file)
+def _full_result_data(task_id, result):
+    """
+    Creates the data of the result page from a result returned by the task
+    """
+    data = _history_download_urls(task_id)
 
-        data['left_result_download_url'] = _get_download_url(left_result_file)
-        data['right_result_download_url'] = _get_download_url(right_result_file)
+    for key in CHROMOSOME_KEYS:
+        data[key + '_result_download_url'] = _get_final_download_url(task_id, key)
 
-        data['left_ordinals_download_url'] = _get_download_url(left_ordinals_file)
-        data['right_ordinals_download_url'] = _get_download_url(right_ordinals_file)
+    data['seed'] = result.get('seed')
 
-        # create the dataset for the chart
-        dataset = [history_item['distance'] for history_item in result['history'] if 'distance' in history_item]
-        data['dataset'] = dataset
+    # create the dataset for the chart
+    steps = history_steps(result['history'])
+    data['dataset'] = [history_item['distance'] for history_item in steps if 'distance' in history_item]
+
+    # the gene order metrics of the sampled steps (the earlier simulations didn't record them)
+    sampled = [(index + 1, history_item['gene_order']) for index, history_item in enumerate(steps)
+               if 'gene_order' in history_item]
+    data['steps'] = [step for step, values in sampled]
+    data['gene_order_datasets'] = []
+    if sampled:
+        data['gene_order_datasets'] = [(name, [values[name] for step, values in sampled])
+                                       for name in GENE_ORDER_METRICS]
+    return data
+
+
+def _history_download_urls(task_id):
+    """
+    Returns the data with the download URLs of the gene ordinal histories (see download_history)
+    """
+    data = dict()
+    for key in CHROMOSOME_KEYS:
+        data[key + '_ordinals_download_url'] = _get_history_download_url(task_id, key)
 
+    data['history_export_urls'] = [('%s %s%s' % (key, file_format.upper(), ' (gzip)' if compress else ''),
+                                    _get_history_download_url(task_id, key, file_format, compress))
+                                   for key in CHROMOSOME_KEYS
+                                   for file_format in ['csv', 'tsv']
+                                   for compress in [False, True]]
     return data
 
 
-def download():
+def download_result():
+    """
+    Downloads a file of a stored simulation result
+    """
+    name, file_name = request.args[0], request.args[1]
+
+    response.stream(result_store.path(name, file_name), attachment=True, filename=file_name)
+
+
+def download_history():
+    """
+    Streams the gene ordinals of the steps of a simulation (see export.py). The uncompressed exports of the stored
+    results support HTTP range requests: their lengths were recorded when the result was stored and a range is
+    generated from the keyframe before it, so the downloads can be continued.
+
+    args: the task id
+    vars: chromosome (left or right), format (txt, csv or tsv), gzip (True to compress the stream)
+    """
+    task_id = int(request.args[0])
+    key = request.vars['chromosome'] or 'left'
+    file_format = request.vars['format'] or 'txt'
+    compress = 'True' == request.vars['gzip']
+    if key not in CHROMOSOME_KEYS or file_format not in FORMATS:
+        raise HTTP(400)
+
+    status = get_task_status(task_id)
+    if status is None or status.scheduler_run is None or status.scheduler_run.status != 'COMPLETED':
+        raise HTTP(404)
+
+    file_name = '%s-chromosome-ordinals.%s%s' % (key, file_format, '.gz' if compress else '')
+    headers = {'Content-Type': GZIP_CONTENT_TYPE if compress else FORMATS[file_format],
+               'Content-Disposition': 'attachment; filename="%s"' % file_name}
+
+    result = status.result
+    if not is_manifest(result):
+        # the full results of the earlier simulations are sent from the start
+        text = chunks(format_lines(result['history'], key, file_format))
+        headers['Accept-Ranges'] = 'none'
+        raise HTTP(200, gzip_chunks(text) if compress else text, **headers)
+
+    index = result_store.load_history_index(result)
+    if compress:
+        headers['Accept-Ranges'] = 'none'
+        raise HTTP(200, gzip_chunks(_stream_history(result, index, key, file_format)), **headers)
+
+    offsets = index['exports'][key][file_format]
+    length = offsets[-1]
+    headers['Accept-Ranges'] = 'bytes'
+
+    byte_range = None
+    range_header = request.env.http_range
+    if is_byte_range(range_header):
+        try:
+            byte_range = parse_range(range_header, length)
+        except ValueError:
+            raise HTTP(416, **{'Content-Range': 'bytes */%d' % length})
+
+    if byte_range is None:
+        headers['Content-Length'] = str(length)
+        raise HTTP(200, _stream_history(result, index, key, file_format), **headers)
+
+    # the stream is generated from the last segment starting before the range
+    start, stop = byte_range
+    segment = bisect.bisect_right(offsets, start, hi=len(offsets) - 1) - 1
+    text = _stream_history(result, index, key, file_format, segment)
+    headers['Content-Range'] = 'bytes %d-%d/%d' % (start, stop - 1, length)
+    headers['Content-Length'] = str(stop - start)
+    raise HTTP(206, slice_stream(text, start - offsets[segment], stop - offsets[segment]), **headers)
+
+
+def _stream_history(manifest, index, key, file_format, segment=0):
+    """
+    Returns the chunks of the uncompressed export of a stored history from the beginning of a segment
     """
-    Downloads a simulation file
+    replayed = result_store.replay_history(manifest, index, segment)
+    first_step = segment * (index['keyframe_interval'] or 0)
+    return chunks(format_lines(history_items(replayed), key, file_format, first_step=first_step))
+
+
+def download_final():
     """
-    file_name = request.args[0]
+    Downloads a final chromosome description of a full result returned by a task (the stored results are downloaded
+    from their files, see download_result)
+
+    args: the task id
+    vars: chromosome (left or right)
+    """
+    task_id = int(request.args[0])
+    key = request.vars['chromosome'] or 'left'
+    if key not in CHROMOSOME_KEYS:
+        raise HTTP(400)
+
+    status = get_task_status(task_id)
+    if status is None or status.scheduler_run is None or status.scheduler_run.status != 'COMPLETED' \
+            or is_manifest(status.result):
+        raise HTTP(404)
 
-    response.stream(os.path.join(request.folder, 'uploads/' + file_name), attachment=True, filename=file_name)
+    file_name = '%s-chromosome-result.txt' % key
+    raise HTTP(200, status.result['final_' + key],
+               **{'Content-Type': FORMATS['txt'], 'Content-Disposition': 'attachment; filename="%s"' % file_name})
 
 
-def _write_ordinals_to_file(history, key, left_result_file):
-    with open(os.path.join(request.folder, 'uploads/' + left_result_file), 'w') as output:
-        for history_item in history:
-            ordinals = history_item[key]['ordinals']
-            output.write(', '.join([str(ordinal) for ordinal in ordinals]) + '\n')
+def _get_result_download_url(name, file_name):
+    return URL(c='simulation', f='download_result', args=[name, file_name])
 
 
-def _write_chromosome_to_file(chromosome_description, file_name):
-    with open(os.path.join(request.folder, 'uploads/' + file_name), 'w') as output:
-        output.write(chromosome_description)
+def _get_history_download_url(task_id, key, file_format='txt', compress=False):
+    return URL(c='simulation', f='download_history', args=[task_id],
+               vars=dict(chromosome=key, format=file_format, gzip=compress))
 
 
-def _get_download_url(file_name):
-    return URL(c='simulation', f='download', args=[file_name])
\ No newline at end of file
+def _get_final_download_url(task_id, key):
+    return URL(c='simulation', f='download_final', args=[task_id], vars=dict(chromosome=key))
@@ -0,0 +1,177 @@
+"""
+Controller of the parameter sweeps (see sweep.py)
+"""
+import os
+
+from applications.GeneticModeling.modules.metrics import GENE_ORDER_METRICS, METRICS
+from applications.GeneticModeling.modules.randomness import new_seed, spawn_seeds
+from applications.GeneticModeling.modules.sweep import SWEEP_PARAMETERS, expand_grid, parse_values, sort_rows, \
+    split_points
+from applications.GeneticModeling.modules.tasks import has_ended, task_status
+
+# the largest number of grid points of a sweep
+MAXIMUM_POINTS = 1000
+
+
+def index():
+    """
+    Shows the sweep form and queues the tasks of the sweep
+    """
+    form = _get_sweep_form().process(onvalidation=_validate_grid)
+
+    if form.accepted:
+        session.flash = T('The sweep starts')
+        seed = form.vars['seed'] if form.vars['seed'] is not None else new_seed()
+        task_ids = _queue_sweep(form.vars, seed)
+        redirect(URL('sweep', 'result', vars=dict(task_ids=','.join(str(task_id) for task_id in task_ids),
+                                                  seed=seed)))
+
+    return dict(form=form)
+
+
+def result():
+    """
+    Shows the summary table of the finished grid points of a sweep
+    """
+    task_ids = [int(task_id) for task_id in request.vars['task_ids'].split(',')]
+
+    rows = []
+    tracebacks = []
+    running = 0
+    for task_id in task_ids:
+        status = get_task_status(task_id)
+        run_status = task_status(status)
+        if run_status == 'COMPLETED':
+            rows += status.result
+        elif has_ended(status):
+            # the timed out, stopped and expired tasks are reported like the failed ones
+            traceback = status.scheduler_run.traceback or T('The task ended with status %s') % run_status
+            tracebacks.append(BEAUTIFY(traceback))
+        else:
+            running += 1
+
+    rows = sort_rows(rows)
+    names = [name for name, value_type in SWEEP_PARAMETERS if any(name in row['parameters'] for row in rows)]
+    series = [name for name in ['distance'] + ['gene_order.' + metric for metric in GENE_ORDER_METRICS]
+              if any(name in row['final'] for row in rows)]
+
+    return dict(rows=rows, names=names, series=series, running=running, tracebacks=tracebacks,
+                seed=request.vars['seed'])
+
+
+def _queue_sweep(values, seed):
+    """
+    Expands the grid and queues the tasks of the sweep
+
+    :param seed the root seed of the replicates (see spawn_seeds)
+
+    :returns the ids of the tasks
+    """
+    points = expand_grid(_get_grid(values))
+    seeds = spawn_seeds(seed, values['replicates'])
+
+    # only the final distances and gene order metrics are summarized, so only the last step computes them
+    final_interval = max(point['number_of_transformations'] for point in points) + 1
+    parameters = dict(longer_breaks_often=values['longer_breaks_often'],
+                      compute_distances=True,
+                      diff_strategy=values['diff_strategy'],
+                      distance_interval=final_interval,
+                      compute_gene_order=values['compute_gene_order'],
+                      gene_order_interval=final_interval)
+
+    task_ids = []
+    for task_points in split_points(points, values['tasks']):
+        scheduler, task = queue_sweep(points=task_points,
+                                      seeds=seeds,
+                                      parameters=parameters,
+                                      left_chromosome_file=values['left_chromosome_file'],
+                                      right_chromosome_file=values['right_chromosome_file'],
+                                      use_coexpression=values['use_coexpression'])
+        task_ids.append(task.id)
+    return task_ids
+
+
+def _get_grid(values):
+    """
+    Returns the values of the swept parameters by name. The essential gene parameters are swept only if the essential
+    gene pairs are used.
+    """
+    grid = dict((name, parse_values(values[name], value_type)) for name, value_type in SWEEP_PARAMETERS)
+    if not values['use_essential_gene_pairs']:
+        grid['essential_genes_window_size'] = []
+        grid['essential_genes_in_window'] = []
+    return grid
+
+
+def _validate_grid(form):
+    for name, value_type in SWEEP_PARAMETERS:
+        try:
+            parse_values(form.vars[name], value_type)
+        except ValueError:
+            form.errors[name] = T('Invalid values')
+    if form.errors:
+        return
+
+    points = expand_grid(_get_grid(form.vars))
+    if len(points) > MAXIMUM_POINTS:
+        form.errors['number_of_transformations'] = T('Too many grid points: %s') % len(points)
+
+
+def _get_sweep_form():
+    values_comment = T('Comma separated values and start:stop:step ranges')
+    form = SQLFORM.factory(
+        Field('left_chromosome_file', 'upload', uploadfolder=os.path.join(request.folder, 'uploads'),
+              requires=IS_NOT_EMPTY(),
+              label=T('Left chromosome file')),
+        Field('right_chromosome_file', 'upload', uploadfolder=os.path.join(request.folder, 'uploads'),
+              requires=IS_NOT_EMPTY(),
+              label=T('Right chromosome file')),
+        Field('number_of_transformations', 'string',
+              requires=IS_NOT_EMPTY(),
+              default='50',
+              comment=values_comment,
+              label=T('Number of transformations')),
+        Field('rate_of_translocations', 'string',
+              requires=IS_NOT_EMPTY(),
+              default='0:100:25',
+              comment=values_comment,
+              label=T('Percentage of translocations')),
+        Field('random_error', 'string',
+              requires=IS_NOT_EMPTY(),
+              default='0.0',
+              comment=values_comment,
+              label=T('Probability of random error')),
+        Field('diff_strategy', 'string',
+              requires=IS_IN_SET(sorted(METRICS), zero=None),
+              default='EditDistance',
+              label=T('Diff Strategy')),
+        Field('compute_gene_order', 'boolean',
+              label=T('Compute the gene order metrics'),
+              default=False),
+        Field('longer_breaks_often', 'boolean',
+              label=T('Longer intergenic regions break with higher probability'),
+              default=True),
+        Field('use_essential_gene_pairs', 'boolean',
+              label=T('Use essential gene pairs')),
+        Field('essential_genes_window_size', 'string',
+              comment=values_comment,
+              label=T('Essential genes window size')),
+        Field('essential_genes_in_window', 'string',
+              comment=values_comment,
+              label=T('Essential genes in window to prevent breaking')),
+        Field('use_coexpression', 'boolean',
+              label=T('Use coexpression')),
+        Field('replicates', 'integer',
+              default=1,
+              requires=IS_INT_IN_RANGE(minimum=1, maximum=1001),
+              label=T('Replicates of each grid point')),
+        Field('seed', 'integer',
+              requires=IS_EMPTY_OR(IS_INT_IN_RANGE(minimum=0, maximum=2 ** 63)),
+              label=T('Seed (empty for a random one)')),
+        Field('tasks', 'integer',
+              default=1,
+              requires=IS_INT_IN_RANGE(minimum=1, maximum=101),
+              label=T('Number of scheduler tasks'))
+    )
+
+    return form
@@ -31,7 +31,8 @@ response.google_analytics_id = None
 # ----------------------------------------------------------------------------------------------------------------------
 
 response.menu = [
-    (T('Simulation'), False, URL('default', 'index'), [])
+    (T('Simulation'), False, URL('default', 'index'), []),
+    (T('Parameter sweep'), False, URL('sweep', 'index'), [])
 ]
 
 DEVELOPMENT_MENU = True
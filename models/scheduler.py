@@ -1,18 +1,54 @@
 import copy
-import random
-
-import editdistance
 
 from applications.GeneticModeling.modules.chromosome import Chromosome
-from applications.GeneticModeling.modules.transformation import Translocation, Inversion
+from applications.GeneticModeling.modules.checkpoint import STATE_FILE, Checkpointer
+from applications.GeneticModeling.modules.ensemble import run_ensemble
+from applications.GeneticModeling.modules.mapped_chromosome import load_mapped_chromosome
+from applications.GeneticModeling.modules.progress import ProgressReporter
+from applications.GeneticModeling.modules.result_store import ResultStore
+from applications.GeneticModeling.modules.simulation import run_simulation
+from applications.GeneticModeling.modules.sweep import run_sweep
+from applications.GeneticModeling.modules.tasks import PENDING_STATUSES
+from applications.GeneticModeling.modules.treap_chromosome import TreapChromosome
 from gluon.scheduler import Scheduler
 
+import json
 import os
+import uuid
 
 import logging
 
 logger = logging.getLogger("web2py.app.GeneticModeling")
-logger.setLevel(logging.DEBUG)
+
+# the data structures that can store the regions of the chromosomes during the simulation
+CHROMOSOME_BACKENDS = {
+    'list': Chromosome,
+    'treap': TreapChromosome.from_chromosome
+}
+
+# the stored history contains a copy of the gene orders after every HISTORY_KEYFRAME_INTERVAL-th step (see history.py)
+HISTORY_KEYFRAME_INTERVAL = 1000
+
+# the simulations write their results here and return only the manifests (see result_store.py)
+result_store = ResultStore(os.path.join(request.folder, 'results'))
+
+# the simulations write a checkpoint every CHECKPOINT_INTERVAL seconds, a stopped simulation can be resumed from its
+# last checkpoint (see checkpoint.py)
+CHECKPOINT_INTERVAL = 60.0
+CHECKPOINT_FOLDER = os.path.join(request.folder, 'results', 'checkpoints')
+
+# the running simulations report their progress every PROGRESS_INTERVAL seconds (see progress.py)
+PROGRESS_INTERVAL = 2.0
+
+# the last progress report of each simulation task by task uuid
+db.define_table('simulation_progress',
+                Field('task_uuid', 'string', length=255, unique=True),
+                Field('step', 'integer'),
+                Field('total', 'integer'),
+                Field('steps_per_second', 'double'),
+                Field('eta', 'double'),
+                Field('distance', 'double'),
+                Field('updated', 'double'))
 
 
 def simulation(number_of_transformations,
@@ -26,89 +62,239 @@ def simulation(number_of_transformations,
                    right_chromosome_file,
                essential_genes_window_size,
                essential_genes_in_window,
-               compute_diffs=False):
+               compute_diffs=False,
+               diff_strategy='EditDistance',
+               distance_interval=1,
+               compute_gene_order=False,
+               gene_order_interval=None,
+               chromosome_backend='list',
+               packed_content=False,
+               seed=None,
+               buffered_random=True,
+               keyframe_interval=HISTORY_KEYFRAME_INTERVAL,
+               checkpoint_name=None):
 
     # build the chromosomes from the files
+    left_chromosome, right_chromosome = _build_chromosomes(left_chromosome_file, right_chromosome_file,
+                                                           use_coexpression=use_coexpression,
+                                                           backend=chromosome_backend,
+                                                           packed=packed_content)
+
+    if not use_essential_gene_pairs:
+        essential_genes_in_window =None
+        essential_genes_window_size = None
+
+    # the scheduler executes the task with W2P_TASK defined
+    task = globals().get('W2P_TASK')
+    task_name = task.uuid if task else uuid.uuid4().hex
+
+    # a resumed simulation continues the checkpoints of the stopped one
+    checkpointer = Checkpointer(os.path.join(CHECKPOINT_FOLDER, checkpoint_name or task_name),
+                                interval=CHECKPOINT_INTERVAL,
+                                convert=lambda chromosome: _convert_chromosome(chromosome, chromosome_backend,
+                                                                               packed_content))
+
+    result = run_simulation(left_chromosome,
+                            right_chromosome,
+                            number_of_transformations=number_of_transformations,
+                            rate_of_translocations=rate_of_translocations,
+                            random_error=random_error,
+                            longer_breaks_often=longer_breaks_often,
+                            essential_genes_window_size=essential_genes_window_size,
+                            essential_genes_in_window=essential_genes_in_window,
+                            compute_distances=compute_diffs,
+                            diff_strategy=diff_strategy,
+                            distance_interval=distance_interval,
+                            compute_gene_order=compute_gene_order,
+                            gene_order_interval=gene_order_interval,
+                            compact_history=True,
+                            keyframe_interval=keyframe_interval,
+                            seed=seed,
+                            buffered_random=buffered_random,
+                            checkpointer=checkpointer,
+                            progress=ProgressReporter(lambda progress: _save_progress(task_name, progress),
+                                                      interval=PROGRESS_INTERVAL))
+
+    manifest = result_store.save(task_name, result)
+    checkpointer.clear()
+    return manifest
+
+
+def ensemble(replicates,
+             number_of_transformations,
+             rate_of_translocations,
+             random_error,
+             longer_breaks_often,
+             use_coexpression,
+             left_chromosome_file,
+             right_chromosome_file,
+             use_essential_gene_pairs=False,
+             essential_genes_window_size=None,
+             essential_genes_in_window=None,
+             seeds=None,
+             seed=None,
+             processes=None,
+             compute_diffs=False,
+             diff_strategy='EditDistance',
+             distance_interval=1,
+             compute_gene_order=False,
+             gene_order_interval=None,
+             chromosome_backend='list',
+             packed_content=False):
+    """
+    Runs replicate simulations of the same chromosomes in a process pool (see ensemble.py). The files are parsed
+    once, the task returns the per step statistics of the replicates.
+    """
+    left_chromosome, right_chromosome = _build_chromosomes(left_chromosome_file, right_chromosome_file,
+                                                           use_coexpression=use_coexpression,
+                                                           backend=chromosome_backend,
+                                                           packed=packed_content)
+
+    if not use_essential_gene_pairs:
+        essential_genes_in_window = None
+        essential_genes_window_size = None
+
+    return run_ensemble(left_chromosome,
+                        right_chromosome,
+                        replicates=replicates,
+                        seeds=seeds,
+                        seed=seed,
+                        processes=processes,
+                        number_of_transformations=number_of_transformations,
+                        rate_of_translocations=rate_of_translocations,
+                        random_error=random_error,
+                        longer_breaks_often=longer_breaks_often,
+                        essential_genes_window_size=essential_genes_window_size,
+                        essential_genes_in_window=essential_genes_in_window,
+                        compute_distances=compute_diffs,
+                        diff_strategy=diff_strategy,
+                        distance_interval=distance_interval,
+                        compute_gene_order=compute_gene_order,
+                        gene_order_interval=gene_order_interval)
+
+
+def sweep(points,
+          seeds,
+          parameters,
+          left_chromosome_file,
+          right_chromosome_file,
+          use_coexpression=False,
+          processes=None,
+          chromosome_backend='list',
+          packed_content=False):
+    """
+    Runs the simulations of grid points of a parameter sweep (see sweep.py). The files are parsed once for all the
+    points, the task returns the rows of the summary table.
+
+    :param points the parameters of the grid points
+    :param seeds the seeds of the replicates of each point
+    :param parameters the common parameters of run_simulation
+    """
+    left_chromosome, right_chromosome = _build_chromosomes(left_chromosome_file, right_chromosome_file,
+                                                           use_coexpression=use_coexpression,
+                                                           backend=chromosome_backend,
+                                                           packed=packed_content)
+
+    return run_sweep(left_chromosome, right_chromosome, points, seeds, processes=processes, **parameters)
+
+
+def _save_progress(task_name, progress):
+    db.simulation_progress.update_or_insert(db.simulation_progress.task_uuid == task_name,
+                                            task_uuid=task_name, **progress)
+    # the scheduler commits only at the end of the task, the result page reads the reports while it's running
+    db.commit()
+
+
+def _build_chromosomes(left_chromosome_file, right_chromosome_file, use_coexpression=False, backend='list',
+                       packed=False):
     uploads_folder = os.path.join(request.folder, 'uploads')
-    left_chromosome = _build_chromosome_from_file(os.path.join(uploads_folder, left_chromosome_file),
-                                                  use_coexpression=use_coexpression)
-    right_chromosome = _build_chromosome_from_file(os.path.join(uploads_folder, right_chromosome_file),
-                                                   use_coexpression=use_coexpression)
+    return [_build_chromosome_from_file(os.path.join(uploads_folder, file_name),
+                                        use_coexpression=use_coexpression,
+                                        backend=backend,
+                                        packed=packed)
+            for file_name in [left_chromosome_file, right_chromosome_file]]
 
-    number_of_translocations = int((float(rate_of_translocations)/100) * number_of_transformations)
-    number_of_inversions = number_of_transformations - number_of_translocations
 
-    logger.debug("number of translocations: %d, number of inversions: %d", number_of_translocations, number_of_inversions)
+def _build_chromosome_from_file(file_name, use_coexpression=False, backend='list', packed=False):
+    # the regions point into the mapped upload until the transformations change them
+    chromosome = load_mapped_chromosome(file_name, use_coexpression=use_coexpression)
+    return _convert_chromosome(chromosome, backend, packed)
 
-    # this sequence contains the list if transformations to execute
-    transformation_sequence = ['Translocation'] * number_of_translocations + ['Inversion'] * number_of_inversions
-    random.shuffle(transformation_sequence)
 
-    # history contains tuples: each tuple contains the left and the right chromosome in the given step
-    history = []
+def _convert_chromosome(chromosome, backend='list', packed=False):
+    if packed:
+        # the bases are read once and stored on 2 bits, the transformations keep them packed
+        chromosome.pack()
 
-    # combine the two chromosome representations for later diffs
-    original_combination = left_chromosome.represent() + right_chromosome.represent()
+    if backend != 'list':
+        chromosome = CHROMOSOME_BACKENDS[backend](chromosome)
+    return chromosome
 
-    if not use_essential_gene_pairs:
-        essential_genes_in_window =None
-        essential_genes_window_size = None
 
-    for step in transformation_sequence:
-        if step == 'Translocation':
-            transformation = Translocation(left_chromosome,
-                                          right_chromosome,
-                                          random_error=random_error,
-                                          longer_breaks_often=longer_breaks_often,
-                                            essential_genes_in_window=essential_genes_in_window)
-        elif step == 'Inversion':
-            selected = random.choice([left_chromosome,
-                                      right_chromosome])
-            transformation = Inversion(selected,
-                                  random_error=random_error,
-                                  longer_breaks_often=longer_breaks_often,
-                                    essential_genes_window_size=essential_genes_window_size,
-                                    essential_genes_in_window=essential_genes_in_window)
+scheduler = Scheduler(db, dict(simulation=simulation, ensemble=ensemble, sweep=sweep))
 
-        transformation.transform()
 
-        levenshtein_distance = 0
-        if compute_diffs:
-            combination = left_chromosome.represent() + right_chromosome.represent()
-            levenshtein_distance = editdistance.eval(original_combination, combination)
+def queue_simulation(**args):
+    task = scheduler.queue_task(simulation, pvars=args, immediate=True, timeout=3000)
 
-        history.append(dict(left=_create_history_item(left_chromosome),
-                            right=_create_history_item(right_chromosome),
-                            transformation=step,
-                            distance=levenshtein_distance))
+    return scheduler, task
 
-    result = dict(history=history,
-                  final_left=left_chromosome.represent(),
-                  final_right=right_chromosome.represent())
-    return result
 
+def queue_ensemble(**args):
+    task = scheduler.queue_task(ensemble, pvars=args, immediate=True, timeout=30000)
 
-def _create_history_item(chromosome):
-    ordinals = chromosome.get_gene_ordinals()
+    return scheduler, task
 
-    return dict(ordinals=ordinals)
 
+def queue_sweep(**args):
+    task = scheduler.queue_task(sweep, pvars=args, immediate=True, timeout=30000)
 
-def _build_chromosome_from_file(file_name, use_coexpression=False):
-    with open(file_name, 'r') as file:
-        chromosome_description = file.read()
-        chromosome = Chromosome.parse(chromosome_description)
+    return scheduler, task
 
-        return chromosome
 
+def resume_simulation(status):
+    """
+    Queues a simulation continuing a stopped simulation task (for example after a timeout) from its last checkpoint
 
-scheduler = Scheduler(db, dict(simulation=simulation))
+    :param status the status of the stopped task (see get_task_status)
+    """
+    args = json.loads(status.scheduler_task.vars)
+    args['checkpoint_name'] = _checkpoint_name(status)
 
+    return queue_simulation(**args)
 
-def queue_simulation(**args):
-    task = scheduler.queue_task(simulation, pvars=args, immediate=True, timeout=3000)
 
-    return scheduler, task
+def has_checkpoint(status):
+    """
+    Returns True if a simulation task has a checkpoint to resume from
+    """
+    return os.path.exists(os.path.join(CHECKPOINT_FOLDER, _checkpoint_name(status), STATE_FILE))
+
+
+def get_resuming_task(status):
+    """
+    Returns the pending simulation task (queued or running) continuing the checkpoints of a stopped task or None
+    """
+    checkpoint_name = _checkpoint_name(status)
+    tasks = db((db.scheduler_task.function_name == 'simulation') &
+               (db.scheduler_task.status.belongs(PENDING_STATUSES)) &
+               (db.scheduler_task.id != status.scheduler_task.id)).select()
+    for task in tasks:
+        if json.loads(task.vars).get('checkpoint_name') == checkpoint_name:
+            return task
+    return None
+
+
+def _checkpoint_name(status):
+    # the resumed simulations continue the checkpoints of the first one
+    return json.loads(status.scheduler_task.vars).get('checkpoint_name') or status.scheduler_task.uuid
+
+
+def get_task_progress(status):
+    """
+    Returns the last progress report of a simulation task (see progress.py) or None
+    """
+    return db(db.simulation_progress.task_uuid == status.scheduler_task.uuid).select().first()
 
 
 def get_task_status(task_id):
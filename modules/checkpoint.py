@@ -0,0 +1,189 @@
+"""
+Checkpoints of the running simulations, so a simulation killed by the scheduler timeout or a dying worker can be
+resumed from its last checkpoint instead of the first step.
+
+The files of the checkpoint folder of a simulation:
+
+    original-left.snap, original-right.snap: the binary snapshots (see snapshot.py) of the chromosomes before the
+        first step, written once. The metrics compare the chromosomes to these.
+    steps.jsonl, keyframes.jsonl: the recorded history steps and keyframes (see HistoryRecorder), a JSON document in
+        each line. They are only appended, a checkpoint stores their lengths.
+    left-<step>.snap, right-<step>.snap: the snapshots of the chromosomes after step steps
+    state.json: the last checkpoint: the number of steps done, the transformation sequence, the seed, the state of
+        the random source and the lengths of the history files
+
+A checkpoint is complete when its state.json is written (it's replaced atomically after the snapshots), so a
+simulation killed while writing one resumes from the previous checkpoint.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from applications.GeneticModeling.modules.snapshot import load_chromosome, save_chromosome
+
+STATE_FILE = 'state.json'
+STEPS_FILE = 'steps.jsonl'
+KEYFRAMES_FILE = 'keyframes.jsonl'
+
+# the default number of seconds between the checkpoints
+DEFAULT_INTERVAL = 60.0
+
+# the letters of the transformations in the stored sequences
+_TRANSFORMATION_CODES = dict(Inversion='I', Translocation='T')
+_TRANSFORMATION_NAMES = dict((code, name) for name, code in _TRANSFORMATION_CODES.items())
+
+
+class Checkpointer(object):
+    """
+    Writes the checkpoints of a simulation to a folder and reads the last one
+
+    Attributes:
+        folder: the checkpoint folder of the simulation
+        interval: the minimum number of seconds between two checkpoints (0 writes one after every step)
+        convert: the function converting the loaded chromosomes (Chromosome instances) to the chromosome backend of
+            the simulation (for example TreapChromosome.from_chromosome). None keeps them.
+    """
+    def __init__(self, folder, interval=DEFAULT_INTERVAL, convert=None):
+        self.folder = folder
+        self.interval = interval
+        self.convert = convert
+        self._last_time = None
+        self._last_step = 0
+        self._sequence = None
+        self._seed = None
+        # the number of steps and keyframes written to the history files and the lengths of the files
+        self._written = dict(steps=0, keyframes=0)
+        self._offsets = dict(steps=0, keyframes=0)
+
+    def load(self):
+        """
+        Reads the last checkpoint
+
+        :returns None if there is no checkpoint, else a dict with the number of steps done (step), the transformation
+            sequence, the seed, the state of the random source (rng_state), the chromosomes (left, right), the
+            original chromosomes (original_left, original_right) and the recorded history steps and keyframes
+        """
+        try:
+            with open(self._path(STATE_FILE)) as state_file:
+                state = json.load(state_file)
+        except IOError:
+            return None
+
+        checkpoint = dict(step=state['step'],
+                          sequence=[_TRANSFORMATION_NAMES[code] for code in state['sequence']],
+                          seed=state['seed'],
+                          rng_state=state['rng_state'])
+        for key in ['left', 'right']:
+            checkpoint['original_' + key] = self._load_chromosome('original-%s.snap' % key)
+            checkpoint[key] = self._load_chromosome(state[key])
+
+        for key, file_name in [('steps', STEPS_FILE), ('keyframes', KEYFRAMES_FILE)]:
+            checkpoint[key] = self._read_lines(file_name, state['offsets'][key])
+            self._written[key] = len(checkpoint[key])
+            self._offsets[key] = state['offsets'][key]
+
+        self._sequence = state['sequence']
+        self._seed = state['seed']
+        self._last_step = state['step']
+        self._last_time = time.time()
+        return checkpoint
+
+    def start(self, left_chromosome, right_chromosome, sequence, seed, rng, recorder):
+        """
+        Writes the original chromosomes and the first checkpoint before the first step
+        """
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        for key, chromosome in [('left', left_chromosome), ('right', right_chromosome)]:
+            self._write('original-%s.snap' % key, lambda output, chromosome=chromosome: save_chromosome(chromosome,
+                                                                                                      output))
+        for file_name in [STEPS_FILE, KEYFRAMES_FILE]:
+            open(self._path(file_name), 'w').close()
+
+        self._sequence = ''.join(_TRANSFORMATION_CODES[step] for step in sequence)
+        self._seed = seed
+        self.save(0, left_chromosome, right_chromosome, rng, recorder)
+
+    def is_due(self):
+        """
+        Returns True if the interval has passed since the last checkpoint
+        """
+        return self._last_time is None or time.time() - self._last_time >= self.interval
+
+    def save(self, step, left_chromosome, right_chromosome, rng, recorder):
+        """
+        Writes a checkpoint after step steps
+
+        :param rng the random source of the simulation
+        :param recorder the HistoryRecorder of the simulation. Only the steps and keyframes recorded after the
+            previous checkpoint are written.
+        """
+        self._append('steps', STEPS_FILE, recorder.steps)
+        self._append('keyframes', KEYFRAMES_FILE, recorder.keyframes)
+
+        names = {}
+        for key, chromosome in [('left', left_chromosome), ('right', right_chromosome)]:
+            names[key] = '%s-%d.snap' % (key, step)
+            self._write(names[key], lambda output, chromosome=chromosome: save_chromosome(chromosome, output))
+
+        state = dict(step=step, sequence=self._sequence, seed=self._seed, rng_state=rng.get_state(),
+                     offsets=self._offsets, **names)
+        self._write(STATE_FILE, lambda output: json.dump(state, output))
+
+        # the snapshots of the previous checkpoint are not needed any more
+        if self._last_step != step:
+            for key in ['left', 'right']:
+                previous = self._path('%s-%d.snap' % (key, self._last_step))
+                if os.path.exists(previous):
+                    os.remove(previous)
+        self._last_step = step
+        self._last_time = time.time()
+
+    def clear(self):
+        """
+        Removes the checkpoint folder (after the simulation has finished)
+        """
+        if os.path.isdir(self.folder):
+            shutil.rmtree(self.folder)
+
+    def _append(self, key, file_name, items):
+        with open(self._path(file_name), 'ab') as output:
+            for item in items[self._written[key]:]:
+                output.write(json.dumps(item) + '\n')
+            output.flush()
+            os.fsync(output.fileno())
+            output.seek(0, os.SEEK_END)
+            self._offsets[key] = output.tell()
+        self._written[key] = len(items)
+
+    def _read_lines(self, file_name, length):
+        """
+        Reads the JSON lines of the first length bytes of a history file. The lines a killed simulation wrote after
+        its last checkpoint are removed.
+        """
+        with open(self._path(file_name), 'r+b') as lines_file:
+            data = lines_file.read(length)
+            lines_file.truncate(length)
+        return [json.loads(line) for line in data.splitlines()]
+
+    def _load_chromosome(self, file_name):
+        with open(self._path(file_name), 'rb') as snapshot_file:
+            chromosome = load_chromosome(snapshot_file)
+        return self.convert(chromosome) if self.convert is not None else chromosome
+
+    def _write(self, file_name, write):
+        """
+        Writes a file through a temporary file, so a killed simulation leaves either the whole file or the old one
+        """
+        handle, temporary = tempfile.mkstemp(dir=self.folder)
+        with os.fdopen(handle, 'wb') as output:
+            write(output)
+            output.flush()
+            os.fsync(output.fileno())
+        os.rename(temporary, self._path(file_name))
+
+    def _path(self, file_name):
+        return os.path.join(self.folder, file_name)
@@ -1,12 +1,23 @@
 """
 All chromosome related class and function definitions
 """
+import string
 
+import numpy
 
-class Chromosome:
+from applications.GeneticModeling.modules.fenwick import FenwickTree
+from applications.GeneticModeling.modules.gene_windows import REGION_GENE, GeneWindows, region_flags
+from applications.GeneticModeling.modules.packed import PackedSequence, can_pack
+
+
+class Chromosome(object):
     """
     Represents a chromosome
 
+    The transformations modify the region sequence only through the region_count, region_at, index,
+    reverse_regions, cut, paste, replace_regions and set_region_content methods, so subclasses can store
+    the regions in a different data structure (see TreapChromosome).
+
     Attributes:
         regions: the ChromosomeRegions this chromosome consists of.
     """
@@ -21,6 +32,28 @@ class Chromosome:
     def __init__(self, regions):
         self.regions = regions
 
+    @property
+    def regions(self):
+        return self._regions
+
+    @regions.setter
+    def regions(self, regions):
+        self._regions = regions
+
+        # region -> position index used by index(). The positions below _indexed are up to date.
+        self._positions = {}
+        self._indexed = 0
+
+        # the breakable lengths of the regions (see breakable_length) and their Fenwick tree, built on demand
+        # by length_index(). The tree is rebuilt from the weights after the structural changes.
+        self._weights = None
+        self._length_index = None
+
+        # the region flags (see region_flags) and the essential gene windows, built on demand by gene_windows().
+        # The flags are updated with the structural changes, the windows are recomputed from them.
+        self._flags = None
+        self._gene_windows = None
+
     def represent(self):
         """
         Returns the string representation of this chromosome
@@ -36,12 +69,20 @@ class Chromosome:
         for region in self.regions:
             region.reverse()
         self.regions.reverse()
+        self._indexed = 0
+        if self._weights is not None:
+            self._weights = self._weights[::-1].copy()
+            self._length_index = None
+        self._reverse_flags(0, len(self.regions))
 
     def diff(self, chromosome, diff_method):
         """
         Computes the difference between this chromosome and the other using the diff method
+
+        :param diff_method the name of a diff strategy (see METRICS in metrics.py)
         """
-        pass
+        from applications.GeneticModeling.modules.metrics import get_metric
+        return get_metric(diff_method)([self]).measure([chromosome])
 
     def get_breakable_regions(self):
         """
@@ -57,21 +98,205 @@ class Chromosome:
         """
         return [gene.ordinal for gene in self.regions if isinstance(gene, Gene)]
 
+    def get_gene_orientations(self):
+        """
+        Returns the orientations of the genes in their current order: True if a gene is reversed relative to its
+        original orientation.
+        """
+        return [gene.reversed for gene in self.regions if isinstance(gene, Gene)]
+
+    def region_count(self):
+        return len(self.regions)
+
+    def region_at(self, index):
+        return self.regions[index]
+
+    def index(self, region):
+        """
+        Returns the position of the region in this chromosome. Raises ValueError if the region is not in the chromosome.
+
+        The positions are looked up in an index that is updated lazily after the structural changes, so the lookups
+        don't scan the region list.
+        """
+        position = self._positions.get(region)
+        if position is None or position >= self._indexed or self._regions[position] is not region:
+            self._update_positions()
+            position = self._positions.get(region)
+
+            if position is None or self._regions[position] is not region:
+                # the region list was modified directly, rebuild the whole index
+                self._positions = {}
+                self._indexed = 0
+                self._update_positions()
+                position = self._positions.get(region)
+
+                if position is None:
+                    raise ValueError("the region is not in the chromosome")
+        return position
+
+    def reverse_regions(self, start, stop, lazy=True):
+        """
+        Reverses the order of the regions between start (inclusive) and stop (exclusive) and reverses
+        the regions themselves
+        """
+        if stop <= start:
+            return
+
+        to_reverse = self.regions[start:stop]
+        for region in to_reverse:
+            region.reverse(lazy=lazy)
+        to_reverse.reverse()
+        self.regions[start:stop] = to_reverse
+
+        if stop <= self._indexed:
+            for position, region in enumerate(to_reverse, start):
+                self._positions[region] = position
+        else:
+            self._invalidate_positions(start)
+
+        if self._weights is not None:
+            self._weights[start:stop] = self._weights[start:stop][::-1].copy()
+            self._length_index = None
+        self._reverse_flags(start, stop)
+
+    def cut(self, start, stop):
+        """
+        Removes the regions between start (inclusive) and stop (exclusive) and returns them as a segment
+        that can be pasted into a chromosome of the same type.
+        """
+        segment = self.regions[start:stop]
+        del self.regions[start:stop]
+
+        self._forget_positions(segment)
+        self._invalidate_positions(start)
+        self._replace_indexes(start, stop, [])
+        return segment
+
+    def paste(self, index, segment):
+        """
+        Inserts a segment returned by cut before the index-th region
+        """
+        self.regions[index:index] = segment
+        self._invalidate_positions(index)
+        self._replace_indexes(index, index, segment)
+
+    def replace_regions(self, start, stop, regions):
+        """
+        Replaces the regions between start (inclusive) and stop (exclusive) with the regions in the list
+        """
+        self._forget_positions(self.regions[start:stop])
+        self.regions[start:stop] = regions
+
+        if stop - start == len(regions) and stop <= self._indexed:
+            for position, region in enumerate(regions, start):
+                self._positions[region] = position
+        else:
+            self._invalidate_positions(start)
+        self._replace_indexes(start, stop, regions)
+
+    def set_region_content(self, index, content):
+        """
+        Sets the content of the index-th region. The content of the regions in a chromosome must be changed with
+        this method, so the chromosome can update its indexes.
+        """
+        region = self.regions[index]
+        region.content = content
+
+        if self._weights is not None:
+            delta = breakable_length(region) - int(self._weights[index])
+            if delta:
+                self._weights[index] += delta
+                if self._length_index is not None:
+                    self._length_index.add(index, delta)
+
+    def length_index(self):
+        """
+        Returns an index of the breakable lengths of the regions (see breakable_length) in region order. The index
+        supports total(), prefix_sum(count), get(index), locate(value) and locate_many(values) (see FenwickTree).
+
+        The index is built on the first call in O(n) and it's updated when the regions change.
+        """
+        if self._length_index is None:
+            if self._weights is None:
+                self._weights = breakable_lengths(self._regions)
+            self._length_index = FenwickTree(self._weights)
+        return self._length_index
+
+    def gene_windows(self, window_size):
+        """
+        Returns the essential gene windows of window_size genes (see GeneWindows).
+
+        The region flags the windows are computed from are collected on the first call and they are updated when
+        the regions change, so the windows are rebuilt with numpy operations only. The windows are kept until the
+        next change of the region sequence.
+        """
+        if self._gene_windows is None or self._gene_windows.window_size != window_size:
+            self._gene_windows = GeneWindows(self._region_flags(), window_size)
+        return self._gene_windows
+
+    def count_genes(self, stop):
+        """
+        Returns the number of genes among the first stop regions (the position of the gene sequence that
+        corresponds to the region position stop). The region flags are collected on the first call like for
+        gene_windows.
+        """
+        return int(numpy.count_nonzero(self._region_flags()[:stop] & REGION_GENE))
+
+    def _region_flags(self):
+        if self._flags is None:
+            self._flags = region_flags(self.regions)
+        return self._flags
+
+    def _update_positions(self):
+        """
+        Indexes the regions after the last up to date position
+        """
+        positions = self._positions
+        regions = self._regions
+        for position in xrange(self._indexed, len(regions)):
+            positions[regions[position]] = position
+        self._indexed = len(regions)
+
+    def _invalidate_positions(self, start):
+        self._indexed = min(self._indexed, start)
+
+    def _forget_positions(self, regions):
+        for region in regions:
+            self._positions.pop(region, None)
+
+    def _replace_indexes(self, start, stop, regions):
+        if self._weights is not None:
+            self._weights = numpy.concatenate((self._weights[:start], breakable_lengths(regions),
+                                               self._weights[stop:]))
+            self._length_index = None
+        self._replace_flags(start, stop, regions)
+
+    def _reverse_flags(self, start, stop):
+        if self._flags is not None:
+            self._flags[start:stop] = self._flags[start:stop][::-1].copy()
+            self._gene_windows = None
+
+    def _replace_flags(self, start, stop, regions):
+        if self._flags is not None:
+            self._flags = numpy.concatenate((self._flags[:start], region_flags(regions), self._flags[stop:]))
+            self._gene_windows = None
+
     def describe(self):
         """
         Returns the chromosome description (parseable by Chromosome.parse)
         """
-        result = '<' + self.regions[0].content + '>'
-        for region in self.regions[1:-1]:
+        regions = self.regions
+        result = '<' + regions[0].represent() + '>'
+        for region in regions[1:-1]:
             if region.is_gene:
-                result += '(' + region.content
+                result += '(' + region.represent()
                 if region.is_essential:
                     result += ';'
                 result += ')'
             else:
-                result += region.content
+                result += region.represent()
 
-        result += '<' + self.regions[-1].content + '>'
+        result += '<' + regions[-1].represent() + '>'
         return result
 
     @staticmethod
@@ -86,46 +311,61 @@ class Chromosome:
 
         :returns a Chromosome instance
         """
-        regions = []  # the list of chromosome regions parsed
-        char_buffer = []
-        can_break = True
+        return Chromosome(list(Chromosome.iter_parse([chromosome_string], use_coexpression=use_coexpression)))
 
-        # if the current gene is essential or not
-        is_essential = False
+    @staticmethod
+    def parse_file(chromosome_file, use_coexpression=False, chunk_size=None):
+        """
+        Parses a chromosome description from a file object without reading the whole file into memory
 
+        :returns a Chromosome instance
         """
-        inside a coexpression segment neither
-        the intergenic regions can break.
+        return Chromosome(list(Chromosome.iter_parse(read_chunks(chromosome_file, chunk_size),
+                                                     use_coexpression=use_coexpression)))
+
+    @staticmethod
+    def iter_parse(chunks, use_coexpression=False):
         """
-        for next_char in chromosome_string:
-            if next_char == Chromosome.LEFT_GENE_BOUNDARY:
-                # create intergenic region and clear the buffer
-                Chromosome.create_intergenic_region(char_buffer, can_break, regions)
-                char_buffer = []
-            elif next_char == Chromosome.RIGHT_GENE_BOUNDARY:
-                # create a gene
-                gene = Gene("".join(char_buffer), is_essential=is_essential)
-                is_essential = False
-                regions.append(gene)
-                char_buffer = []
-            elif next_char == Chromosome.LEFT_COEXPRESSION_BOUNDARY or next_char == Chromosome.LEFT_NOBREAK_BOUNDARY:
-                # create intergenic region and clear the buffer
-                Chromosome.create_intergenic_region(char_buffer, can_break, regions)
-                char_buffer = []
-
-                if next_char == Chromosome.LEFT_NOBREAK_BOUNDARY or use_coexpression:
-                    can_break = False
-            elif next_char == Chromosome.RIGHT_COEXPRESSION_BOUNDARY or next_char == Chromosome.RIGHT_NOBREAK_BOUNDARY:
-                # create intergenic region and clear the buffer
-                Chromosome.create_intergenic_region(char_buffer, can_break, regions)
-                char_buffer = []
-
-                can_break = True
-            elif next_char == Chromosome.ESSENTIAL_GENE_MARKER:
-                is_essential = True
+        Parses a chromosome description given as a sequence of strings and yields the regions one by one
+
+        :param chunks an iterable of strings, for example the result of read_chunks. The boundary characters may be
+            anywhere in the chunks.
+        """
+        for is_gene, content, flag in scan_description(chunks, use_coexpression=use_coexpression):
+            if is_gene:
+                yield Gene(content, is_essential=flag)
             else:
-                char_buffer.append(next_char)
-        return Chromosome(regions)
+                intergenic_region = IntergenicRegion(content)
+                intergenic_region.can_break = flag
+                yield intergenic_region
+
+    def pack(self):
+        """
+        Stores the content of the regions on 2 bits per base (see PackedSequence). The regions containing other
+        characters than A, C, G and T keep their content.
+        """
+        for region in self.regions:
+            content = region.represent()
+            if can_pack(content):
+                region.content = PackedSequence.pack(content)
+
+    def save_binary(self, snapshot_file):
+        """
+        Writes a binary snapshot of the chromosome (see snapshot.py) to a file object opened in binary mode.
+        Unlike the description, the snapshot keeps the gene ordinals and the orientation of the regions.
+        """
+        from applications.GeneticModeling.modules.snapshot import save_chromosome
+        save_chromosome(self, snapshot_file)
+
+    @staticmethod
+    def load_binary(snapshot_file):
+        """
+        Reads a snapshot written by save_binary
+
+        :returns a Chromosome instance
+        """
+        from applications.GeneticModeling.modules.snapshot import load_chromosome
+        return load_chromosome(snapshot_file)
 
     @staticmethod
     def create_intergenic_region(char_buffer, can_break, regions):
@@ -135,29 +375,189 @@ class Chromosome:
             regions.append(intergenic_region)
 
 
-class ChromosomeRegion:
+def breakable_length(region):
+    """
+    Returns the length of the region if it can break, otherwise 0. The longer breakable regions break more often
+    (see Transformation.longer_breaks_often).
+    """
+    return region.length() if region.can_break else 0
+
+
+def breakable_lengths(regions):
+    """
+    Returns the breakable lengths of the regions as a numpy array
+    """
+    return numpy.fromiter((breakable_length(region) for region in regions), dtype=numpy.int64, count=len(regions))
+
+
+DESCRIPTION_CHUNK_SIZE = 4 * 1024 * 1024
+
+# marks the boundary characters of the chromosome descriptions
+_BOUNDARY_LOOKUP = numpy.zeros(256, dtype=bool)
+_BOUNDARY_LOOKUP[numpy.frombuffer('<>(){};', dtype=numpy.uint8)] = True
+
+
+def read_chunks(chromosome_file, chunk_size=None):
+    """
+    Reads a file object in chunks
+    """
+    chunk_size = chunk_size or DESCRIPTION_CHUNK_SIZE
+    while True:
+        chunk = chromosome_file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def scan_description(chunks, use_coexpression=False):
+    """
+    Scans a chromosome description (see Chromosome.parse) and yields a tuple for each region. The tuples
+    are (True, content, is_essential) for the genes and (False, content, can_break) for the intergenic regions.
+
+    Instead of examining each character in Python the boundary characters are located with a vectorized lookup,
+    so the content between the boundaries is sliced out of the chunks in one step.
+    """
+    for is_gene, pieces, flag in scan_boundaries(_iter_chunk_boundaries(chunks), use_coexpression=use_coexpression):
+        yield is_gene, pieces[0] if len(pieces) == 1 else "".join(pieces), flag
+
+
+def find_boundaries(buffer, start=0, stop=None):
+    """
+    Returns the positions of the boundary characters in the buffer (a string or any object supporting
+    the buffer interface, for example an mmap) between start and stop
+    """
+    bases = numpy.frombuffer(buffer, dtype=numpy.uint8)[start:stop]
+    return (numpy.flatnonzero(_BOUNDARY_LOOKUP[bases]) + start).tolist()
+
+
+def scan_boundaries(tokens, use_coexpression=False):
+    """
+    The state machine of the description parsers.
+
+    :param tokens an iterable of (boundary, piece) tuples. boundary is a boundary character or None and piece is the
+        content preceding the boundary (in any form, for example a string or an offset pair) or None if there's no
+        content.
+
+    :returns yields (True, pieces, is_essential) for the genes and (False, pieces, can_break) for the intergenic
+        regions, where pieces is the list of the content pieces of the region
+    """
+    pieces = []  # the content read since the last region boundary
+    can_break = True
+
+    # if the current gene is essential or not
+    is_essential = False
+
+    for boundary, piece in tokens:
+        if piece is not None:
+            pieces.append(piece)
+
+        if boundary is None:
+            continue
+
+        if boundary == Chromosome.ESSENTIAL_GENE_MARKER:
+            is_essential = True
+            continue
+
+        content = pieces
+        pieces = []
+
+        if boundary == Chromosome.RIGHT_GENE_BOUNDARY:
+            yield True, content, is_essential
+            is_essential = False
+            continue
+
+        # every other boundary closes the current intergenic region
+        if content:
+            yield False, content, can_break
+
+        """
+        inside a coexpression segment neither
+        the intergenic regions can break.
+        """
+        if boundary == Chromosome.LEFT_NOBREAK_BOUNDARY or \
+                (boundary == Chromosome.LEFT_COEXPRESSION_BOUNDARY and use_coexpression):
+            can_break = False
+        elif boundary == Chromosome.RIGHT_NOBREAK_BOUNDARY or boundary == Chromosome.RIGHT_COEXPRESSION_BOUNDARY:
+            can_break = True
+
+
+def _iter_chunk_boundaries(chunks):
+    """
+    Tokenizes the chunks for scan_boundaries. The pieces are strings.
+    """
+    for chunk in chunks:
+        if isinstance(chunk, unicode):
+            chunk = chunk.encode('ascii')
+
+        position = 0
+        for boundary_position in find_boundaries(chunk):
+            yield chunk[boundary_position], chunk[position:boundary_position] if boundary_position > position else None
+            position = boundary_position + 1
+
+        if position < len(chunk):
+            yield None, chunk[position:]
+
+
+class ChromosomeRegion(object):
     """
     Base class for chromosome regions
 
+    Reversing a region is lazy: it only flips the orientation of the region and the content is
+    reverse complemented when it is read the next time. Reversing a region twice costs nothing.
+
     Attributes:
         can_break: if this chromosome is breakable
         content: the string representation of the region (a sequence of amino acid characters)
-        reversed: if the region was reversed during a transformation
+        reversed: if the region is reversed relative to its original orientation
     """
     def __init__(self, content):
-        self.content = content
+        self._content = content
+        self._pending_reversal = False
         self.can_break = False
         self.reversed = False
         self.is_gene = False
 
-    def reverse(self):
+    @property
+    def content(self):
+        if self._pending_reversal:
+            self.materialize()
+        return self._content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
+        self._pending_reversal = False
+
+    def reverse(self, lazy=True):
         """
         Reverses the region
+
+        :param lazy if False then the content is reverse complemented immediately
         """
-        self.content = "".join(reversed(DnaBaseMappings.map_string(self.content)))
+        self.reversed = not self.reversed
+        self._pending_reversal = not self._pending_reversal
+        if not lazy:
+            self.materialize()
+
+    def materialize(self):
+        """
+        Applies the pending reversal to the content
+        """
+        if self._pending_reversal:
+            self._content = DnaBaseMappings.reverse_complement(self._content)
+            self._pending_reversal = False
+
+    def length(self):
+        """
+        Returns the length of the content without materializing it
+        """
+        return len(self._content)
 
     def represent(self):
-        return self.content
+        """
+        Returns the content as a string (the content may also be a PackedSequence or a MappedSequence)
+        """
+        return str(self.content)
 
 
 class IntergenicRegion(ChromosomeRegion):
@@ -194,9 +594,40 @@ class DnaBaseMappings:
     """
     MAPPINGS = {'A': 'T', 'G': 'C', 'T': 'A', 'C': 'G'}
 
+    # translation table used for mapping whole strings at once
+    TRANSLATION = string.maketrans('AGTCagtc', 'TCAGTCAG')
+    BASES = 'AGTCagtc'
+
+    # lookup table for mapping uint8 arrays. The bytes that are not bases are mapped to themselves.
+    LOOKUP = numpy.arange(256, dtype=numpy.uint8)
+    LOOKUP[numpy.frombuffer(BASES, dtype=numpy.uint8)] = numpy.frombuffer('TCAGTCAG', dtype=numpy.uint8)
+
     @staticmethod
     def map_string(string):
-        return "".join([DnaBaseMappings.MAPPINGS[c.upper()] for c in string])
+        if isinstance(string, unicode):
+            return DnaBaseMappings.map_string(string.encode('ascii')).decode('ascii')
 
+        invalid = string.translate(None, DnaBaseMappings.BASES)
+        if invalid:
+            raise KeyError(invalid[0].upper())
 
+        return string.translate(DnaBaseMappings.TRANSLATION)
 
+    @staticmethod
+    def reverse_complement(sequence):
+        """
+        Maps each character of the sequence to its pair and reverses the result. The sequences that are not
+        strings (see PackedSequence and MappedSequence) compute their own reverse complement.
+        """
+        if not isinstance(sequence, basestring):
+            return sequence.reverse_complement()
+        return DnaBaseMappings.map_string(sequence)[::-1]
+
+    @staticmethod
+    def reverse_complement_array(bases):
+        """
+        Reverse complement of a numpy uint8 array of bases
+
+        :returns a new array
+        """
+        return DnaBaseMappings.LOOKUP[bases[::-1]]
@@ -0,0 +1,249 @@
+"""
+Array backed chromosome representation.
+
+A CompactChromosome keeps the bases of all regions in one contiguous byte buffer and describes the regions
+with parallel numpy arrays instead of one Python object (and one string) per region.
+"""
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, DnaBaseMappings, Gene, IntergenicRegion, \
+    read_chunks, scan_description
+
+
+class CompactChromosome:
+    """
+    A chromosome that stores its bases in a single numpy uint8 buffer.
+
+    The region i consists of the bases bases[starts[i]:ends[i]]. The regions don't have to follow each other
+    in the buffer, but the chromosomes created by this class always store them contiguously.
+
+    Attributes:
+        bases: numpy uint8 array containing the bases of the regions
+        starts: the offset of the first base of each region in bases
+        ends: the offset after the last base of each region in bases
+        is_gene: boolean array, True for the genes
+        is_essential: boolean array, True for the essential genes
+        can_break: boolean array, True for the breakable regions
+        ordinals: the gene ordinals. -1 for the regions that are not genes
+        reversed: boolean array, the orientation of the regions (see ChromosomeRegion.reversed)
+    """
+    def __init__(self, bases, starts, ends, is_gene, is_essential, can_break, ordinals, reversed=None):
+        self.bases = bases
+        self.starts = starts
+        self.ends = ends
+        self.is_gene = is_gene
+        self.is_essential = is_essential
+        self.can_break = can_break
+        self.ordinals = ordinals
+        self.reversed = reversed if reversed is not None else numpy.zeros(len(starts), dtype=bool)
+
+    @staticmethod
+    def from_chromosome(chromosome):
+        """
+        Creates a compact chromosome from a Chromosome instance
+
+        :returns a CompactChromosome instance
+        """
+        regions = chromosome.regions
+        contents = [region.represent() for region in regions]
+
+        lengths = numpy.fromiter((len(content) for content in contents), dtype=numpy.int64, count=len(contents))
+        ends = numpy.cumsum(lengths)
+        starts = ends - lengths
+
+        bases = numpy.frombuffer("".join(contents), dtype=numpy.uint8).copy()
+
+        return CompactChromosome(bases, starts, ends,
+                                 is_gene=numpy.array([region.is_gene for region in regions], dtype=bool),
+                                 is_essential=numpy.array([getattr(region, 'is_essential', False)
+                                                           for region in regions], dtype=bool),
+                                 can_break=numpy.array([region.can_break for region in regions], dtype=bool),
+                                 ordinals=numpy.array([getattr(region, 'ordinal', -1) for region in regions],
+                                                      dtype=numpy.int64),
+                                 reversed=numpy.array([region.reversed for region in regions], dtype=bool))
+
+    @staticmethod
+    def parse(chromosome_string, use_coexpression=False):
+        """
+        Parses a chromosome description (see Chromosome.parse) without creating region objects
+
+        :returns a CompactChromosome instance
+        """
+        return CompactChromosome._from_scan(scan_description([chromosome_string], use_coexpression=use_coexpression))
+
+    @staticmethod
+    def parse_file(chromosome_file, use_coexpression=False, chunk_size=None):
+        """
+        Parses a chromosome description from a file object in chunks
+
+        :returns a CompactChromosome instance
+        """
+        return CompactChromosome._from_scan(scan_description(read_chunks(chromosome_file, chunk_size),
+                                                             use_coexpression=use_coexpression))
+
+    @staticmethod
+    def _from_scan(scanned_regions):
+        contents = []
+        is_gene = []
+        flags = []
+        for region_is_gene, content, flag in scanned_regions:
+            contents.append(content)
+            is_gene.append(region_is_gene)
+            flags.append(flag)
+
+        lengths = numpy.fromiter((len(content) for content in contents), dtype=numpy.int64, count=len(contents))
+        ends = numpy.cumsum(lengths)
+        is_gene = numpy.array(is_gene, dtype=bool)
+        flags = numpy.array(flags, dtype=bool)
+
+        # the genes get their ordinals the same way as the Gene instances
+        ordinals = numpy.full(len(contents), -1, dtype=numpy.int64)
+        gene_count = numpy.count_nonzero(is_gene)
+        ordinals[is_gene] = numpy.arange(Gene.next_ordinal, Gene.next_ordinal + gene_count)
+        Gene.next_ordinal += gene_count
+
+        return CompactChromosome(numpy.frombuffer("".join(contents), dtype=numpy.uint8).copy(),
+                                 ends - lengths, ends,
+                                 is_gene=is_gene,
+                                 is_essential=is_gene & flags,
+                                 can_break=~is_gene & flags,
+                                 ordinals=ordinals)
+
+    def to_chromosome(self):
+        """
+        Creates a Chromosome instance with the same regions. The genes keep their ordinals.
+        """
+        regions = []
+        for i in xrange(len(self.starts)):
+            content = self.content(i)
+            if self.is_gene[i]:
+                region = Gene(content, is_essential=bool(self.is_essential[i]))
+                region.ordinal = int(self.ordinals[i])
+            else:
+                region = IntergenicRegion(content)
+            region.can_break = bool(self.can_break[i])
+            region.reversed = bool(self.reversed[i])
+            regions.append(region)
+
+        return Chromosome(regions)
+
+    def region_count(self):
+        return len(self.starts)
+
+    def content(self, index):
+        """
+        Returns the content of the index-th region as a string
+        """
+        return self.bases[self.starts[index]:self.ends[index]].tobytes()
+
+    def represent(self):
+        """
+        Returns the string representation of this chromosome
+        """
+        return self._gather().tobytes()
+
+    def describe(self):
+        """
+        Returns the chromosome description (parseable by Chromosome.parse)
+        """
+        last = len(self.starts) - 1
+        result = ['<', self.content(0), '>']
+        for i in xrange(1, last):
+            if self.is_gene[i]:
+                result.append('(')
+                result.append(self.content(i))
+                if self.is_essential[i]:
+                    result.append(';')
+                result.append(')')
+            else:
+                result.append(self.content(i))
+
+        result += ['<', self.content(last), '>']
+        return "".join(result)
+
+    def reverse(self):
+        """
+        Reverses the region list and the regions themselves
+        """
+        lengths = (self.ends - self.starts)[::-1]
+
+        self.bases = DnaBaseMappings.reverse_complement_array(self._gather())
+        self.ends = numpy.cumsum(lengths)
+        self.starts = self.ends - lengths
+
+        self.is_gene = self.is_gene[::-1].copy()
+        self.is_essential = self.is_essential[::-1].copy()
+        self.can_break = self.can_break[::-1].copy()
+        self.ordinals = self.ordinals[::-1].copy()
+        self.reversed = ~self.reversed[::-1]
+
+    def get_breakable_regions(self):
+        """
+        Returns the chromosome regions that can break
+
+        :returns a list of CompactRegion instances
+        """
+        return [CompactRegion(self, index) for index in numpy.flatnonzero(self.can_break)]
+
+    def get_gene_ordinals(self):
+        """
+        Returns the original gene ordinals in their current order.
+        """
+        return self.ordinals[self.is_gene].tolist()
+
+    def get_gene_orientations(self):
+        """
+        Returns the orientations of the genes in their current order (see ChromosomeRegion.reversed)
+        """
+        return self.reversed[self.is_gene].tolist()
+
+    def _gather(self):
+        """
+        Returns the bases of the regions in region order as a single array
+        """
+        lengths = self.ends - self.starts
+        total = lengths.sum()
+        if len(lengths) and self.starts[0] == 0 and total == len(self.bases) \
+                and numpy.array_equal(self.starts[1:], self.ends[:-1]):
+            # the regions are stored contiguously and in order
+            return self.bases
+
+        offsets = numpy.repeat(self.starts - (numpy.cumsum(lengths) - lengths), lengths)
+        return self.bases[offsets + numpy.arange(total)]
+
+
+class CompactRegion(object):
+    """
+    A lightweight view of one region of a CompactChromosome. It exposes the same attributes as
+    ChromosomeRegion but reads them from the arrays of the chromosome.
+    """
+    def __init__(self, chromosome, index):
+        self.chromosome = chromosome
+        self.index = index
+
+    @property
+    def content(self):
+        return self.chromosome.content(self.index)
+
+    @property
+    def can_break(self):
+        return bool(self.chromosome.can_break[self.index])
+
+    @property
+    def is_gene(self):
+        return bool(self.chromosome.is_gene[self.index])
+
+    @property
+    def is_essential(self):
+        return bool(self.chromosome.is_essential[self.index])
+
+    @property
+    def reversed(self):
+        return bool(self.chromosome.reversed[self.index])
+
+    @property
+    def ordinal(self):
+        return int(self.chromosome.ordinals[self.index])
+
+    def represent(self):
+        return self.content
@@ -0,0 +1,251 @@
+"""
+Edit distance computations for tracking how far the chromosomes get from their original state during a simulation.
+
+The chromosomes of a simulation differ from their original state only around the breakpoints of the
+transformations so far. The distance tracker strips the common prefix and suffix of the two sequences and then
+computes the distance with the algorithm of Landau and Vishkin, which follows the at most 2d + 1 diagonals of the
+dynamic programming table that a distance of d can reach. Its running time depends on the distance instead of the
+product of the lengths, so it's fast while the sequences are close. When the distance grows beyond a limit the
+tracker falls back to the bit-parallel algorithm of Myers, which computes a column of the table with a few
+operations on integers of len(first) bits and needs O(n) memory.
+"""
+import binascii
+
+import numpy
+
+# the distance up to which the diagonal algorithm is used by default
+DEFAULT_BAND_LIMIT = 256
+
+# the length of the first block compared when searching for the end of a common run
+_FIRST_BLOCK = 32
+
+
+def common_prefix_length(first, second, first_start=0, second_start=0):
+    """
+    Returns the length of the longest common prefix of first[first_start:] and second[second_start:]
+
+    The sequences are compared in blocks of doubling and then halving sizes, so the characters are compared by the
+    string comparison and the number of comparisons is logarithmic in the length of the prefix.
+    """
+    limit = min(len(first) - first_start, len(second) - second_start)
+    length = 0
+    block = _FIRST_BLOCK
+    while length < limit:
+        block = min(block, limit - length)
+        if first[first_start + length:first_start + length + block] \
+                == second[second_start + length:second_start + length + block]:
+            length += block
+            block *= 2
+        elif block == 1:
+            break
+        else:
+            block //= 2
+    return length
+
+
+def common_suffix_length(first, second, limit=None):
+    """
+    Returns the length of the longest common suffix of first and second, but at most limit
+    """
+    if limit is None:
+        limit = min(len(first), len(second))
+    first_end = len(first)
+    second_end = len(second)
+
+    length = 0
+    block = _FIRST_BLOCK
+    while length < limit:
+        block = min(block, limit - length)
+        if first[first_end - length - block:first_end - length] \
+                == second[second_end - length - block:second_end - length]:
+            length += block
+            block *= 2
+        elif block == 1:
+            break
+        else:
+            block //= 2
+    return length
+
+
+def trim(first, second):
+    """
+    Removes the common prefix and suffix of two sequences. The edit distance of the trimmed sequences is the same as
+    the distance of the original ones.
+
+    :returns the trimmed sequences
+    """
+    prefix = common_prefix_length(first, second)
+    suffix = common_suffix_length(first, second, limit=min(len(first), len(second)) - prefix)
+    return first[prefix:len(first) - suffix], second[prefix:len(second) - suffix]
+
+
+def bounded_edit_distance(first, second, limit):
+    """
+    Computes the Levenshtein distance of two sequences if it's at most limit (Landau-Vishkin algorithm).
+
+    For each number of edits d the algorithm stores the furthest row of the dynamic programming table reachable with
+    d edits on each diagonal and extends it along the matching characters (see common_prefix_length). The running
+    time is O(d^2) steps plus the comparisons of the matching runs.
+
+    :returns the distance or None if it's greater than limit
+    """
+    first_length = len(first)
+    second_length = len(second)
+    target_diagonal = second_length - first_length
+    if abs(target_diagonal) > limit:
+        return None
+
+    # rows[k + offset] is the furthest row reached on the diagonal k (the column minus the row) or -1
+    offset = limit + 1
+    rows = [-1] * (2 * limit + 3)
+
+    row = common_prefix_length(first, second)
+    if row == first_length and target_diagonal == 0:
+        return 0
+    rows[offset] = row
+
+    for distance in xrange(1, limit + 1):
+        previous = rows[:]
+        lowest = max(-distance, -first_length)
+        highest = min(distance, second_length)
+        for diagonal in xrange(lowest, highest + 1):
+            index = diagonal + offset
+            # substitution, insertion into first (from the diagonal below) and deletion from first (from above)
+            row = max(previous[index] + 1, previous[index - 1], previous[index + 1] + 1)
+            row = min(row, first_length, second_length - diagonal)
+            if row < 0:
+                continue
+            row += common_prefix_length(first, second, row, row + diagonal)
+            rows[index] = row
+
+            if diagonal == target_diagonal and row == first_length:
+                return distance
+    return None
+
+
+def myers_edit_distance(first, second):
+    """
+    Computes the Levenshtein distance of two strings or two integer sequences (for example gene ordinals) with the
+    bit-parallel algorithm of Myers (in the formulation of Hyyro). The vertical differences of a column of the
+    dynamic programming table are stored in two integers of len(first) bits, so a column is computed with a
+    constant number of integer operations.
+    """
+    if len(first) < len(second):
+        # fewer columns with longer integers
+        first, second = second, first
+    length = len(first)
+    if not len(second):
+        return length
+
+    # the positions of each symbol in first as a bit vector
+    if isinstance(first, basestring):
+        codes = numpy.frombuffer(first, dtype=numpy.uint8)
+        matches = dict((chr(code), _bit_vector(codes == code)) for code in numpy.unique(codes))
+    else:
+        matches = _position_vectors(numpy.asarray(first))
+        second = numpy.asarray(second).tolist()
+
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive = full
+    negative = 0
+    distance = length
+    for character in second:
+        equal = matches.get(character, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = negative | (full & ~(horizontal | positive))
+        horizontal_negative = positive & horizontal
+
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+
+        # the first row of the table grows by one in every column
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (full & ~(vertical | horizontal_positive))
+        negative = horizontal_positive & vertical
+    return distance
+
+
+def _position_vectors(codes):
+    """
+    Returns a dict mapping each value of an integer array to the bit vector of its positions
+    """
+    order = numpy.argsort(codes, kind='mergesort')
+    sorted_codes = codes[order]
+    starts = numpy.flatnonzero(numpy.diff(sorted_codes)) + 1
+
+    result = {}
+    for code, positions in zip(sorted_codes[numpy.concatenate(([0], starts))].tolist(), numpy.split(order, starts)):
+        if len(positions) > 64:
+            mask = numpy.zeros(len(codes), dtype=bool)
+            mask[positions] = True
+            result[code] = _bit_vector(mask)
+        else:
+            vector = 0
+            for position in positions.tolist():
+                vector |= 1 << position
+            result[code] = vector
+    return result
+
+
+def _bit_vector(mask):
+    """
+    Converts a boolean numpy array to an integer whose i-th bit is mask[i]
+    """
+    padding = numpy.zeros((-len(mask)) % 8, dtype=bool)
+    packed = numpy.packbits(numpy.concatenate((padding, mask[::-1])))
+    return int(binascii.hexlify(packed.tobytes()), 16)
+
+
+def edit_distance(first, second, limit=DEFAULT_BAND_LIMIT, fallback=myers_edit_distance):
+    """
+    Computes the Levenshtein distance of two strings
+
+    :param limit the distances up to this limit are computed with bounded_edit_distance
+    :param fallback the function computing the greater distances
+    """
+    first, second = trim(first, second)
+    if not first or not second:
+        return len(first) + len(second)
+
+    distance = bounded_edit_distance(first, second, limit)
+    if distance is not None:
+        return distance
+
+    return fallback(first, second)
+
+
+class DistanceTracker(object):
+    """
+    Tracks the edit distance of a sequence from its original state in the steps of a simulation
+
+    Attributes:
+        original: the original sequence
+        band_limit: the distances up to this limit are computed with the diagonal algorithm
+            (see bounded_edit_distance)
+        fallback: the function computing the distances above band_limit
+        last_distance: the last computed distance
+    """
+    def __init__(self, original, band_limit=DEFAULT_BAND_LIMIT, fallback=myers_edit_distance):
+        self.original = original
+        self.band_limit = band_limit
+        self.fallback = fallback
+        self.last_distance = 0
+
+    def update(self, current):
+        """
+        Computes the distance of the current sequence from the original one
+
+        :returns the distance
+        """
+        # the distances rarely decrease, so after a distance above the limit the diagonal algorithm is skipped
+        limit = self.band_limit
+        if self.last_distance > limit:
+            limit = 0
+
+        self.last_distance = edit_distance(self.original, current, limit=limit, fallback=self.fallback)
+        return self.last_distance
@@ -0,0 +1,154 @@
+"""
+Replicate ensembles: many independent simulations of the same chromosomes with the same parameters.
+
+The replicates run in a multiprocessing pool. The input chromosomes and their metrics are passed to the pool
+initializer, so with the fork start method the workers share the parsed chromosomes (and the memory mapped uploads)
+copy-on-write, and each replicate works on its own deep copy (the unchanged region contents are shared, see
+MappedSequence). A worker returns only the per step values of its replicate (the distances and the gene order
+metrics) and the ensemble aggregates them to per step statistics instead of keeping the histories.
+"""
+import copy
+import multiprocessing
+import warnings
+
+import numpy
+
+from applications.GeneticModeling.modules.randomness import new_seed, spawn_seeds
+from applications.GeneticModeling.modules.result_store import gene_order_columns, steps_to_columns
+from applications.GeneticModeling.modules.simulation import create_metrics, run_simulation
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# the chromosomes and the parameters of the replicates in a worker process (see _initialize_worker)
+_worker_state = {}
+
+
+def run_ensemble(left_chromosome,
+                 right_chromosome,
+                 replicates=None,
+                 seeds=None,
+                 seed=None,
+                 processes=None,
+                 quantiles=DEFAULT_QUANTILES,
+                 **parameters):
+    """
+    Runs replicate simulations and aggregates their per step values
+
+    :param left_chromosome the left chromosome. It's not modified, the replicates work on copies.
+    :param right_chromosome the right chromosome
+    :param replicates the number of replicates (the length of seeds if the seeds are given)
+    :param seeds the seeds of the replicates. If None then they are spawned from seed (see spawn_seeds).
+    :param seed the root seed of the replicates. If None then a new one is drawn (see new_seed).
+    :param processes the number of worker processes. None uses all cores, 1 runs the replicates in this process.
+    :param quantiles the quantiles of the per step values
+    :param parameters the parameters of run_simulation (number_of_transformations, rate_of_translocations, ...)
+
+    :returns a dict with the root seed (None if the seeds are given), the seeds of the replicates, the number of
+        steps and the statistics of the series by name: distance and the gene order metrics (see summarize)
+    """
+    if seeds is None:
+        if seed is None:
+            seed = new_seed()
+        seeds = spawn_seeds(seed, replicates)
+    else:
+        seed = None
+
+    jobs = [(replicate_seed, {}) for replicate_seed in seeds]
+    results = run_replicates(left_chromosome, right_chromosome, jobs, processes=processes, **parameters)
+
+    # replicates x steps matrices by series name
+    names = sorted(results[0]) if results else []
+    statistics = dict((name, summarize(numpy.vstack([series[name] for series in results]), quantiles))
+                      for name in names)
+
+    return dict(seed=seed,
+                seeds=list(seeds),
+                step_count=len(results[0]['distance']) if results else 0,
+                statistics=statistics)
+
+
+def run_replicates(left_chromosome, right_chromosome, jobs, processes=None, **parameters):
+    """
+    Runs simulations of the same chromosomes in a process pool
+
+    The metrics of the original chromosomes are created once (see create_metrics) and shared by the simulations
+    like the chromosomes.
+
+    :param jobs the list of the seeds and the parameters of the simulations. The parameters of a job override the
+        common parameters.
+    :param processes the number of worker processes. None uses all cores, 1 runs the simulations in this process.
+    :param parameters the common parameters of run_simulation
+
+    :returns the per step values of the simulations in the order of the jobs (see _run_replicate)
+    """
+    parameters['compact_history'] = True
+    metrics = create_metrics(left_chromosome, right_chromosome,
+                             compute_distances=parameters.get('compute_distances', False),
+                             diff_strategy=parameters.get('diff_strategy', 'EditDistance'),
+                             compute_gene_order=parameters.get('compute_gene_order', False))
+    state = (left_chromosome, right_chromosome, metrics, parameters)
+
+    # a daemonic process (for example a worker of another pool) can't start a pool
+    if processes == 1 or len(jobs) < 2 or multiprocessing.current_process().daemon:
+        _initialize_worker(*state)
+        try:
+            return map(_run_replicate, jobs)
+        finally:
+            _worker_state.clear()
+
+    pool = multiprocessing.Pool(processes, initializer=_initialize_worker, initargs=state)
+    try:
+        return pool.map(_run_replicate, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def summarize(series, quantiles=DEFAULT_QUANTILES):
+    """
+    Computes the per step statistics of the replicates
+
+    :param series replicates x steps numpy array. NaN means the value was not measured in the step.
+
+    :returns a dict with the lists of the per step mean, count (the number of measured replicates) and quantiles (a
+        dict by quantile). The values of the steps without measurements are None.
+    """
+    counts = numpy.count_nonzero(~numpy.isnan(series), axis=0)
+    with warnings.catch_warnings():
+        # the steps without measurements give NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = numpy.nanmean(series, axis=0)
+        values = numpy.nanpercentile(series, [quantile * 100 for quantile in quantiles], axis=0)
+
+    return dict(mean=_to_list(mean),
+                count=counts.tolist(),
+                quantiles=dict((quantile, _to_list(values[i])) for i, quantile in enumerate(quantiles)))
+
+
+def _to_list(values):
+    return [None if numpy.isnan(value) else float(value) for value in values]
+
+
+def _initialize_worker(left_chromosome, right_chromosome, metrics, parameters):
+    _worker_state['originals'] = (left_chromosome, right_chromosome, metrics)
+    _worker_state['parameters'] = parameters
+
+
+def _run_replicate(job):
+    """
+    Runs a simulation on copies of the chromosomes and the metrics
+
+    :param job the seed and the parameters of the simulation
+
+    :returns the per step values of the simulation by series name (numpy arrays): distance and gene_order.<name> for
+        each gene order metric
+    """
+    seed, job_parameters = job
+    left_chromosome, right_chromosome, metrics = copy.deepcopy(_worker_state['originals'])
+    parameters = dict(_worker_state['parameters'], **job_parameters)
+    result = run_simulation(left_chromosome, right_chromosome, seed=seed, metrics=metrics, **parameters)
+
+    columns = steps_to_columns(result['history']['steps'])
+    series = dict(('gene_order.' + name, values) for name, values in gene_order_columns(columns).items())
+    series['distance'] = columns['distance']
+    return series
@@ -0,0 +1,212 @@
+"""
+Streaming export of the simulation histories.
+
+The gene ordinals of the steps are formatted while the history is replayed (see iterate_history) and optionally gzip
+compressed on the fly, so a download starts with the first step and the file is never written to the disk.
+
+The uncompressed exports are split to segments at the keyframes of the history. The byte offsets of the segments are
+computed when the result is stored (see export_offsets), so the length of an export is known before it's generated
+and a byte range is served by replaying the history from the keyframe before the range and skipping the bytes of the
+segment before it. The length of a gzip stream is only known after compressing it, so the compressed exports are
+always sent from the start.
+
+The formats:
+    txt: the ordinals of a step in a line, separated by commas (the format of the earlier ordinal files)
+    csv, tsv: a header and a row for each step: step, transformation, distance, ordinals (separated by spaces)
+"""
+import re
+import zlib
+
+import numpy
+
+from applications.GeneticModeling.modules.history import CHROMOSOME_KEYS, iterate_history
+
+# the content types by format
+FORMATS = dict(txt='text/plain', csv='text/csv', tsv='text/tab-separated-values')
+
+GZIP_CONTENT_TYPE = 'application/gzip'
+
+# the generated text is sent in chunks of at least this many bytes
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# the separators of the columns and of the ordinals by format
+_SEPARATORS = dict(txt=(None, ', '), csv=(',', ' '), tsv=('\t', ' '))
+
+_HEADER = ['step', 'transformation', 'distance', 'ordinals']
+
+# the powers of ten up to the largest int64, for counting the digits of the ordinals
+_POWERS_OF_TEN = 10 ** numpy.arange(1, 19, dtype=numpy.int64)
+
+
+def format_lines(history, key, file_format='txt', first_step=0):
+    """
+    Generates the lines of the export of a chromosome
+
+    :param history a compact history or history items (see iterate_history)
+    :param key the chromosome key ('left' or 'right')
+    :param file_format txt, csv or tsv
+    :param first_step the 0 based index of the first step of the history. The lines of a history replayed from a
+        keyframe are the same as in the export of the whole history, the header is only in the first line of the
+        whole export.
+    """
+    if file_format not in FORMATS:
+        raise ValueError("unknown format: %s" % file_format)
+
+    separator, ordinal_separator = _SEPARATORS[file_format]
+    if file_format == 'txt':
+        for item in iterate_history(history):
+            yield ordinal_separator.join([str(ordinal) for ordinal in item[key]['ordinals']]) + '\n'
+        return
+
+    if first_step == 0:
+        yield separator.join(_HEADER) + '\n'
+    for index, item in enumerate(iterate_history(history), first_step):
+        yield separator.join(_step_fields(index, item) +
+                             [ordinal_separator.join([str(ordinal) for ordinal in item[key]['ordinals']])]) + '\n'
+
+
+def export_offsets(replayed, segment_length=None):
+    """
+    Computes the byte offsets of the segments of the uncompressed exports of both chromosomes in all formats without
+    formatting the ordinals (the length of a line is computed from the number of the digits of the ordinals)
+
+    :param replayed the replayed steps of the history (see replay in history.py)
+    :param segment_length the number of steps in a segment (the keyframe interval). None means one segment.
+
+    :returns dict of the offsets by chromosome key and format. The i-th offset is the position of the line of the
+        step i * segment_length (0 for the first segment), the last one is the length of the export.
+    """
+    offsets = dict((key, dict((file_format, [0]) for file_format in FORMATS)) for key in CHROMOSOME_KEYS)
+    positions = dict((key, dict((file_format, _header_length(file_format)) for file_format in FORMATS))
+                     for key in CHROMOSOME_KEYS)
+
+    # the digits of the ordinals only change when genes move between the chromosomes or break
+    ordinal_lengths = dict()
+    for index, (recorded, orders) in enumerate(replayed):
+        operation = recorded['operation']
+        if not ordinal_lengths or (operation is not None and operation['type'] != 'Inversion'):
+            ordinal_lengths = dict((key, (len(orders[key]['ordinals']), _count_digits(orders[key]['ordinals'])))
+                                   for key in CHROMOSOME_KEYS)
+
+        fields_length = sum(len(field) for field in _step_fields(index, recorded))
+        for key in CHROMOSOME_KEYS:
+            count, digits = ordinal_lengths[key]
+            for file_format in FORMATS:
+                if segment_length and index and index % segment_length == 0:
+                    offsets[key][file_format].append(positions[key][file_format])
+
+                separator, ordinal_separator = _SEPARATORS[file_format]
+                length = digits + len(ordinal_separator) * max(count - 1, 0) + 1
+                if separator is not None:
+                    length += fields_length + 3 * len(separator)
+                positions[key][file_format] += length
+
+    for key in CHROMOSOME_KEYS:
+        for file_format in FORMATS:
+            offsets[key][file_format].append(positions[key][file_format])
+    return offsets
+
+
+def _header_length(file_format):
+    separator = _SEPARATORS[file_format][0]
+    return len(separator.join(_HEADER)) + 1 if separator is not None else 0
+
+
+def _step_fields(index, item):
+    """
+    Returns the columns of a step before the ordinals in the csv and tsv exports
+    """
+    distance = item.get('distance')
+    return [str(index + 1), item['transformation'], '' if distance is None else str(distance)]
+
+
+def _count_digits(ordinals):
+    """
+    Returns the total number of the digits of the ordinals (they are not negative)
+    """
+    if not len(ordinals):
+        return 0
+    values = numpy.asarray(ordinals, dtype=numpy.int64)
+    return int(numpy.searchsorted(_POWERS_OF_TEN, values, side='right').sum()) + len(values)
+
+
+def chunks(lines, chunk_size=CHUNK_SIZE):
+    """
+    Joins the lines to chunks of at least chunk_size bytes (the last chunk may be shorter)
+    """
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield ''.join(pending)
+
+
+def gzip_chunks(data_chunks, level=6):
+    """
+    Compresses the chunks to a gzip stream
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in data_chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def slice_stream(data_chunks, start, stop):
+    """
+    Returns the bytes from start to stop (exclusive) of a stream given by its chunks
+    """
+    offset = 0
+    for chunk in data_chunks:
+        end = offset + len(chunk)
+        if end > start:
+            yield chunk[max(start - offset, 0):stop - offset]
+        offset = end
+        if offset >= stop:
+            return
+
+
+def is_byte_range(header):
+    """
+    Returns True if the value of a Range header is a single byte range (the other ranges are ignored)
+    """
+    return bool(header) and _RANGE.match(header.strip()) is not None and header.strip() != 'bytes=-'
+
+
+def parse_range(header, length):
+    """
+    Parses the value of a Range header with a single byte range
+
+    :param length the length of the stream
+
+    :returns the start and the stop (exclusive) of the range or None if the header is not a single byte range (the
+        whole stream is sent). Raises ValueError if the range is not satisfiable.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # the suffix of the given length
+        if not int(last) or not length:
+            raise ValueError("range not satisfiable: %s" % header)
+        return max(length - int(last), 0), length
+
+    start = int(first)
+    if last and int(last) < start:
+        # invalid, the header is ignored
+        return None
+    stop = min(int(last) + 1, length) if last else length
+    if start >= length or start >= stop:
+        raise ValueError("range not satisfiable: %s" % header)
+    return start, stop
@@ -0,0 +1,104 @@
+"""
+Fenwick tree (binary indexed tree) of non-negative integer weights.
+"""
+import numpy
+
+
+class FenwickTree(object):
+    """
+    Stores the prefix sums of a weight array so that updating a weight, computing a prefix sum and finding the
+    position of a cumulative weight all take O(log n) time.
+
+    The tree is built from the weights in O(n) with numpy.
+    """
+    def __init__(self, weights):
+        weights = numpy.asarray(weights, dtype=numpy.int64)
+        self.size = len(weights)
+
+        # tree[i] is the sum of the weights in (i - lowbit(i), i] (1-based)
+        prefix_sums = numpy.zeros(self.size + 1, dtype=numpy.int64)
+        numpy.cumsum(weights, out=prefix_sums[1:])
+        positions = numpy.arange(self.size + 1, dtype=numpy.int64)
+        self.tree = prefix_sums - prefix_sums[positions - (positions & -positions)]
+        self._total = int(prefix_sums[-1])
+
+        self._top = 1
+        while self._top * 2 <= self.size:
+            self._top *= 2
+
+    def __len__(self):
+        return self.size
+
+    def total(self):
+        """
+        Returns the sum of all weights
+        """
+        return self._total
+
+    def add(self, index, delta):
+        """
+        Adds delta to the weight at index
+        """
+        tree = self.tree
+        position = index + 1
+        while position <= self.size:
+            tree[position] += delta
+            position += position & -position
+        self._total += delta
+
+    def prefix_sum(self, count):
+        """
+        Returns the sum of the first count weights
+        """
+        tree = self.tree
+        result = 0
+        while count > 0:
+            result += tree[count]
+            count -= count & -count
+        return int(result)
+
+    def get(self, index):
+        """
+        Returns the weight at index
+        """
+        return self.prefix_sum(index + 1) - self.prefix_sum(index)
+
+    def locate(self, value):
+        """
+        Finds the index whose weight interval contains value, that is the smallest index for which
+        prefix_sum(index + 1) > value
+
+        :param value a number between 0 and total() - 1
+
+        :returns the index and the offset of value in its interval (value - prefix_sum(index))
+        """
+        tree = self.tree
+        position = 0
+        step = self._top
+        while step:
+            next_position = position + step
+            if next_position <= self.size and tree[next_position] <= value:
+                position = next_position
+                value -= tree[next_position]
+            step //= 2
+        return position, int(value)
+
+    def locate_many(self, values):
+        """
+        Vectorized locate
+
+        :param values a numpy array of numbers between 0 and total() - 1
+
+        :returns the numpy arrays of the indices and the offsets
+        """
+        values = numpy.array(values, dtype=numpy.int64)
+        positions = numpy.zeros(len(values), dtype=numpy.int64)
+        step = self._top
+        while step:
+            next_positions = positions + step
+            weights = self.tree[numpy.minimum(next_positions, self.size)]
+            move = (next_positions <= self.size) & (weights <= values)
+            positions[move] = next_positions[move]
+            values[move] -= weights[move]
+            step //= 2
+        return positions, values
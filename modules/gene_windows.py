@@ -0,0 +1,78 @@
+"""
+Sliding window counts of the essential genes of a chromosome. See select_random_region_with_constraints in
+transformation.py for the constraint the windows are used for.
+"""
+import numpy
+
+# the bits of the region flags
+REGION_GENE = 1
+REGION_ESSENTIAL = 2
+REGION_CAN_BREAK = 4
+
+
+def region_flags(regions):
+    """
+    Returns the flags of the regions (a combination of the REGION_* bits) as a numpy array
+    """
+    return numpy.array([(REGION_GENE if region.is_gene else 0)
+                        | (REGION_ESSENTIAL if getattr(region, 'is_essential', False) else 0)
+                        | (REGION_CAN_BREAK if region.can_break else 0) for region in regions], dtype=numpy.uint8)
+
+
+class GeneWindows(object):
+    """
+    The windows of window_size consecutive genes of a chromosome with the number of essential genes in each window.
+
+    The window i contains the genes i, i + 1, ..., i + window_size - 1 (counting only the genes) and spans the regions
+    from its first gene to its last gene. The counts are computed from prefix sums over the gene sequence, so
+    building the windows takes O(n) numpy operations and no window is scanned gene by gene.
+
+    Attributes:
+        window_size: the number of genes in a window
+        flags: the flags of the regions the windows were built from (see region_flags)
+        gene_positions: the positions of the genes among the regions (numpy array)
+        essentials: the number of essential genes in each window (numpy array)
+        breakables: the number of regions that can break in the span of each window (numpy array)
+    """
+    def __init__(self, flags, window_size):
+        if window_size < 1:
+            raise ValueError("the window size must be positive")
+
+        flags = numpy.asarray(flags, dtype=numpy.uint8)
+        self.flags = flags
+        self.window_size = window_size
+        self.gene_positions = numpy.flatnonzero(flags & REGION_GENE)
+
+        window_count = max(len(self.gene_positions) - window_size + 1, 0)
+
+        essential_sums = numpy.zeros(len(self.gene_positions) + 1, dtype=numpy.int64)
+        numpy.cumsum((flags[self.gene_positions] & REGION_ESSENTIAL) != 0, out=essential_sums[1:])
+        self.essentials = essential_sums[window_size:] - essential_sums[:window_count]
+
+        breakable_sums = numpy.zeros(len(flags) + 1, dtype=numpy.int64)
+        numpy.cumsum((flags & REGION_CAN_BREAK) != 0, out=breakable_sums[1:])
+        starts = self.gene_positions[:window_count]
+        stops = self.gene_positions[window_size - 1:] + 1
+        self.breakables = breakable_sums[stops] - breakable_sums[starts]
+
+    def __len__(self):
+        return len(self.essentials)
+
+    def gene_count(self):
+        return len(self.gene_positions)
+
+    def eligible(self, essential_genes_in_window, breakable_only=True):
+        """
+        Returns the windows (in increasing order) that contain less than essential_genes_in_window essential genes.
+        If breakable_only is True then the windows without a region that can break are left out.
+        """
+        mask = self.essentials < essential_genes_in_window
+        if breakable_only:
+            mask &= self.breakables > 0
+        return numpy.flatnonzero(mask)
+
+    def span(self, window):
+        """
+        Returns the position of the first region (inclusive) and the last region (exclusive) of the window
+        """
+        return int(self.gene_positions[window]), int(self.gene_positions[window + self.window_size - 1]) + 1
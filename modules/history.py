@@ -0,0 +1,189 @@
+"""
+Delta encoded simulation history.
+
+Copying the gene orders of both chromosomes in every step makes the history grow with the number of steps times the
+number of genes. A HistoryRecorder stores the initial gene orders and the change made by each step in gene positions
+(the operation of the transformation, see Transformation.operation). The gene orders of any step are reconstructed
+by replaying the operations, optionally starting from the nearest keyframe (a full copy of the gene orders stored in
+every keyframe_interval-th step).
+
+The operations are dicts:
+    dict(type='Inversion', chromosome='left', start=2, stop=5): the genes start, ..., stop - 1 of the chromosome are
+        reversed
+    dict(type='Translocation', source='left', target='right', start=2, stop=5, position=3, reverse=True,
+         broken=[False, True, False]): the genes start, ..., stop - 1 of the source move (reversed if reverse is True)
+        before the gene at position in the target. broken tells if the gene before the moved genes, the gene after
+        them and the gene at position in the target broke (they become intergenic regions, so they disappear).
+
+A gene order is a dict of the gene ordinals and the gene orientations: dict(ordinals=[3, 1, 2],
+reversed=[False, True, False]).
+"""
+import copy
+
+CHROMOSOME_KEYS = ['left', 'right']
+
+
+def gene_order(chromosome):
+    """
+    Returns the current gene order of a chromosome
+    """
+    return dict(ordinals=chromosome.get_gene_ordinals(), reversed=chromosome.get_gene_orientations())
+
+
+def apply_operation(orders, operation):
+    """
+    Applies an operation to the gene orders of the chromosomes
+
+    :param orders dict of the gene orders by chromosome key ('left' and 'right'). They are modified in place.
+    :param operation the operation or None (no change)
+    """
+    if operation is None:
+        return
+
+    if operation['type'] == 'Inversion':
+        order = orders[operation['chromosome']]
+        start, stop = operation['start'], operation['stop']
+        order['ordinals'][start:stop] = order['ordinals'][start:stop][::-1]
+        order['reversed'][start:stop] = [not orientation for orientation in order['reversed'][start:stop][::-1]]
+        return
+
+    source = orders[operation['source']]
+    target = orders[operation['target']]
+    start, stop = operation['start'], operation['stop']
+    before_broken, after_broken, target_broken = operation['broken']
+
+    ordinals = source['ordinals'][start:stop]
+    orientations = source['reversed'][start:stop]
+    if operation['reverse']:
+        ordinals = ordinals[::-1]
+        orientations = [not orientation for orientation in orientations[::-1]]
+
+    first = start - 1 if before_broken else start
+    last = stop + 1 if after_broken else stop
+    del source['ordinals'][first:last]
+    del source['reversed'][first:last]
+
+    position = operation['position']
+    end = position + 1 if target_broken else position
+    target['ordinals'][position:end] = ordinals
+    target['reversed'][position:end] = orientations
+
+
+class HistoryRecorder(object):
+    """
+    Records the steps of a simulation
+
+    Attributes:
+        chromosomes: the chromosomes of the simulation by key ('left' and 'right')
+        initial: the gene orders of the chromosomes before the first step by chromosome key
+        steps: the recorded steps. Each step is a dict with the operation and the other values of the step
+            (for example the transformation name and the distance).
+        keyframe_interval: the gene orders are copied after every keyframe_interval-th step. None means no keyframes.
+        keyframes: the copies of the gene orders. The i-th keyframe is the state after the step
+            (i + 1) * keyframe_interval - 1 (0 based).
+    """
+    def __init__(self, left_chromosome, right_chromosome, keyframe_interval=None):
+        self.chromosomes = dict(left=left_chromosome, right=right_chromosome)
+        self.initial = self._gene_orders()
+        self.steps = []
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = []
+
+    def record(self, operation, **values):
+        """
+        Records a step after it changed the chromosomes
+
+        :param operation the operation of the step (see the module documentation) or None
+        :param values the other values of the step
+        """
+        values['operation'] = operation
+        self.steps.append(values)
+
+        if self.keyframe_interval and len(self.steps) % self.keyframe_interval == 0:
+            self.keyframes.append(self._gene_orders())
+
+    def to_dict(self):
+        """
+        Returns the recorded history as a dict that can be serialized to JSON (see order_at and iterate_history)
+        """
+        return dict(initial=self.initial,
+                    steps=self.steps,
+                    keyframe_interval=self.keyframe_interval,
+                    keyframes=self.keyframes)
+
+    def _gene_orders(self):
+        return dict((key, gene_order(chromosome)) for key, chromosome in self.chromosomes.items())
+
+
+def order_at(history, step):
+    """
+    Reconstructs the gene orders of the chromosomes after a step
+
+    :param history the history created by HistoryRecorder.to_dict
+    :param step the 0 based index of the step. -1 returns the initial gene orders.
+
+    :returns dict of the gene orders by chromosome key
+    """
+    interval = history['keyframe_interval']
+    keyframe = (step + 1) // interval - 1 if interval else -1
+    if keyframe >= 0:
+        orders = copy.deepcopy(history['keyframes'][keyframe])
+        first = (keyframe + 1) * interval
+    else:
+        orders = copy.deepcopy(history['initial'])
+        first = 0
+
+    for recorded in history['steps'][first:step + 1]:
+        apply_operation(orders, recorded['operation'])
+    return orders
+
+
+def history_steps(history):
+    """
+    Returns the list of the steps of a history without the gene orders. The history is either a compact history
+    (see HistoryRecorder.to_dict) or a list of full history items.
+    """
+    if isinstance(history, list):
+        return history
+    return history['steps']
+
+
+def iterate_history(history):
+    """
+    Iterates over the full history items: dicts with the gene ordinals of the chromosomes in each step
+    (dict(ordinals=...) by chromosome key) and the other values of the step. The gene orders are reconstructed one
+    step after the other.
+
+    :param history a compact history (see HistoryRecorder.to_dict) or full history items (a list or an iterator)
+    """
+    if not isinstance(history, dict):
+        for item in history:
+            yield item
+        return
+
+    for item in history_items(replay(copy.deepcopy(history['initial']), history['steps'])):
+        yield item
+
+
+def replay(orders, steps):
+    """
+    Applies the recorded steps to the gene orders one after the other and yields each step with the gene orders after
+    it. The orders are modified in place, so the yielded orders change with the next step.
+
+    :param orders the gene orders before the first step by chromosome key
+    :param steps the recorded steps (an iterator is read lazily)
+    """
+    for recorded in steps:
+        apply_operation(orders, recorded['operation'])
+        yield recorded, orders
+
+
+def history_items(replayed):
+    """
+    Converts the replayed steps (see replay) to full history items (see iterate_history)
+    """
+    for recorded, orders in replayed:
+        item = dict((key, value) for key, value in recorded.items() if key != 'operation')
+        for key in CHROMOSOME_KEYS:
+            item[key] = dict(ordinals=list(orders[key]['ordinals']))
+        yield item
@@ -0,0 +1,229 @@
+"""
+Memory mapped chromosome loading.
+
+The chromosome description file is mapped into memory and the regions only store offsets into the mapping,
+so loading a chromosome doesn't copy the bases into Python strings. The content of a region becomes a real
+string only when the region is modified (copy-on-write): the transformations replace the content of the
+regions they change and leave the others pointing into the file.
+
+Scanning the file for the region boundaries is the only step that touches every byte. Its result (the region
+table) is cached in a file next to the description, so the next simulation using the same upload can skip it.
+"""
+import mmap
+import os
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, DnaBaseMappings, Gene, IntergenicRegion, \
+    DESCRIPTION_CHUNK_SIZE, find_boundaries, scan_boundaries
+
+# increase it when the layout of the region table changes
+REGION_TABLE_VERSION = 1
+REGION_TABLE_SUFFIX = '.regions.npz'
+
+
+class MappedSequence(object):
+    """
+    A read only view of the bytes buffer[start:end] that can be used as the content of a region.
+
+    Slicing returns a new view, every other operation that produces a sequence (concatenation, reverse
+    complementing) returns a string.
+    """
+    __slots__ = ('buffer', 'start', 'end')
+
+    def __init__(self, buffer, start, end):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.end - self.start)
+            if step != 1:
+                return str(self)[key]
+            return MappedSequence(self.buffer, self.start + start, self.start + max(start, stop))
+
+        if key < 0:
+            key += self.end - self.start
+        if not 0 <= key < self.end - self.start:
+            raise IndexError("sequence index out of range")
+        return self.buffer[self.start + key]
+
+    def __str__(self):
+        return self.buffer[self.start:self.end]
+
+    def __repr__(self):
+        return 'MappedSequence(%r)' % str(self)
+
+    def __add__(self, other):
+        return str(self) + str(other)
+
+    def __radd__(self, other):
+        return str(other) + str(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (basestring, MappedSequence)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def reverse_complement(self):
+        return DnaBaseMappings.reverse_complement(str(self))
+
+    # the views are immutable, so the copies can share them like strings
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def load_mapped_chromosome(file_name, use_coexpression=False, cache=True):
+    """
+    Loads a chromosome description file (see Chromosome.parse) without reading the bases into memory
+
+    :param cache if True then the region table is read from (or written to) the cache file next to the description
+
+    :returns a Chromosome instance. The content of the regions are MappedSequence instances.
+    """
+    with open(file_name, 'rb') as chromosome_file:
+        if os.fstat(chromosome_file.fileno()).st_size == 0:
+            return Chromosome([])
+        # the mapping stays valid after the file is closed
+        buffer = mmap.mmap(chromosome_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    table = None
+    if cache:
+        table = read_region_table(file_name, use_coexpression)
+    if table is None:
+        table = scan_region_table(buffer, use_coexpression)
+        if cache:
+            write_region_table(file_name, use_coexpression, table)
+
+    return Chromosome(create_regions(buffer, table))
+
+
+def scan_region_table(buffer, use_coexpression=False, window_size=None):
+    """
+    Finds the regions of a chromosome description
+
+    :param buffer a string or an mmap containing the description
+    :param window_size the number of bytes examined at once
+
+    :returns a dict of numpy arrays:
+        is_gene: True for the genes
+        starts, ends: the region spans the bytes buffer[starts[i]:ends[i]]
+        flags: is_essential for the genes, can_break for the intergenic regions
+        fragmented: True if the span contains essential gene markers that are not part of the content
+    """
+    is_gene = []
+    starts = []
+    ends = []
+    flags = []
+    fragmented = []
+    for region_is_gene, pieces, flag in scan_boundaries(_iter_buffer_boundaries(buffer, window_size),
+                                                        use_coexpression=use_coexpression):
+        is_gene.append(region_is_gene)
+        if pieces:
+            starts.append(pieces[0][0])
+            ends.append(pieces[-1][1])
+        else:
+            starts.append(0)
+            ends.append(0)
+        flags.append(flag)
+        fragmented.append(len(pieces) > 1)
+
+    return dict(is_gene=numpy.array(is_gene, dtype=bool),
+                starts=numpy.array(starts, dtype=numpy.int64),
+                ends=numpy.array(ends, dtype=numpy.int64),
+                flags=numpy.array(flags, dtype=bool),
+                fragmented=numpy.array(fragmented, dtype=bool))
+
+
+def create_regions(buffer, table):
+    """
+    Creates the regions described by a region table (see scan_region_table) over the buffer
+    """
+    regions = []
+    for region_is_gene, start, end, flag, region_fragmented in zip(table['is_gene'].tolist(),
+                                                                  table['starts'].tolist(),
+                                                                  table['ends'].tolist(),
+                                                                  table['flags'].tolist(),
+                                                                  table['fragmented'].tolist()):
+        if region_fragmented:
+            content = buffer[start:end].replace(Chromosome.ESSENTIAL_GENE_MARKER, '')
+        else:
+            content = MappedSequence(buffer, start, end)
+
+        if region_is_gene:
+            regions.append(Gene(content, is_essential=flag))
+        else:
+            region = IntergenicRegion(content)
+            region.can_break = flag
+            regions.append(region)
+
+    return regions
+
+
+def read_region_table(file_name, use_coexpression):
+    """
+    Reads the cached region table of a description file
+
+    :returns the region table or None if there's no valid cache for the current version of the file
+    """
+    try:
+        with numpy.load(file_name + REGION_TABLE_SUFFIX) as cached:
+            if cached['key'].tolist() != _region_table_key(file_name, use_coexpression):
+                return None
+            return dict((name, cached[name]) for name in ('is_gene', 'starts', 'ends', 'flags', 'fragmented'))
+    except (IOError, OSError, KeyError, ValueError):
+        return None
+
+
+def write_region_table(file_name, use_coexpression, table):
+    """
+    Writes the region table to the cache file. The cache is optional, so the errors are ignored.
+    """
+    cache_name = file_name + REGION_TABLE_SUFFIX
+    temporary_name = '%s.%d.tmp' % (cache_name, os.getpid())
+    try:
+        with open(temporary_name, 'wb') as cache_file:
+            numpy.savez(cache_file, key=numpy.array(_region_table_key(file_name, use_coexpression),
+                                                    dtype=numpy.int64), **table)
+        # the rename is atomic, so the other workers never see a partially written cache
+        os.rename(temporary_name, cache_name)
+    except (IOError, OSError):
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
+
+
+def _region_table_key(file_name, use_coexpression):
+    stat = os.stat(file_name)
+    return [REGION_TABLE_VERSION, stat.st_size, int(stat.st_mtime * 1000), int(use_coexpression)]
+
+
+def _iter_buffer_boundaries(buffer, window_size=None):
+    """
+    Tokenizes the buffer for scan_boundaries. The pieces are (start, end) offset pairs.
+    """
+    window_size = window_size or DESCRIPTION_CHUNK_SIZE
+    size = len(buffer)
+
+    position = 0
+    for window_start in xrange(0, size, window_size):
+        for boundary_position in find_boundaries(buffer, window_start, window_start + window_size):
+            yield buffer[boundary_position], \
+                (position, boundary_position) if boundary_position > position else None
+            position = boundary_position + 1
+
+    if position < size:
+        yield None, (position, size)
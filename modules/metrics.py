@@ -0,0 +1,226 @@
+"""
+The diff strategies: metrics measuring how far a chromosome pair got from its original state.
+
+The gene level metrics work on the gene ordinals of the chromosomes (numpy integer arrays), the base level metrics
+on the bases (strings compared as numpy byte arrays). The gene level metrics don't read the bases, so they are cheap
+enough to compute in every simulation step even for long chromosomes. The gene order metrics also take the
+orientation of the genes into account (see gene_order.py).
+"""
+import numpy
+
+from applications.GeneticModeling.modules.distance import DistanceTracker, myers_edit_distance
+from applications.GeneticModeling.modules.gene_order import adjacency_count, breakpoint_count, reversal_distance, \
+    signed_permutation
+
+
+class Metric(object):
+    """
+    Base class of the metrics.
+
+    A metric stores the state of the original chromosomes and measures the current chromosomes against it. The
+    subclasses implement state (the comparable form of a chromosome list) and compare.
+
+    Attributes:
+        original: the state of the original chromosomes
+    """
+    def __init__(self, chromosomes):
+        self.original = self.state(chromosomes)
+
+    def measure(self, chromosomes):
+        """
+        Compares the current state of the chromosomes with the original state
+        """
+        return self.compare(self.original, self.state(chromosomes))
+
+    @staticmethod
+    def state(chromosomes):
+        raise NotImplementedError()
+
+    def compare(self, original, current):
+        raise NotImplementedError()
+
+
+class GeneMetric(Metric):
+    """
+    Base class of the metrics on the gene order. The state is the array of the gene ordinals of the chromosomes
+    one after the other.
+    """
+    @staticmethod
+    def state(chromosomes):
+        ordinals = []
+        for chromosome in chromosomes:
+            ordinals += chromosome.get_gene_ordinals()
+        return numpy.array(ordinals, dtype=numpy.int64)
+
+
+class BaseMetric(Metric):
+    """
+    Base class of the metrics on the bases. The state is the representation of the chromosomes one after the other.
+    """
+    @staticmethod
+    def state(chromosomes):
+        return "".join([chromosome.represent() for chromosome in chromosomes])
+
+
+class GeneLevelLevenshtein(GeneMetric):
+    """
+    The Levenshtein distance of the gene ordinal sequences
+    """
+    def compare(self, original, current):
+        original, current = trim_arrays(original, current)
+        return myers_edit_distance(original, current)
+
+
+class EditDistance(BaseMetric):
+    """
+    The Levenshtein distance of the bases (see DistanceTracker)
+    """
+    def __init__(self, chromosomes):
+        BaseMetric.__init__(self, chromosomes)
+        self.tracker = DistanceTracker(self.original)
+
+    def compare(self, original, current):
+        if original is self.original:
+            return self.tracker.update(current)
+        return DistanceTracker(original).update(current)
+
+
+class Hamming(BaseMetric):
+    """
+    The number of positions where the bases differ. The bases over the length of the shorter sequence count as
+    different.
+    """
+    def compare(self, original, current):
+        length = min(len(original), len(current))
+        return count_mismatches(original[:length], current[:length]) + abs(len(original) - len(current))
+
+
+class SMC(BaseMetric):
+    """
+    The simple matching coefficient: the ratio of the positions where the bases are the same (1.0 for identical
+    sequences). The positions over the length of the shorter sequence count as different.
+    """
+    def compare(self, original, current):
+        length = max(len(original), len(current))
+        if not length:
+            return 1.0
+        common = min(len(original), len(current))
+        return float(common - count_mismatches(original[:common], current[:common])) / length
+
+
+class Entropy(GeneMetric):
+    """
+    The Shannon entropy (in bits) of the gene displacements: the distribution of the differences of the current and
+    the original positions of the genes. It's 0 for the original order and at most log2 of the number of genes. The
+    chromosomes must contain the same genes as the original ones.
+    """
+    def compare(self, original, current):
+        if not len(current):
+            return 0.0
+
+        # the original position of each current gene
+        order = numpy.argsort(original, kind='mergesort')
+        original_positions = order[numpy.searchsorted(original[order], current)]
+
+        displacements = numpy.arange(len(current)) - original_positions
+        counts = numpy.unique(displacements, return_counts=True)[1]
+        probabilities = counts / float(len(current))
+        entropy = -(probabilities * numpy.log2(probabilities)).sum()
+        return float(entropy) if entropy > 0 else 0.0
+
+
+class GeneOrderMetric(Metric):
+    """
+    Base class of the rearrangement metrics. The state is a tuple of the gene ordinals and the gene orientations of
+    the chromosomes one after the other, and the current order is compared as a signed permutation of the original
+    order (see signed_permutation in gene_order.py).
+    """
+    @staticmethod
+    def state(chromosomes):
+        ordinals = []
+        orientations = []
+        for chromosome in chromosomes:
+            ordinals += chromosome.get_gene_ordinals()
+            orientations += chromosome.get_gene_orientations()
+        return numpy.array(ordinals, dtype=numpy.int64), numpy.array(orientations, dtype=bool)
+
+    def compare(self, original, current):
+        return self.compare_permutation(signed_permutation(original[0], original[1], current[0], current[1]))
+
+    def compare_permutation(self, permutation):
+        raise NotImplementedError()
+
+
+class BreakpointDistance(GeneOrderMetric):
+    """
+    The number of neighboring gene pairs (and chromosome ends) that were not neighbors in the same orientation
+    originally
+    """
+    def compare_permutation(self, permutation):
+        return breakpoint_count(permutation)
+
+
+class Adjacencies(GeneOrderMetric):
+    """
+    The number of the original neighboring gene pairs (and chromosome ends) that are still neighbors in the same
+    orientation
+    """
+    def compare_permutation(self, permutation):
+        return adjacency_count(permutation)
+
+
+class ReversalDistance(GeneOrderMetric):
+    """
+    The minimum number of reversals that restore the original gene order and orientations
+    """
+    def compare_permutation(self, permutation):
+        return reversal_distance(permutation)
+
+
+# the metrics by diff strategy name (see _get_diff_strategies in controllers/default.py)
+METRICS = {
+    'GeneLevelLevenshtein': GeneLevelLevenshtein,
+    'EditDistance': EditDistance,
+    'Hamming': Hamming,
+    'SMC': SMC,
+    'Entropy': Entropy,
+    'BreakpointDistance': BreakpointDistance,
+    'Adjacencies': Adjacencies,
+    'ReversalDistance': ReversalDistance
+}
+
+# the metrics recorded in the history of the simulations (see run_simulation)
+GENE_ORDER_METRICS = ['BreakpointDistance', 'Adjacencies', 'ReversalDistance']
+
+
+def get_metric(name):
+    """
+    Returns the metric class of a diff strategy. Raises ValueError if there is no such strategy.
+    """
+    if name not in METRICS:
+        raise ValueError("unknown diff strategy: %s" % name)
+    return METRICS[name]
+
+
+def count_mismatches(first, second):
+    """
+    Returns the number of positions where two strings of the same length differ
+    """
+    return int(numpy.count_nonzero(numpy.frombuffer(first, dtype=numpy.uint8)
+                                   != numpy.frombuffer(second, dtype=numpy.uint8)))
+
+
+def trim_arrays(first, second):
+    """
+    Removes the common prefix and suffix of two numpy arrays
+
+    :returns the trimmed arrays
+    """
+    length = min(len(first), len(second))
+    mismatches = numpy.flatnonzero(first[:length] != second[:length])
+    prefix = mismatches[0] if len(mismatches) else length
+
+    rest = length - prefix
+    mismatches = numpy.flatnonzero(first[len(first) - rest:][::-1] != second[len(second) - rest:][::-1])
+    suffix = mismatches[0] if len(mismatches) else rest
+    return first[prefix:len(first) - suffix], second[prefix:len(second) - suffix]
@@ -0,0 +1,201 @@
+"""
+2 bit encoding of base sequences.
+
+Each base is stored on 2 bits (A=0, C=1, G=2, T=3), four bases in a byte with the first base in the highest bits.
+With this encoding the complement of a base code c is 3 - c.
+"""
+import string
+
+import numpy
+
+PACKED_BASES = 'ACGT'
+
+# base character -> 2 bit code
+CODE_TRANSLATION = string.maketrans(PACKED_BASES, '\x00\x01\x02\x03')
+
+CHARACTERS = numpy.frombuffer(PACKED_BASES, dtype=numpy.uint8)
+
+# packed byte -> its four bases as one uint32 (in memory order), so unpacking is a single table lookup
+_SHIFTS = numpy.array([6, 4, 2, 0], dtype=numpy.uint8)
+_BYTE_CODES = (numpy.arange(256, dtype=numpy.uint8)[:, numpy.newaxis] >> _SHIFTS) & 3
+_BYTE_CHARACTERS = CHARACTERS[_BYTE_CODES].view(numpy.uint32).reshape(-1)
+
+# translation table: packed byte -> the byte of the complements of its bases in reversed order
+_REVERSE_COMPLEMENT_BYTES = numpy.bitwise_or.reduce((3 - _BYTE_CODES[:, ::-1]) << _SHIFTS, axis=1) \
+    .astype(numpy.uint8).tobytes()
+
+
+def packed_size(length):
+    """
+    Returns the number of bytes needed for length bases
+    """
+    return (length + 3) // 4
+
+
+def can_pack(bases):
+    """
+    Returns True if the string consists of upper case A, C, G and T characters only
+    """
+    return not bases.translate(None, PACKED_BASES)
+
+
+def pack_bases(bases):
+    """
+    Packs a string of bases
+
+    :param bases a string of A, C, G and T characters (see can_pack)
+
+    :returns the packed string. The unused bits of the last byte are zero.
+    """
+    if not can_pack(bases):
+        raise ValueError("only A, C, G and T bases can be packed")
+
+    return pack_codes(numpy.frombuffer(bases.translate(CODE_TRANSLATION), dtype=numpy.uint8))
+
+
+def pack_codes(codes):
+    """
+    Packs a numpy uint8 array of base codes
+
+    :returns the packed string. The unused bits of the last byte are zero.
+    """
+    padded = numpy.zeros(packed_size(len(codes)) * 4, dtype=numpy.uint8)
+    padded[:len(codes)] = codes
+
+    # each group of four codes read as a big endian number is c0 << 24 | c1 << 16 | c2 << 8 | c3
+    groups = padded.view('>u4')
+    packed = groups >> 18
+    packed |= groups >> 12
+    packed |= groups >> 6
+    packed |= groups
+    return packed.astype(numpy.uint8).tobytes()
+
+
+def unpack_codes(packed, length, offset=0):
+    """
+    Unpacks the first length bases of a packed string starting at the offset-th byte
+
+    :returns a numpy uint8 array of base codes
+    """
+    data = numpy.frombuffer(packed, dtype=numpy.uint8, count=packed_size(length), offset=offset)
+    return _BYTE_CODES[data].reshape(-1)[:length]
+
+
+def unpack_bases(packed, length, offset=0):
+    """
+    Unpacks the first length bases of a packed string starting at the offset-th byte
+
+    :returns a string of bases
+    """
+    data = numpy.frombuffer(packed, dtype=numpy.uint8, count=packed_size(length), offset=offset)
+    return _BYTE_CHARACTERS.take(data).tobytes()[:length]
+
+
+class PackedSequence(object):
+    """
+    An immutable base sequence stored on 2 bits per base. It can be used as the content of the regions
+    (see Chromosome.pack).
+
+    Slicing returns a view sharing the packed data. Concatenating two packed sequences and reverse complementing
+    return packed sequences, every other operation that produces a sequence returns a string.
+
+    Attributes:
+        data: the packed string
+        start: the index of the first base of the sequence in data
+        length: the number of bases
+    """
+    __slots__ = ('data', 'start', 'length')
+
+    def __init__(self, data, start, length):
+        self.data = data
+        self.start = start
+        self.length = length
+
+    @staticmethod
+    def pack(bases):
+        """
+        Packs a string of A, C, G and T characters (see can_pack)
+        """
+        return PackedSequence(pack_bases(bases), 0, len(bases))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                return str(self)[key]
+            return PackedSequence(self.data, self.start + start, max(0, stop - start))
+
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError("sequence index out of range")
+        position = self.start + key
+        return PACKED_BASES[(ord(self.data[position // 4]) >> (6 - 2 * (position % 4))) & 3]
+
+    def __str__(self):
+        skipped = self.start % 4
+        return unpack_bases(self.data, skipped + self.length, offset=self.start // 4)[skipped:]
+
+    def __repr__(self):
+        return 'PackedSequence(%r)' % str(self)
+
+    def __add__(self, other):
+        if not isinstance(other, PackedSequence):
+            return str(self) + str(other)
+
+        if self.start % 4 == 0 and self.length % 4 == 0 and other.start % 4 == 0:
+            # the bases of other start at a byte boundary in the result, so the bytes can be copied
+            return PackedSequence(self._bytes() + other._bytes(), 0, self.length + other.length)
+
+        return PackedSequence(pack_codes(numpy.concatenate((self._codes(), other._codes()))), 0,
+                              self.length + other.length)
+
+    def __radd__(self, other):
+        return str(other) + str(self)
+
+    def __eq__(self, other):
+        if isinstance(other, PackedSequence):
+            if self.length != other.length:
+                return False
+            if self.start % 4 == 0 and other.start % 4 == 0 and self.length % 4 == 0:
+                return self._bytes() == other._bytes()
+            return str(self) == str(other)
+        if isinstance(other, basestring):
+            return str(self) == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def reverse_complement(self):
+        """
+        Returns the reverse complement as a packed sequence. The bytes are reversed and each byte is replaced by
+        its reverse complement (the negated codes in reversed order), so the bases don't have to be unpacked.
+        """
+        first_byte = self.start // 4
+        end = self.start + self.length
+        last_byte = packed_size(end)
+        reversed_bytes = self.data[first_byte:last_byte][::-1].translate(_REVERSE_COMPLEMENT_BYTES)
+
+        # the base at position p of the bytes is at 4 * byte_count - 1 - p after the reversal
+        return PackedSequence(reversed_bytes, 4 * last_byte - end, self.length)
+
+    def _bytes(self):
+        return self.data[self.start // 4:packed_size(self.start + self.length)]
+
+    def _codes(self):
+        skipped = self.start % 4
+        return unpack_codes(self.data, skipped + self.length, offset=self.start // 4)[skipped:]
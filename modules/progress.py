@@ -0,0 +1,84 @@
+"""
+Progress reports of the running simulations.
+
+The simulation loop tells the reporter the number of steps done after every step, and the reporter passes a progress
+dict to its report function at most every interval seconds (the scheduler writes it to the simulation_progress
+table, the result page polls it). The progress dict:
+
+    step: the number of steps done
+    total: the number of steps of the simulation
+    steps_per_second: the speed since the previous report (None before the first one)
+    eta: the estimated number of seconds until the end (None if the speed is not known)
+    distance: the last computed distance (None before the first one)
+    updated: the time of the report (seconds since the epoch)
+"""
+import time
+
+# the default minimum number of seconds between two reports
+DEFAULT_INTERVAL = 2.0
+
+
+class ProgressReporter(object):
+    """
+    Measures the progress of a simulation and reports it at a throttled interval
+
+    Attributes:
+        report: the function called with the progress dicts
+        interval: the minimum number of seconds between two reports (0 reports every step)
+        clock: the function returning the current time in seconds
+    """
+    def __init__(self, report, interval=DEFAULT_INTERVAL, clock=time.time):
+        self.report = report
+        self.interval = interval
+        self.clock = clock
+        self.total = 0
+        self.distance = None
+        self._last_step = 0
+        self._last_time = None
+        self._speed = None
+
+    def start(self, step, total):
+        """
+        Reports the start of the simulation
+
+        :param step the number of steps already done (a resumed simulation continues from its checkpoint)
+        :param total the number of steps of the simulation
+        """
+        self.total = total
+        self._last_step = step
+        self._last_time = self.clock()
+        self._report(step, self._last_time)
+
+    def update(self, step, distance=None):
+        """
+        Records a finished step and reports the progress if the interval has passed since the previous report
+
+        :param step the number of steps done
+        :param distance the distance computed in the step or None
+        """
+        if distance is not None:
+            self.distance = distance
+
+        now = self.clock()
+        if now - self._last_time < self.interval and step < self.total:
+            return
+
+        if now > self._last_time:
+            self._speed = (step - self._last_step) / (now - self._last_time)
+        self._last_step = step
+        self._last_time = now
+        self._report(step, now)
+
+    def _report(self, step, now):
+        eta = None
+        if self._speed:
+            eta = (self.total - step) / self._speed
+        elif step == self.total:
+            eta = 0.0
+
+        self.report(dict(step=step,
+                         total=self.total,
+                         steps_per_second=self._speed,
+                         eta=eta,
+                         distance=self.distance,
+                         updated=now))
@@ -0,0 +1,220 @@
+"""
+Random number sources used by the transformations and the simulations.
+
+A RandomSource wraps a numpy random generator (numpy.random.Generator where available, RandomState on older numpy
+versions) behind the few calls the simulation needs, so the simulations can run with their own seeded generator
+instead of the global numpy state.
+
+The seeds are integers or lists of 32 bit integers. The independent streams of parallel simulations get the seeds
+spawned from a root seed (see spawn_seeds), so rerunning a job with the same root seed reproduces every stream.
+"""
+import hashlib
+import os
+
+import numpy
+from numpy import random
+
+try:
+    from numpy.random import SeedSequence
+except ImportError:
+    # numpy < 1.17
+    SeedSequence = None
+
+# the number of uniforms drawn at once by BufferedRandomSource
+DEFAULT_BLOCK_SIZE = 4096
+
+# the number of 32 bit words of the spawned seeds
+SEED_WORDS = 4
+
+
+class RandomSource(object):
+    """
+    Draws random numbers from a numpy generator
+
+    Attributes:
+        generator: a numpy.random.Generator, a numpy.random.RandomState or the numpy.random module itself
+            (the global numpy random state)
+    """
+    def __init__(self, generator=None):
+        self.generator = generator if generator is not None else random
+
+        # Generator and RandomState name these methods differently
+        self._integers = getattr(self.generator, 'integers', None) or self.generator.randint
+        self._uniforms = getattr(self.generator, 'random_sample', None) or self.generator.random
+
+    def random(self, size=None):
+        """
+        Returns a float from [0, 1) or a numpy array of them if size is given
+        """
+        return self._uniforms(size)
+
+    def randint(self, high, size=None):
+        """
+        Returns an integer from [0, high) or a numpy array of them if size is given
+        """
+        if size is None:
+            return int(self._integers(0, high))
+        return self._integers(0, high, size=size)
+
+    def choice(self, sequence):
+        """
+        Returns a random element of a non-empty sequence
+        """
+        return sequence[self.randint(len(sequence))]
+
+    def weighted_sample(self, population, count, probabilities=None):
+        """
+        Selects count different elements of a numpy array. The element i is selected with probability
+        probabilities[i] (renormalized after each selection).
+
+        :returns a numpy array
+        """
+        return self.generator.choice(population, size=count, replace=False, p=probabilities)
+
+    def shuffle(self, sequence):
+        """
+        Shuffles a list in place
+        """
+        self.generator.shuffle(sequence)
+
+    def get_state(self):
+        """
+        Returns the state of the source as a dict that can be serialized to JSON (see set_state)
+        """
+        if hasattr(self.generator, 'bit_generator'):
+            return dict(generator=self.generator.bit_generator.state)
+
+        name, key, position, has_gauss, cached_gaussian = self.generator.get_state()
+        return dict(generator=dict(name=name, key=key.tolist(), position=position, has_gauss=has_gauss,
+                                   cached_gaussian=cached_gaussian))
+
+    def set_state(self, state):
+        """
+        Restores a state returned by get_state. The generator must be of the same kind.
+        """
+        generator_state = state['generator']
+        if hasattr(self.generator, 'bit_generator'):
+            self.generator.bit_generator.state = generator_state
+        else:
+            self.generator.set_state((str(generator_state['name']),
+                                      numpy.array(generator_state['key'], dtype=numpy.uint32),
+                                      generator_state['position'],
+                                      generator_state['has_gauss'],
+                                      generator_state['cached_gaussian']))
+
+
+class BufferedRandomSource(RandomSource):
+    """
+    A RandomSource that draws the uniforms in blocks and serves the scalar requests (random, randint, choice) from
+    the block, so a simulation step doesn't have to make several small numpy calls. The requests for arrays and
+    the other methods use the generator directly.
+
+    The numbers are different from the ones of a RandomSource with the same generator, but the same seed gives the
+    same numbers.
+    """
+    def __init__(self, generator=None, block_size=DEFAULT_BLOCK_SIZE):
+        RandomSource.__init__(self, generator)
+        self.block_size = block_size
+        self._block = []
+        self._next = 0
+
+    def random(self, size=None):
+        if size is not None:
+            return RandomSource.random(self, size)
+
+        if self._next == len(self._block):
+            self._block = RandomSource.random(self, self.block_size).tolist()
+            self._next = 0
+
+        value = self._block[self._next]
+        self._next += 1
+        return value
+
+    def randint(self, high, size=None):
+        if size is not None:
+            return RandomSource.randint(self, high, size)
+
+        # the uniforms have 53 random bits, so the bias is negligible for the lengths and counts used here
+        return int(self.random() * high)
+
+    def get_state(self):
+        # the unused part of the block is part of the state
+        state = RandomSource.get_state(self)
+        state['block'] = self._block[self._next:]
+        return state
+
+    def set_state(self, state):
+        RandomSource.set_state(self, state)
+        self._block = list(state['block'])
+        self._next = 0
+
+
+def create_generator(seed=None):
+    """
+    Creates a numpy random generator: a Generator if the installed numpy has one, a RandomState otherwise
+
+    :param seed an integer, a list of 32 bit integers or None (seeded from the operating system)
+    """
+    if hasattr(random, 'default_rng'):
+        return random.default_rng(seed)
+    if seed is not None and not (isinstance(seed, (int, long)) and 0 <= seed < 2 ** 32):
+        # RandomState takes the larger seeds and the lists as arrays of 32 bit words
+        seed = _seed_words(seed)
+    return random.RandomState(seed)
+
+
+def new_seed():
+    """
+    Returns a random seed from the operating system. The jobs without a given seed record it, so they can be rerun.
+    """
+    return int(os.urandom(8).encode('hex'), 16) >> 1
+
+
+def spawn_seeds(seed, count):
+    """
+    Returns the seeds of count independent random streams derived from a root seed (for example the replicates of an
+    ensemble). The same root seed gives the same seeds.
+
+    The seeds are spawned with numpy.random.SeedSequence where numpy has it. The older versions derive them by hashing
+    the root seed and the index of the stream, so their streams differ from the ones of the newer versions.
+
+    :returns a list of seeds, each one a list of SEED_WORDS 32 bit integers
+    """
+    if SeedSequence is not None:
+        return [child.generate_state(SEED_WORDS).tolist() for child in SeedSequence(seed).spawn(count)]
+
+    words = _seed_words(seed)
+    return [numpy.frombuffer(hashlib.sha256(repr((words, index))).digest()[:4 * SEED_WORDS],
+                             dtype='<u4').tolist()
+            for index in range(count)]
+
+
+def _seed_words(seed):
+    """
+    Returns a seed as a list of 32 bit integers (the least significant word first)
+    """
+    if isinstance(seed, (list, tuple, numpy.ndarray)):
+        return [int(word) for word in seed]
+
+    seed = int(seed)
+    if seed < 0:
+        raise ValueError("negative seed: %d" % seed)
+    words = [int(seed & 0xffffffff)]
+    seed >>= 32
+    while seed:
+        words.append(int(seed & 0xffffffff))
+        seed >>= 32
+    return words
+
+
+def create_random_source(seed=None, buffered=False, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Creates a random source with a new generator
+
+    :param seed the seed of the generator. None seeds it from the operating system.
+    :param buffered if True then the uniforms are drawn in blocks (see BufferedRandomSource)
+    """
+    generator = create_generator(seed)
+    if buffered:
+        return BufferedRandomSource(generator, block_size=block_size)
+    return RandomSource(generator)
@@ -0,0 +1,204 @@
+"""
+File based store of the simulation results.
+
+The scheduler serializes the return value of a task into the scheduler_run table and the result page reads it back
+on every refresh, so the simulations only return a small manifest and the results are written to the files of a
+folder per task:
+
+    steps.npz: the values of the steps as numpy columns (the transformations, the distances and the gene order
+        metrics). The result page reads only these for the charts.
+    history-steps.jsonl: the recorded steps of the compact history (see HistoryRecorder.to_dict), one in each line
+    history-keyframes.jsonl: the initial gene orders in the first line and the keyframes of the history in the others
+    history-index.json: the keyframe interval, the byte offsets of the first steps of the segments between the
+        keyframes and of the keyframes, and the offsets of the segments of the exports (see export_offsets). The
+        history is read from the keyframe before a step and only the steps after the keyframe are parsed.
+    final-left.txt, final-right.txt: the final chromosome descriptions, only read when they are downloaded
+"""
+import json
+import os
+import re
+
+import numpy
+
+from applications.GeneticModeling.modules.export import export_offsets
+from applications.GeneticModeling.modules.history import history_steps, replay
+
+STEPS_FILE = 'steps.npz'
+HISTORY_STEPS_FILE = 'history-steps.jsonl'
+HISTORY_KEYFRAMES_FILE = 'history-keyframes.jsonl'
+HISTORY_INDEX_FILE = 'history-index.json'
+FINAL_CHROMOSOME_FILES = dict(left='final-left.txt', right='final-right.txt')
+
+# the version of the file layout, stored in the manifests
+STORE_VERSION = 2
+
+# the task names are used as folder names
+_VALID_NAME = re.compile(r'^[\w\-]+$')
+
+
+class ResultStore(object):
+    """
+    Stores the results of the simulations in a folder per task
+
+    Attributes:
+        folder: the folder containing the task folders
+    """
+    def __init__(self, folder):
+        self.folder = folder
+
+    def save(self, name, result):
+        """
+        Writes the result of a simulation (see run_simulation) to the files of the task
+
+        :param name the name of the task folder (the uuid of the scheduler task)
+        :param result the result of run_simulation with a compact history
+
+        :returns the manifest of the stored result (a small dict that can be returned from the task)
+        """
+        task_folder = self.task_folder(name)
+        if not os.path.isdir(task_folder):
+            os.makedirs(task_folder)
+
+        history = result['history']
+        steps = history_steps(history)
+        numpy.savez(os.path.join(task_folder, STEPS_FILE), **steps_to_columns(steps))
+
+        interval = history['keyframe_interval']
+        step_offsets = _write_lines(self.path(name, HISTORY_STEPS_FILE), steps)
+        keyframe_offsets = _write_lines(self.path(name, HISTORY_KEYFRAMES_FILE),
+                                        [history['initial']] + history['keyframes'])
+        index = dict(keyframe_interval=interval,
+                     step_offsets=(step_offsets[::interval] if interval else step_offsets[:1]) or [0],
+                     keyframe_offsets=keyframe_offsets)
+
+        for key, file_name in FINAL_CHROMOSOME_FILES.items():
+            with open(os.path.join(task_folder, file_name), 'w') as output:
+                output.write(result['final_' + key])
+
+        manifest = dict(result_store=STORE_VERSION, name=name, step_count=len(steps), seed=result.get('seed'))
+
+        # the exports are measured on the stored history, so the values are formatted like in the downloads
+        index['exports'] = export_offsets(self.replay_history(manifest, index), interval)
+        with open(self.path(name, HISTORY_INDEX_FILE), 'w') as output:
+            json.dump(index, output)
+
+        return manifest
+
+    def load_steps(self, manifest):
+        """
+        Reads the values of the steps
+
+        :returns dict of numpy arrays (see steps_to_columns)
+        """
+        with numpy.load(self.path(manifest['name'], STEPS_FILE)) as columns:
+            return dict((key, columns[key]) for key in columns.files)
+
+    def load_history(self, manifest):
+        """
+        Reads the whole compact history
+        """
+        index = self.load_history_index(manifest)
+        with open(self.path(manifest['name'], HISTORY_KEYFRAMES_FILE)) as keyframes_file:
+            keyframes = [json.loads(line) for line in keyframes_file]
+        with open(self.path(manifest['name'], HISTORY_STEPS_FILE)) as steps_file:
+            steps = [json.loads(line) for line in steps_file]
+        return dict(initial=keyframes[0], steps=steps, keyframe_interval=index['keyframe_interval'],
+                    keyframes=keyframes[1:])
+
+    def load_history_index(self, manifest):
+        """
+        Reads the index of the stored history (see the module documentation)
+        """
+        with open(self.path(manifest['name'], HISTORY_INDEX_FILE)) as index_file:
+            return json.load(index_file)
+
+    def replay_history(self, manifest, index, segment=0):
+        """
+        Replays the stored history from a keyframe. Only the keyframe and the steps after it are read, one step after
+        the other.
+
+        :param index the index of the history (see load_history_index)
+        :param segment the number of the segment the replay starts with: 0 starts from the initial gene orders, i
+            from the i-th keyframe (after the first i * keyframe_interval steps)
+
+        :returns the iterator of the replayed steps (see replay in history.py)
+        """
+        with open(self.path(manifest['name'], HISTORY_KEYFRAMES_FILE)) as keyframes_file:
+            keyframes_file.seek(index['keyframe_offsets'][segment])
+            orders = json.loads(keyframes_file.readline())
+
+        return replay(orders, _read_lines(self.path(manifest['name'], HISTORY_STEPS_FILE),
+                                          index['step_offsets'][segment]))
+
+    def task_folder(self, name):
+        if not _VALID_NAME.match(name):
+            raise ValueError("invalid task name: %s" % name)
+        return os.path.join(self.folder, name)
+
+    def path(self, name, file_name):
+        """
+        Returns the path of a file of a task. Raises ValueError if the names could point out of the task folder.
+        """
+        if not _VALID_NAME.match(file_name.replace('.', '')):
+            raise ValueError("invalid file name: %s" % file_name)
+        return os.path.join(self.task_folder(name), file_name)
+
+
+def _write_lines(path, documents):
+    """
+    Writes the documents to a file as JSON, one in each line
+
+    :returns the byte offsets of the lines
+    """
+    offsets = []
+    offset = 0
+    with open(path, 'w') as output:
+        for document in documents:
+            line = json.dumps(document) + '\n'
+            offsets.append(offset)
+            output.write(line)
+            offset += len(line)
+    return offsets
+
+
+def _read_lines(path, offset):
+    """
+    Reads the JSON documents of the lines of a file from a byte offset lazily
+    """
+    with open(path) as input_file:
+        input_file.seek(offset)
+        for line in input_file:
+            yield json.loads(line)
+
+
+def is_manifest(result):
+    """
+    Returns True if a task result is the manifest of a stored result (the earlier tasks returned the whole result)
+    """
+    return isinstance(result, dict) and 'result_store' in result
+
+
+def steps_to_columns(steps):
+    """
+    Converts the values of the steps to numpy columns
+
+    :returns dict with the columns: transformation (strings), distance (float, NaN if the step has no distance) and
+        gene_order.<name> for each gene order metric (float, NaN if the step has no gene order metrics)
+    """
+    columns = dict(transformation=numpy.array([step['transformation'] for step in steps], dtype=str),
+                   distance=numpy.array([step.get('distance', numpy.nan) for step in steps], dtype=numpy.float64))
+
+    # the gene order metrics are sampled like the distances, the last step has them if any step has
+    names = steps[-1].get('gene_order', {}).keys() if steps else []
+    for name in names:
+        values = [step['gene_order'][name] if 'gene_order' in step else numpy.nan for step in steps]
+        columns['gene_order.' + name] = numpy.array(values, dtype=numpy.float64)
+    return columns
+
+
+def gene_order_columns(columns):
+    """
+    Returns the gene order metric columns by metric name
+    """
+    prefix = 'gene_order.'
+    return dict((key[len(prefix):], values) for key, values in columns.items() if key.startswith(prefix))
@@ -0,0 +1,202 @@
+"""
+The simulation loop executed by the scheduler
+"""
+import logging
+
+from applications.GeneticModeling.modules.history import HistoryRecorder, gene_order, iterate_history
+from applications.GeneticModeling.modules.metrics import GENE_ORDER_METRICS, GeneOrderMetric, get_metric
+from applications.GeneticModeling.modules.randomness import create_random_source, new_seed
+from applications.GeneticModeling.modules.transformation import Translocation, Inversion
+
+logger = logging.getLogger("web2py.app.GeneticModeling")
+
+
+def run_simulation(left_chromosome,
+                   right_chromosome,
+                   number_of_transformations,
+                   rate_of_translocations,
+                   random_error=None,
+                   longer_breaks_often=True,
+                   essential_genes_window_size=None,
+                   essential_genes_in_window=None,
+                   compute_distances=False,
+                   diff_strategy='EditDistance',
+                   distance_interval=1,
+                   compute_gene_order=False,
+                   gene_order_interval=None,
+                   compact_history=False,
+                   keyframe_interval=None,
+                   rng=None,
+                   seed=None,
+                   buffered_random=True,
+                   metrics=None,
+                   checkpointer=None,
+                   progress=None):
+    """
+    Executes a sequence of random inversions and translocations on two chromosomes
+
+    :param left_chromosome the left chromosome. It is modified by the simulation.
+    :param right_chromosome the right chromosome. It is modified by the simulation.
+    :param rate_of_translocations the percentage of the translocations among the transformations
+    :param compute_distances if True then the history items contain the distance of the current and the original
+        chromosomes
+    :param diff_strategy the name of the metric used for the distances (see METRICS in metrics.py)
+    :param distance_interval the distance is computed in every distance_interval-th step and after the last step.
+        The other history items don't contain a distance.
+    :param compute_gene_order if True then the sampled history items contain the gene order metrics (see
+        GENE_ORDER_METRICS in metrics.py) of the current chromosomes by name under the key gene_order
+    :param gene_order_interval the gene order metrics are computed in every gene_order_interval-th step and after the
+        last step. None means distance_interval.
+    :param compact_history if True then the history is returned delta encoded (see HistoryRecorder.to_dict), else as
+        a list of history items with the gene ordinals of the chromosomes in each step
+    :param keyframe_interval the compact history stores a copy of the gene orders after every keyframe_interval-th
+        step for faster reconstruction (see order_at in history.py). None means no copies.
+    :param rng the RandomSource the simulation draws from. If None then a new one is created from seed.
+    :param seed the seed of the new random source. The same seed and parameters give the same simulation. If None
+        then a new seed is drawn (see new_seed).
+    :param buffered_random if True then the new random source draws the random numbers in blocks
+        (see BufferedRandomSource)
+    :param metrics the metrics of the original chromosomes created by create_metrics with the same parameters. If None
+        then they are created from the chromosomes. A simulation updates the distance metric, so a copy is passed to
+        each simulation.
+    :param checkpointer the Checkpointer writing the checkpoints of the simulation. If it has a checkpoint then the
+        simulation continues from it: the given chromosomes are replaced by the ones of the checkpoint (the returned
+        final representations are the ones to use) and the metrics are created from the original chromosomes of the
+        checkpoint.
+    :param progress the ProgressReporter of the simulation or None
+
+    :returns a dict with the history (the gene ordinals of the chromosomes, the transformation, the distance and the
+        gene order metrics in each step), the final chromosome representations and the seed (None if rng is given)
+    """
+    if rng is None:
+        if seed is None:
+            # recorded in the result, so the simulation can be rerun
+            seed = new_seed()
+        rng = create_random_source(seed, buffered=buffered_random)
+    else:
+        seed = None
+
+    checkpoint = checkpointer.load() if checkpointer is not None else None
+    if checkpoint is not None:
+        logger.debug("resuming the simulation after step %d", checkpoint['step'])
+        transformation_sequence = checkpoint['sequence']
+        left_chromosome, right_chromosome = checkpoint['left'], checkpoint['right']
+        seed = checkpoint['seed']
+        rng.set_state(checkpoint['rng_state'])
+        metrics = create_metrics(checkpoint['original_left'], checkpoint['original_right'],
+                                 compute_distances=compute_distances, diff_strategy=diff_strategy,
+                                 compute_gene_order=compute_gene_order)
+    else:
+        number_of_translocations = int((float(rate_of_translocations)/100) * number_of_transformations)
+        number_of_inversions = number_of_transformations - number_of_translocations
+
+        logger.debug("number of translocations: %d, number of inversions: %d", number_of_translocations,
+                     number_of_inversions)
+
+        # this sequence contains the list if transformations to execute
+        transformation_sequence = ['Translocation'] * number_of_translocations + ['Inversion'] * number_of_inversions
+        rng.shuffle(transformation_sequence)
+
+    # the recorder stores the changes of the gene orders instead of copying them in every step
+    recorder = HistoryRecorder(left_chromosome, right_chromosome, keyframe_interval=keyframe_interval)
+    if checkpoint is not None:
+        recorder.initial = dict(left=gene_order(checkpoint['original_left']),
+                                right=gene_order(checkpoint['original_right']))
+        recorder.steps = checkpoint['steps']
+        recorder.keyframes = checkpoint['keyframes']
+
+    distance_interval = max(int(distance_interval), 1)
+    if gene_order_interval is None:
+        gene_order_interval = distance_interval
+    gene_order_interval = max(int(gene_order_interval), 1)
+
+    if metrics is None:
+        metrics = create_metrics(left_chromosome, right_chromosome, compute_distances=compute_distances,
+                                 diff_strategy=diff_strategy, compute_gene_order=compute_gene_order)
+    metric, gene_order_metrics = metrics
+
+    first_step = 0
+    if checkpoint is not None:
+        first_step = checkpoint['step']
+    elif checkpointer is not None:
+        checkpointer.start(left_chromosome, right_chromosome, transformation_sequence, seed, rng, recorder)
+
+    if progress is not None:
+        progress.start(first_step, len(transformation_sequence))
+
+    for index in xrange(first_step, len(transformation_sequence)):
+        step = transformation_sequence[index]
+        if step == 'Translocation':
+            transformation = Translocation(left_chromosome,
+                                           right_chromosome,
+                                           random_error=random_error,
+                                           longer_breaks_often=longer_breaks_often,
+                                           essential_genes_window_size=essential_genes_window_size,
+                                           essential_genes_in_window=essential_genes_in_window,
+                                           rng=rng)
+        else:
+            selected = rng.choice([left_chromosome, right_chromosome])
+            transformation = Inversion(selected,
+                                       random_error=random_error,
+                                       longer_breaks_often=longer_breaks_often,
+                                       essential_genes_window_size=essential_genes_window_size,
+                                       essential_genes_in_window=essential_genes_in_window,
+                                       rng=rng)
+
+        transformation.transform()
+
+        operation = transformation.operation
+        if operation is not None and step == 'Inversion':
+            operation['chromosome'] = 'left' if selected is left_chromosome else 'right'
+
+        last_step = index == len(transformation_sequence) - 1
+        history_item = dict(transformation=step)
+        if metric is None:
+            history_item['distance'] = 0
+        elif (index + 1) % distance_interval == 0 or last_step:
+            history_item['distance'] = metric.measure([left_chromosome, right_chromosome])
+        if gene_order_metrics and ((index + 1) % gene_order_interval == 0 or last_step):
+            # the metrics share the current gene order
+            current_order = GeneOrderMetric.state([left_chromosome, right_chromosome])
+            history_item['gene_order'] = dict((name, gene_order_metric.compare(gene_order_metric.original,
+                                                                               current_order))
+                                              for name, gene_order_metric in gene_order_metrics)
+        recorder.record(operation, **history_item)
+
+        if progress is not None:
+            progress.update(index + 1, history_item.get('distance'))
+
+        if checkpointer is not None and checkpointer.is_due() and not last_step:
+            checkpointer.save(index + 1, left_chromosome, right_chromosome, rng, recorder)
+
+    history = recorder.to_dict()
+    if not compact_history:
+        history = list(iterate_history(history))
+
+    return dict(history=history,
+                final_left=left_chromosome.represent(),
+                final_right=right_chromosome.represent(),
+                seed=seed)
+
+
+def create_metrics(left_chromosome,
+                   right_chromosome,
+                   compute_distances=False,
+                   diff_strategy='EditDistance',
+                   compute_gene_order=False):
+    """
+    Creates the metrics of a simulation. They store the original state of the chromosomes for later diffs, so the
+    simulations of the same chromosomes can share them (see ensemble.py).
+
+    :returns the metric of the distances (None if compute_distances is False) and the list of the gene order metrics
+        with their names (empty if compute_gene_order is False)
+    """
+    metric = None
+    if compute_distances:
+        metric = get_metric(diff_strategy)([left_chromosome, right_chromosome])
+
+    gene_order_metrics = []
+    if compute_gene_order:
+        gene_order_metrics = [(name, get_metric(name)([left_chromosome, right_chromosome]))
+                              for name in GENE_ORDER_METRICS]
+    return metric, gene_order_metrics
@@ -0,0 +1,166 @@
+"""
+Binary chromosome snapshots.
+
+A snapshot stores a chromosome with all the region attributes the text description can't express (gene ordinals,
+region orientation). The layout:
+
+    header: the magic bytes, the format version (1 byte), the base encoding (1 byte), then varints: the number of
+        regions and the number of bases
+    region table: for each region a varint of flags (see the REGION_* constants), a varint of the content length
+        and for the genes a varint of the ordinal
+    bases: the content of all regions in order, 2 bit packed (see packed.py) or raw if the chromosome contains
+        other characters than A, C, G and T
+
+The varints are unsigned LEB128 numbers (7 bits per byte, the highest bit is set on every byte but the last).
+"""
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, Gene, IntergenicRegion
+from applications.GeneticModeling.modules.packed import pack_bases, packed_size, unpack_bases
+
+MAGIC = 'GMCS'
+VERSION = 1
+
+ENCODING_PACKED = 0
+ENCODING_RAW = 1
+
+REGION_GENE = 1
+REGION_ESSENTIAL = 2
+REGION_CAN_BREAK = 4
+REGION_REVERSED = 8
+
+
+class SnapshotError(ValueError):
+    """
+    Raised when a snapshot can't be read
+    """
+    pass
+
+
+def save_chromosome(chromosome, snapshot_file):
+    """
+    Writes the binary snapshot of a chromosome to a file object opened in binary mode
+    """
+    regions = chromosome.regions
+    contents = [region.represent() for region in regions]
+    bases = "".join(contents)
+
+    table = []
+    for region, content in zip(regions, contents):
+        flags = (REGION_GENE if region.is_gene else 0) \
+            | (REGION_ESSENTIAL if getattr(region, 'is_essential', False) else 0) \
+            | (REGION_CAN_BREAK if region.can_break else 0) \
+            | (REGION_REVERSED if region.reversed else 0)
+        table.append(flags)
+        table.append(len(content))
+        if region.is_gene:
+            table.append(region.ordinal)
+
+    try:
+        encoding, data = ENCODING_PACKED, pack_bases(bases)
+    except ValueError:
+        encoding, data = ENCODING_RAW, bases
+
+    snapshot_file.write(MAGIC + chr(VERSION) + chr(encoding))
+    snapshot_file.write(encode_varints([len(regions), len(bases)]))
+    snapshot_file.write(encode_varints(table))
+    snapshot_file.write(data)
+
+
+def load_chromosome(snapshot_file):
+    """
+    Reads a snapshot written by save_chromosome. The genes keep their ordinals and Gene.next_ordinal is moved past
+    them, so the genes created later get new ordinals.
+
+    :returns a Chromosome instance
+    """
+    data = snapshot_file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise SnapshotError("not a chromosome snapshot")
+
+    position = len(MAGIC)
+    if len(data) < position + 2:
+        raise SnapshotError("truncated snapshot header")
+    version, encoding = ord(data[position]), ord(data[position + 1])
+    if version != VERSION:
+        raise SnapshotError("unsupported snapshot version: %d" % version)
+    position += 2
+
+    (region_count, base_count), position = decode_varints(data, position, 2)
+
+    regions = []
+    lengths = []
+    ordinals = []
+    for i in xrange(region_count):
+        (flags, length), position = decode_varints(data, position, 2)
+        if flags & REGION_GENE:
+            (ordinal,), position = decode_varints(data, position, 1)
+            region = Gene(None, is_essential=bool(flags & REGION_ESSENTIAL))
+            region.ordinal = ordinal
+            ordinals.append(ordinal)
+        else:
+            region = IntergenicRegion(None)
+        region.can_break = bool(flags & REGION_CAN_BREAK)
+        region.reversed = bool(flags & REGION_REVERSED)
+        regions.append(region)
+        lengths.append(length)
+
+    if encoding == ENCODING_PACKED:
+        if len(data) - position < packed_size(base_count):
+            raise SnapshotError("truncated snapshot")
+        bases = unpack_bases(data, base_count, offset=position)
+    elif encoding == ENCODING_RAW:
+        bases = data[position:position + base_count]
+        if len(bases) < base_count:
+            raise SnapshotError("truncated snapshot")
+    else:
+        raise SnapshotError("unknown base encoding: %d" % encoding)
+
+    ends = numpy.cumsum(lengths).tolist()
+    start = 0
+    for region, end in zip(regions, ends):
+        region.content = bases[start:end]
+        start = end
+
+    if ordinals:
+        Gene.next_ordinal = max(Gene.next_ordinal, max(ordinals) + 1)
+
+    return Chromosome(regions)
+
+
+def encode_varints(values):
+    """
+    Encodes a sequence of non-negative integers as varints
+
+    :returns a string
+    """
+    result = bytearray()
+    for value in values:
+        while value >= 0x80:
+            result.append((value & 0x7f) | 0x80)
+            value >>= 7
+        result.append(value)
+    return str(result)
+
+
+def decode_varints(data, position, count):
+    """
+    Decodes count varints from data starting at position
+
+    :returns the list of the values and the position after the last varint
+    """
+    values = []
+    for i in xrange(count):
+        value = 0
+        shift = 0
+        while True:
+            if position >= len(data):
+                raise SnapshotError("truncated snapshot")
+            byte = ord(data[position])
+            position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+    return values, position
@@ -0,0 +1,139 @@
+"""
+Parameter sweeps: the simulations of the same chromosomes on a grid of parameter values.
+
+The values of a swept parameter are given as a list and ranges, for example "0, 5, 10:50:20" is 0, 5, 10, 30, 50. The
+grid points are the combinations of the values of the swept parameters. The chromosomes are parsed once and the
+simulations of all grid points and replicates run in one process pool (see run_replicates), a sweep can also be split
+to several scheduler tasks (see split_points). Every grid point uses the same seeds, so the differences between the
+points are not blurred by the differences of the random sequences.
+"""
+import itertools
+import warnings
+
+import numpy
+
+from applications.GeneticModeling.modules.ensemble import run_replicates
+
+# the parameters that can be swept and the types of their values
+SWEEP_PARAMETERS = [('number_of_transformations', int),
+                    ('rate_of_translocations', int),
+                    ('random_error', float),
+                    ('essential_genes_window_size', int),
+                    ('essential_genes_in_window', int)]
+
+# the number of decimals of the values of the float ranges (the steps are not exact in binary)
+RANGE_DECIMALS = 10
+
+
+def parse_values(text, value_type=float):
+    """
+    Parses the values of a swept parameter
+
+    :param text comma separated values and ranges. A range is start:stop:step and contains stop if it's on the grid.
+    :param value_type int or float
+
+    :returns the list of the values without the repeated ones (empty if the text is empty). Raises ValueError if the
+        text can't be parsed.
+    """
+    values = []
+    for item in (text or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+
+        parts = item.split(':')
+        if len(parts) == 1:
+            values.append(value_type(item))
+        elif len(parts) == 3:
+            values += _parse_range(*[value_type(part.strip()) for part in parts])
+        else:
+            raise ValueError("invalid range: %s" % item)
+
+    unique = []
+    for value in values:
+        if value not in unique:
+            unique.append(value)
+    return unique
+
+
+def _parse_range(start, stop, step):
+    if step <= 0 or stop < start:
+        raise ValueError("invalid range: %s:%s:%s" % (start, stop, step))
+
+    count = int(numpy.floor((stop - start) / float(step) + 1e-9)) + 1
+    if isinstance(start, int) and isinstance(step, int):
+        return range(start, start + count * step, step)
+    return [round(start + index * step, RANGE_DECIMALS) for index in range(count)]
+
+
+def expand_grid(grid):
+    """
+    Returns the grid points
+
+    :param grid the values of the swept parameters by name. The parameters without values are not swept.
+
+    :returns the list of the parameters of the grid points (dicts by name), the last parameter (in the order of the
+        names) changes the fastest
+    """
+    names = sorted(name for name, values in grid.items() if values)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def split_points(points, parts):
+    """
+    Splits the grid points to at most parts lists for separate tasks. The points are dealt one by one, so the costly
+    points (for example the ones with more transformations) are spread over the tasks.
+    """
+    parts = max(min(int(parts), len(points)), 1)
+    return [points[index::parts] for index in range(parts)]
+
+
+def run_sweep(left_chromosome, right_chromosome, points, seeds, processes=None, **parameters):
+    """
+    Runs the simulations of the grid points and summarizes their final values
+
+    :param points the parameters of the grid points (see expand_grid). They override the common parameters.
+    :param seeds the seeds of the replicates of each grid point
+    :param processes the number of worker processes (see run_replicates)
+    :param parameters the common parameters of run_simulation
+
+    :returns the rows of the summary table in the order of the points: dicts with the parameters of the point, the
+        number of replicates and the statistics of the final distance and gene order metrics by series name (see
+        describe)
+    """
+    jobs = [(seed, point) for point in points for seed in seeds]
+    results = run_replicates(left_chromosome, right_chromosome, jobs, processes=processes, **parameters)
+
+    rows = []
+    for index, point in enumerate(points):
+        replicates = results[index * len(seeds):(index + 1) * len(seeds)]
+        names = sorted(replicates[0]) if replicates else []
+        final = dict((name, describe([series[name][-1] if len(series[name]) else numpy.nan
+                                      for series in replicates]))
+                     for name in names)
+        rows.append(dict(parameters=point, replicates=len(replicates), final=final))
+    return rows
+
+
+def describe(values):
+    """
+    Returns the mean, the standard deviation, the minimum and the maximum of the values without the NaN values (None
+    if there are no values)
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    values = values[~numpy.isnan(values)]
+    if not len(values):
+        return dict(mean=None, std=None, min=None, max=None)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return dict(mean=float(values.mean()), std=float(values.std()), min=float(values.min()),
+                    max=float(values.max()))
+
+
+def sort_rows(rows):
+    """
+    Sorts the rows of the summary tables of the tasks of a sweep by the parameters of the grid points
+    """
+    names = [name for name, value_type in SWEEP_PARAMETERS]
+    return sorted(rows, key=lambda row: [row['parameters'].get(name) for name in names])
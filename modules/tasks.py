@@ -0,0 +1,27 @@
+"""
+The statuses of the scheduler tasks.
+
+The task statuses (see get_task_status in scheduler.py) left join the last run of a task, so a task that no worker has
+picked up yet has a run row with None fields. The status of a task is the status of its last run if it has one, else
+the status of the task (QUEUED, ASSIGNED or EXPIRED).
+"""
+
+# the statuses of the tasks that haven't ended yet
+PENDING_STATUSES = ['QUEUED', 'ASSIGNED', 'RUNNING']
+
+
+def task_status(status):
+    """
+    Returns the status of the last run of a task or the status of the task if it has no run yet
+
+    :param status the status of the task (see get_task_status)
+    """
+    run = status.scheduler_run
+    return (run.status if run is not None else None) or status.scheduler_task.status
+
+
+def has_ended(status):
+    """
+    Returns True if a task has ended (completed, failed, timed out, stopped or expired)
+    """
+    return task_status(status) not in PENDING_STATUSES
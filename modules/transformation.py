@@ -1,14 +1,17 @@
 """
 Defines the chromosome transformations
 """
-from numpy import random, math
+import bisect
+
+import numpy
 
 from applications.GeneticModeling.modules.chromosome import DnaBaseMappings, IntergenicRegion
+from applications.GeneticModeling.modules.gene_windows import GeneWindows, region_flags
+from applications.GeneticModeling.modules.randomness import RandomSource
 
 import logging
 
 logger = logging.getLogger("web2py.app.GeneticModeling")
-logger.setLevel(logging.DEBUG)
 
 
 def select_random_region_with_constraints(regions,
@@ -16,7 +19,8 @@ def select_random_region_with_constraints(regions,
                                           essential_genes_in_window,
                                           count=1,
                                           longer_breaks_often=True,
-                                          random_error=None):
+                                          random_error=None,
+                                          rng=None):
     """
     Selects a random region segment based on the essential gene constraints.
 
@@ -30,55 +34,85 @@ def select_random_region_with_constraints(regions,
      Window size 3 means that we check the segments of 3 consecuting genes. essential_genes_in_window == 2 means that if
      there are at lest 2 essential genes in the segment than it cannot break. This function returns a list of segments
      that can break respecting these constraints.
+
+     :param rng the RandomSource to draw from. The default uses the global numpy random state.
     """
-    MAX_TRIALS = 100
+    indices = select_random_region_indices_with_constraints(regions,
+                                                            essential_genes_window_size=essential_genes_window_size,
+                                                            essential_genes_in_window=essential_genes_in_window,
+                                                            count=count,
+                                                            longer_breaks_often=longer_breaks_often,
+                                                            random_error=random_error,
+                                                            rng=rng)
+    if indices is None:
+        return None
+
+    return [regions[index] for index in indices]
+
 
-    regions = regions[:]  # copy the list because this function modifies the list
+def select_random_region_indices_with_constraints(regions,
+                                                  essential_genes_window_size,
+                                                  essential_genes_in_window,
+                                                  count=1,
+                                                  longer_breaks_often=True,
+                                                  random_error=None,
+                                                  rng=None,
+                                                  gene_windows=None):
+    """
+    Same as select_random_region_with_constraints but returns the positions of the selected regions in
+    increasing order. Returns None if there are not enough regions to select from.
+
+    The windows with less than essential_genes_in_window essential genes are enumerated at once (see GeneWindows)
+    and one of them is drawn uniformly, so there is no rejection sampling.
+
+    :param gene_windows the GeneWindows of the regions with essential_genes_window_size genes
+        (see Chromosome.gene_windows). If None then it's computed from the regions.
+    """
+    rng = rng or RandomSource()
+    if gene_windows is None:
+        gene_windows = GeneWindows(region_flags(regions), essential_genes_window_size)
+
+    # the positions of the regions that can still be selected (in increasing order)
+    available = numpy.arange(len(regions))
 
     result = []
     for i in range(count):
-        # randomly find a sublist that matches the constraint
-        genes = [region for region in regions if not region.can_break]
-
-        if len(genes) < essential_genes_window_size:
-            """
-            if there are less genes than the essential window size then just randomly select th remaining regions
-            """
-            selected = select_random_region(regions, count=count - i,
-                                            longer_breaks_often=longer_breaks_often,
-                                            random_error=random_error)
-            result += selected
-            return result
-
-        found = False
-        trials = 0
-        while not found and trials < MAX_TRIALS:
-            trials += trials
-            # the last index where we can start the sublist to stay inside the boundaries
-            max_start = len(genes) - essential_genes_window_size
-            sublist_start = random.randint(0, high=max_start)
-            gene_sublist = genes[sublist_start:sublist_start + essential_genes_window_size]
-
-            # count the number of essential genes in the section
-            essentials = sum(1 for gene in gene_sublist if gene.is_essential)
-            if essentials < essential_genes_in_window:
-                found = True
-
-                # randomly select a region from the subsegment containing the genes
-                subsegment = regions[regions.index(gene_sublist[0]):regions.index(gene_sublist[-1]) + 1]
-                selected = select_random_region(subsegment, count=1,
-                                     longer_breaks_often=longer_breaks_often,
-                                     random_error=random_error)
-
-                result += selected
-
-                # remove the subsegment elements from the regions to prevent them from being selected again
-                regions = [region for region in regions if region not in subsegment]
-
-        if trials == MAX_TRIALS:
-            raise RuntimeError("Reached maximum number of trials (" + MAX_TRIALS + ")")
-
-    return result
+        if gene_windows.gene_count() < essential_genes_window_size:
+            # if there are less genes than the essential window size then just randomly select the remaining regions
+            selected = select_random_region_indices([regions[index] for index in available], count=count - i,
+                                                    longer_breaks_often=longer_breaks_often,
+                                                    random_error=random_error,
+                                                    rng=rng)
+            if not selected:
+                return None
+            result += available[selected].tolist()
+            break
+
+        # without random error only the windows containing breakable regions can be used
+        eligible = gene_windows.eligible(essential_genes_in_window, breakable_only=not random_error)
+        if len(eligible) == 0:
+            return None
+        window = int(eligible[rng.randint(len(eligible))])
+
+        # randomly select a region from the regions spanned by the window
+        start, stop = gene_windows.span(window)
+        subsegment = available[start:stop]
+        selected = select_random_region_indices([regions[index] for index in subsegment], count=1,
+                                                longer_breaks_often=longer_breaks_often,
+                                                random_error=random_error,
+                                                rng=rng)
+        if not selected:
+            return None
+        result.append(int(subsegment[selected[0]]))
+
+        if i + 1 < count:
+            # remove the subsegment to prevent its regions from being selected again. The windows of the next
+            # selection are formed from the remaining genes.
+            available = numpy.concatenate((available[:start], available[stop:]))
+            gene_windows = GeneWindows(numpy.concatenate((gene_windows.flags[:start], gene_windows.flags[stop:])),
+                                       essential_genes_window_size)
+
+    return sorted(result)
 
 
 def select_random_region(regions,
@@ -86,7 +120,8 @@ def select_random_region(regions,
                          longer_breaks_often=True,
                          random_error=None,
                          essential_genes_window_size=None,
-                         essential_genes_in_window=None):
+                         essential_genes_in_window=None,
+                         rng=None):
     """
     Randomly selects some regions from the regions list.
 
@@ -99,32 +134,62 @@ def select_random_region(regions,
     :param essential_genes_window_size the essential gene window size. see select_random_region_with_constraints
     :param essential_genes_in_window the number of essential genes in the window required for the subsegment
         for being non-breakable. see select_random_region_with_constraints
+    :param rng the RandomSource to draw from. The default uses the global numpy random state.
 
     :returns a list of size count containing regions from the regions list. If there are no matching regions
     than returns an empty list. The elements in the resulting list are in the same order as in the original.
     """
+    indices = select_random_region_indices(regions,
+                                           count=count,
+                                           longer_breaks_often=longer_breaks_often,
+                                           random_error=random_error,
+                                           essential_genes_window_size=essential_genes_window_size,
+                                           essential_genes_in_window=essential_genes_in_window,
+                                           rng=rng)
+    if indices is None:
+        return None
+
+    return [regions[index] for index in indices]
+
 
+def select_random_region_indices(regions,
+                                 count=1,
+                                 longer_breaks_often=True,
+                                 random_error=None,
+                                 essential_genes_window_size=None,
+                                 essential_genes_in_window=None,
+                                 rng=None):
+    """
+    Same as select_random_region but returns the positions of the selected regions in the regions list
+    in increasing order.
+    """
+    rng = rng or RandomSource()
     if essential_genes_in_window and essential_genes_window_size:
-        return select_random_region_with_constraints(regions,
-                                                     essential_genes_window_size=essential_genes_window_size,
-                                                     essential_genes_in_window=essential_genes_in_window,
-                                                     count=count,
-                                                     longer_breaks_often=longer_breaks_often,
-                                                     random_error=random_error)
+        return select_random_region_indices_with_constraints(regions,
+                                                             essential_genes_window_size=essential_genes_window_size,
+                                                             essential_genes_in_window=essential_genes_in_window,
+                                                             count=count,
+                                                             longer_breaks_often=longer_breaks_often,
+                                                             random_error=random_error,
+                                                             rng=rng)
 
     def error():
-        return random.choice([True, False], p=[random_error, 1.0 - random_error])
+        return rng.random() < random_error
 
     if random_error is None:
-        filtered = [region for region in regions if region.can_break]
+        filtered = [index for index, region in enumerate(regions) if region.can_break]
     else:
-        filtered = [region for region in regions if region.can_break or error()]
+        filtered = [index for index, region in enumerate(regions) if region.can_break or error()]
+
+    if longer_breaks_often:
+        # the empty regions have zero probability
+        filtered = [index for index in filtered if regions[index].length()]
 
     if len(filtered) == 0:
         return []
 
     if longer_breaks_often:
-        probabilities = compute_probabilities_based_on_length(filtered)
+        probabilities = compute_probabilities_based_on_length([regions[index] for index in filtered])
 
     else:
         probabilities = None
@@ -132,11 +197,76 @@ def select_random_region(regions,
     if len(filtered) < count:
         return None
 
-    result = random.choice(filtered, p=probabilities, size=count, replace=False)
+    result = rng.weighted_sample(filtered, count, probabilities=probabilities)
 
     # sort the items to their original order
-    tuples = sorted(enumerate(result))
-    return map(lambda (k, v): v, tuples)
+    return sorted(result.tolist())
+
+
+def select_random_breakpoints(length_index, count=1, rng=None):
+    """
+    Draws count breakpoints uniformly from the breakable bases of a chromosome, each in a different region.
+
+    Drawing a base uniformly is the same as selecting a region with probability proportional to its length and
+    then a base inside it, so the regions have the same distribution as in select_random_region_indices with
+    longer_breaks_often and without random error. Every draw is a lookup in the length index in O(log n).
+
+    :param length_index the breakable length index of a chromosome (see Chromosome.length_index)
+    :param rng the RandomSource to draw from. The default uses the global numpy random state.
+
+    :returns a list of (region position, offset in the region) pairs in increasing order or None if there are less
+        than count regions with non-zero breakable length
+    """
+    rng = rng or RandomSource()
+
+    # (coordinate of the first base, breakable length, position, offset) of the selected regions by position
+    selected = []
+    remaining = length_index.total()
+    for i in range(count):
+        if remaining <= 0:
+            return None
+
+        # draw from the bases of the regions that are not selected yet and skip the selected regions
+        value = rng.randint(remaining)
+        for start, length, position, offset in selected:
+            if value < start:
+                break
+            value += length
+
+        position, offset = length_index.locate(value)
+        length = length_index.get(position)
+        bisect.insort(selected, (value - offset, length, position, offset))
+        remaining -= length
+
+    return [(position, offset) for start, length, position, offset in selected]
+
+
+def select_random_region_indices_by_length(length_index, count=1, rng=None):
+    """
+    Same as select_random_breakpoints but returns only the positions of the regions
+
+    :returns the positions of the selected regions in increasing order or None if there are less than count
+        regions with non-zero breakable length
+    """
+    breakpoints = select_random_breakpoints(length_index, count=count, rng=rng)
+    if breakpoints is None:
+        return None
+
+    return [position for position, offset in breakpoints]
+
+
+def draw_breakpoints(length_index, size, rng=None):
+    """
+    Draws size independent breakpoints uniformly from the breakable bases of a chromosome at once
+
+    :returns the numpy arrays of the region positions and the offsets in the regions
+    """
+    total = length_index.total()
+    if total <= 0:
+        raise ValueError("the chromosome has no breakable bases")
+
+    rng = rng or RandomSource()
+    return length_index.locate_many(rng.randint(total, size=size))
 
 
 def compute_probabilities_based_on_length(regions):
@@ -144,36 +274,99 @@ def compute_probabilities_based_on_length(regions):
     Returns a weight between 0.0 and 1.0 for each region in the list. The weight is higher for longer
     regions
     """
-    total_length = sum([len(region.content) for region in regions])
-    probabilities = [float(len(region.content)) / total_length for region in regions]
+    total_length = sum([region.length() for region in regions])
+    probabilities = [float(region.length()) / total_length for region in regions]
 
     return probabilities
 
 
+class _RegionSequence(object):
+    """
+    Read-only sequence of the regions of a chromosome that reads the regions with region_at, so it doesn't build
+    the region list of the chromosomes that don't store one (see TreapChromosome)
+    """
+    def __init__(self, chromosome):
+        self.chromosome = chromosome
+
+    def __len__(self):
+        return self.chromosome.region_count()
+
+    def __getitem__(self, index):
+        return self.chromosome.region_at(index)
+
+
 class Transformation:
     """
     Base class for all transformations.
 
     Arguments:
         longer_breaks_often: if true then the longer intergenic regions break with a higher probability
+        rng: the RandomSource the transformation draws from. The default uses the global numpy random state.
+        operation: the change of the gene order made by the transformation (see history.py) or None if the
+            transformation didn't change the chromosomes
     """
     def __init__(self,
                  longer_breaks_often=True,
                  random_error=None,
                  essential_genes_window_size=None,
-                 essential_genes_in_window=None):
+                 essential_genes_in_window=None,
+                 rng=None):
         self.longer_breaks_often = longer_breaks_often
         self.random_error = random_error
         self.essential_genes_window_size=essential_genes_window_size
         self.essential_genes_in_window=essential_genes_in_window
+        self.rng = rng or RandomSource()
+        self.operation = None
 
     def select_random_region(self, regions, count=1):
         return select_random_region(regions, count=count,
                              longer_breaks_often=self.longer_breaks_often,
                              essential_genes_in_window=self.essential_genes_in_window,
                              essential_genes_window_size=self.essential_genes_window_size,
-                             random_error=self.random_error)
+                             random_error=self.random_error,
+                             rng=self.rng)
+
+    def select_random_region_indices(self, regions, count=1):
+        return select_random_region_indices(regions, count=count,
+                                            longer_breaks_often=self.longer_breaks_often,
+                                            essential_genes_in_window=self.essential_genes_in_window,
+                                            essential_genes_window_size=self.essential_genes_window_size,
+                                            random_error=self.random_error,
+                                            rng=self.rng)
+
+    def select_breakpoints(self, chromosome, count=1):
+        """
+        Selects the points where the chromosome breaks. If the selection depends only on the lengths of the
+        breakable regions then the breakpoints are drawn directly from the breakable bases using the length index
+        of the chromosome (see select_random_breakpoints), otherwise the regions are selected first.
 
+        :returns a list of (region position, offset in the region) pairs in increasing order. None or an empty list
+            if there are not enough breakable regions.
+        """
+        if self.essential_genes_in_window and self.essential_genes_window_size:
+            # only the regions of the selected windows are read
+            indices = select_random_region_indices_with_constraints(
+                _RegionSequence(chromosome),
+                essential_genes_window_size=self.essential_genes_window_size,
+                essential_genes_in_window=self.essential_genes_in_window,
+                count=count,
+                longer_breaks_often=self.longer_breaks_often,
+                random_error=self.random_error,
+                rng=self.rng,
+                gene_windows=chromosome.gene_windows(self.essential_genes_window_size))
+        elif self.longer_breaks_often and not self.random_error:
+            return select_random_breakpoints(chromosome.length_index(), count=count, rng=self.rng)
+        else:
+            indices = self.select_random_region_indices(chromosome.regions, count=count)
+
+        if not indices:
+            return indices
+
+        breakpoints = []
+        for index in indices:
+            length = chromosome.region_at(index).length()
+            breakpoints.append((index, self.rng.randint(length) if length else 0))
+        return breakpoints
 
 
 class Inversion(Transformation):
@@ -192,19 +385,26 @@ class Inversion(Transformation):
 
     Attributes:
         chromosome: the chromosome to transform
+        lazy: if True (the default) then the regions between the breaking points are only flagged as reversed and
+            their content is reverse complemented when it's read the next time (for example by represent()). If False
+            then the content of every region is rewritten during the transformation. The results are the same.
     """
     def __init__(self,
                  chromosome,
                  longer_breaks_often=True,
                  random_error=None,
                  essential_genes_window_size=None,
-                 essential_genes_in_window=None):
+                 essential_genes_in_window=None,
+                 lazy=True,
+                 rng=None):
         Transformation.__init__(self,
                                 longer_breaks_often=longer_breaks_often,
                                 random_error=random_error,
                                 essential_genes_window_size=essential_genes_window_size,
-                                essential_genes_in_window=essential_genes_in_window)
+                                essential_genes_in_window=essential_genes_in_window,
+                                rng=rng)
         self.chromosome = chromosome
+        self.lazy = lazy
 
     def transform_with_regions(self,
                                left_region,
@@ -214,42 +414,57 @@ class Inversion(Transformation):
         """
         Transforms the chromosome
         """
-        regions = self.chromosome.regions
+        self.transform_with_region_indices(left_index=self.chromosome.index(left_region),
+                                           right_index=self.chromosome.index(right_region),
+                                           left_region_breaking_point=left_region_breaking_point,
+                                           right_region_breaking_point=right_region_breaking_point)
+
+    def transform_with_region_indices(self,
+                                      left_index,
+                                      right_index,
+                                      left_region_breaking_point,
+                                      right_region_breaking_point):
+        """
+        Same as transform_with_regions but the breaking regions are given by their positions in the chromosome
+        """
+        left_region = self.chromosome.region_at(left_index)
+        right_region = self.chromosome.region_at(right_index)
 
-        left_index = regions.index(left_region)
-        right_index = regions.index(right_region)
+        # the breaking regions stay in place even if they are genes
+        self.operation = dict(type='Inversion',
+                              start=self.chromosome.count_genes(left_index + 1),
+                              stop=self.chromosome.count_genes(right_index))
 
         # reverse regions
-        to_reverse = regions[left_index + 1:right_index]
-        [region.reverse() for region in to_reverse]
-        reversed_regions = list(reversed(to_reverse))
-        regions[left_index + 1:right_index] = reversed_regions
+        self.chromosome.reverse_regions(left_index + 1, right_index, lazy=self.lazy)
 
         # and also update the breaking regions
         old_left_content = left_region.content
         old_right_content = right_region.content
 
         new_left_content = old_left_content[:left_region_breaking_point] \
-                           + DnaBaseMappings.map_string("".join(reversed(old_right_content[:right_region_breaking_point])))
-        new_right_content = DnaBaseMappings.map_string("".join(reversed(old_left_content[left_region_breaking_point:]))) \
+                           + DnaBaseMappings.reverse_complement(old_right_content[:right_region_breaking_point])
+        new_right_content = DnaBaseMappings.reverse_complement(old_left_content[left_region_breaking_point:]) \
                             + old_right_content[right_region_breaking_point:]
 
-        left_region.content = new_left_content
-        right_region.content = new_right_content
+        self.chromosome.set_region_content(left_index, new_left_content)
+        self.chromosome.set_region_content(right_index, new_right_content)
 
     def transform(self):
         """
         Transforms the chromosome
         """
-        breaking_points = self.select_random_region(self.chromosome.regions, count=2)
+        breakpoints = self.select_breakpoints(self.chromosome, count=2)
+        if not breakpoints:
+            logger.debug("Not enough breakable regions, quitting inversion")
+            return
 
-        left_region_breaking_point = random.randint(0, high=len(breaking_points[0].content))
-        right_region_breaking_point = random.randint(0, high=len(breaking_points[1].content))
+        (left_index, left_region_breaking_point), (right_index, right_region_breaking_point) = breakpoints
 
-        self.transform_with_regions(left_region=breaking_points[0],
-                                    right_region=breaking_points[1],
-                                    left_region_breaking_point=left_region_breaking_point,
-                                    right_region_breaking_point=right_region_breaking_point)
+        self.transform_with_region_indices(left_index=left_index,
+                                           right_index=right_index,
+                                           left_region_breaking_point=left_region_breaking_point,
+                                           right_region_breaking_point=right_region_breaking_point)
 
 
 class Translocation(Transformation):
@@ -271,11 +486,13 @@ class Translocation(Transformation):
                  longer_breaks_often=True,
                  random_error=None,
                  essential_genes_window_size=None,
-                 essential_genes_in_window=None):
+                 essential_genes_in_window=None,
+                 rng=None):
         Transformation.__init__(self, longer_breaks_often=longer_breaks_often,
                                 random_error=random_error,
                                 essential_genes_window_size=essential_genes_window_size,
-                                essential_genes_in_window=essential_genes_in_window)
+                                essential_genes_in_window=essential_genes_in_window,
+                                rng=rng)
         self.left_chromosome = left_chromosome
         self.right_chromosome = right_chromosome
 
@@ -313,119 +530,166 @@ class Translocation(Transformation):
         :param reverse If this parameter is True then after moving the section to target the method executes an Inversion
             on the same section (reverses it)
         """
+        self.transform_with_indices(source, target=target,
+                                    left_source_index=source.index(left_source_region),
+                                    right_source_index=source.index(right_source_region),
+                                    target_insertion_index=target.index(target_insertion_region),
+                                    split_left_source_region_at=split_left_source_region_at,
+                                    split_right_source_region_at=split_right_source_region_at,
+                                    split_target_region_at=split_target_region_at,
+                                    reverse=reverse)
+
+    def transform_with_indices(self,
+                               source,
+                               target,
+                               left_source_index,
+                               right_source_index,
+                               target_insertion_index,
+                               split_left_source_region_at=None,
+                               split_right_source_region_at=None,
+                               split_target_region_at=None,
+                               reverse=False):
+        """
+        Same as transform_with_parameters but the breaking regions are given by their positions in the chromosomes.
+        left_source_index must be less than right_source_index.
+        """
         append_to_same = source == target
 
-        logger.debug("transform with parameters: %s, %s, %s, %d, %d, %d, %s", left_source_region.content,
-                     right_source_region.content, target_insertion_region.content, split_left_source_region_at,
-                     split_right_source_region_at, split_target_region_at, str(reverse))
+        left_source_region = source.region_at(left_source_index)
+        right_source_region = source.region_at(right_source_index)
+        target_insertion_region = target.region_at(target_insertion_index)
 
-        print "transform with parameters: {0}, {1}, {2}, {3}, {4}, {5}, {6}".format(left_source_region.content,
-                      right_source_region.content, target_insertion_region.content, split_left_source_region_at,
-                      split_right_source_region_at, split_target_region_at, str(reverse))
-        print
+        logger.debug("transform with parameters: %s, %s, %s, %s, %s, %s, %s", left_source_region.content,
+                     right_source_region.content, target_insertion_region.content, split_left_source_region_at,
+                     split_right_source_region_at, split_target_region_at, reverse)
 
         # TODO: implement the case when the source and the target are the same
 
+        # the broken regions become intergenic regions, so the broken genes disappear
+        self.operation = dict(type='Translocation',
+                              source='left' if source is self.left_chromosome else 'right',
+                              target='left' if target is self.left_chromosome else 'right',
+                              start=source.count_genes(left_source_index + 1),
+                              stop=source.count_genes(right_source_index),
+                              position=target.count_genes(target_insertion_index),
+                              reverse=bool(reverse),
+                              broken=[left_source_region.is_gene, right_source_region.is_gene,
+                                      target_insertion_region.is_gene])
+
         # in the target create two new intergenic regions from the broken one
-        new_regions = Translocation._split_region_and_insert(target_insertion_region, target, split_target_region_at)
+        new_regions = Translocation._split_region_at_index(target_insertion_index, target, split_target_region_at,
+                                                           rng=self.rng)
 
         # insert the parts from the source chromosome AFTER the first new region created
-        insertion_index = target.regions.index(new_regions[1])
+        insertion_index = target_insertion_index + 1
 
         # move the sections from between the source splitting regions
-        to_move_left_index = source.regions.index(left_source_region) + 1
-        to_move_right_index = source.regions.index(right_source_region)
-        to_move = source.regions[to_move_left_index:to_move_right_index]
+        to_move = source.cut(left_source_index + 1, right_source_index)
+        moved_count = right_source_index - left_source_index - 1
 
-        target.regions = target.regions[:insertion_index] + to_move + target.regions[insertion_index:]
-        source.regions[to_move_left_index:to_move_right_index] = []
+        target.paste(insertion_index, to_move)
 
         # finally break the breaking intergenic regions in the source and move their parts to target
-        left_source_region_split = self._split_region(left_source_region, breaking_point=split_left_source_region_at)
-        right_source_region_split = self._split_region(right_source_region, breaking_point=split_right_source_region_at)
+        left_source_region_split = self._split_region(left_source_region, breaking_point=split_left_source_region_at,
+                                                      rng=self.rng)
+        right_source_region_split = self._split_region(right_source_region, breaking_point=split_right_source_region_at,
+                                                       rng=self.rng)
 
         # in the source merge the two broken intergenic region parts
+        # after the cut the right source region directly follows the left one
         merged = IntergenicRegion(left_source_region_split[0].content + right_source_region_split[1].content)
-        source.regions[source.regions.index(left_source_region)] = merged
-        del source.regions[source.regions.index(right_source_region)]
+        source.replace_regions(left_source_index, left_source_index + 2, [merged])
 
         prefix_length = len(new_regions[0].content)
         postfix_length = len(right_source_region_split[0].content)
 
-        new_regions[0].content = new_regions[0].content + left_source_region_split[1].content
-        new_regions[1].content = right_source_region_split[0].content + new_regions[1].content
+        target.set_region_content(target_insertion_index, new_regions[0].content + left_source_region_split[1].content)
+        target.set_region_content(insertion_index + moved_count,
+                                  right_source_region_split[0].content + new_regions[1].content)
 
         # TODO if there's a random inversion then call Infersion on the moved part in the target chromosome
         if reverse:
             inversion = Inversion(target)
-            inversion.transform_with_regions(left_region=new_regions[0],
-                                             right_region=new_regions[1],
-                                             left_region_breaking_point=prefix_length,
-                                             right_region_breaking_point=postfix_length)
-        logger.debug("left chromosome after transformation: " + self.left_chromosome.describe())
-        logger.debug("right chromosome after transformation: " + self.right_chromosome.describe())
+            inversion.transform_with_region_indices(left_index=target_insertion_index,
+                                                    right_index=insertion_index + moved_count,
+                                                    left_region_breaking_point=prefix_length,
+                                                    right_region_breaking_point=postfix_length)
+        # describing the whole chromosomes takes linear time
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("left chromosome after transformation: %s", self.left_chromosome.describe())
+            logger.debug("right chromosome after transformation: %s", self.right_chromosome.describe())
 
     def transform(self):
         """
         Random translocation
         """
         chromosomes = [self.left_chromosome, self.right_chromosome]
-        source = random.choice(chromosomes)
+        source = self.rng.choice(chromosomes)
 
         chromosomes.remove(source)
         target = chromosomes[0]
 
-        # these are the tw regions that will break in the source
-        selected_regions = self.select_random_region(source.regions, count=2)
-        if selected_regions is None:
-            logger.debug("Not enough breakable regions, quitting translocation " + source.describe())
+        # these are the tw regions that will break in the source (in increasing order)
+        source_breakpoints = self.select_breakpoints(source, count=2)
+        if not source_breakpoints:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Not enough breakable regions, quitting translocation %s", source.describe())
             return
 
-        left_source_region, right_source_region = selected_regions
-
-        # if the left region comes affter the right then swap the two regions
-        if source.regions.index(right_source_region) < source.regions.index(left_source_region):
-            tmp = left_source_region
-            left_source_region = right_source_region
-            right_source_region = tmp
+        (left_source_index, left_source_cut), (right_source_index, right_source_cut) = source_breakpoints
 
         # this is the insertion point in the target region
-        target_insertion_region = self.select_random_region(target.regions)[0]
+        target_breakpoints = self.select_breakpoints(target)
 
-        reverse = random.choice([True, False])
+        reverse = self.rng.random() < 0.5
 
-        if left_source_region is None or \
-                        right_source_region is None or \
-                        target_insertion_region is None:
-            logger.debug("left_source_region, right_source_region or target_insertion_region is empty, "
-                         "returning from translocation")
+        if not target_breakpoints:
+            logger.debug("target_insertion_region is empty, returning from translocation")
             return
-        self.transform_with_parameters(source, target=target,
-                       left_source_region=left_source_region, right_source_region=right_source_region,
-                       target_insertion_region=target_insertion_region, reverse=reverse)
+        target_insertion_index, target_cut = target_breakpoints[0]
+
+        # the regions break before the drawn bases: _split_region keeps the bases up to split_at in the first part
+        self.transform_with_indices(source, target=target,
+                                    left_source_index=left_source_index, right_source_index=right_source_index,
+                                    target_insertion_index=target_insertion_index,
+                                    split_left_source_region_at=left_source_cut - 1,
+                                    split_right_source_region_at=right_source_cut - 1,
+                                    split_target_region_at=target_cut - 1,
+                                    reverse=reverse)
 
     @staticmethod
-    def _split_region_and_insert(region, target_chromosome, breaking_point=None):
+    def _split_region_and_insert(region, target_chromosome, breaking_point=None, rng=None):
         """
         Splits the region into two parts and inserts the resulting regions back in to the
         chromosome at the original position
         """
-        index = target_chromosome.regions.index(region)
+        return Translocation._split_region_at_index(target_chromosome.index(region), target_chromosome,
+                                                    breaking_point=breaking_point, rng=rng)
 
-        new_regions = Translocation._split_region(region, breaking_point=breaking_point)
+    @staticmethod
+    def _split_region_at_index(index, target_chromosome, breaking_point=None, rng=None):
+        """
+        Same as _split_region_and_insert but the region is given by its position
+        """
+        new_regions = Translocation._split_region(target_chromosome.region_at(index), breaking_point=breaking_point,
+                                                  rng=rng)
 
-        target_chromosome.regions = target_chromosome.regions[:index] + new_regions + \
-                                    target_chromosome.regions[index + 1:]
+        target_chromosome.replace_regions(index, index + 1, new_regions)
 
         return new_regions
 
     @staticmethod
-    def _split_region(region, breaking_point=None):
+    def _split_region(region, breaking_point=None, rng=None):
+        """
+        Splits the region into two new regions after the breaking_point-th base. If breaking_point is -1 then the
+        first region is empty. If breaking_point is None then it's drawn from rng.
+        """
         content = region.content
 
-        logger.debug("splitting region. content: " + content)
+        logger.debug("splitting region. content: %s", content)
         if breaking_point is None:
-            breaking_point = random.randint(0, high=len(content) - 1)
+            # a region of one base can only break after the base
+            breaking_point = (rng or RandomSource()).randint(max(len(content) - 1, 1))
 
         new_regions = [IntergenicRegion(content[:breaking_point + 1]),
                        IntergenicRegion(content[breaking_point + 1:])]
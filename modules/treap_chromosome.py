@@ -0,0 +1,391 @@
+"""
+Chromosome backed by an implicit treap.
+
+The regions are stored in a randomized balanced binary tree ordered by position (an implicit treap),
+so splitting, joining and reversing region ranges and looking up the position of a region all take
+O(log n) time instead of the O(n) list operations of Chromosome.
+"""
+import random
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, breakable_length
+from applications.GeneticModeling.modules.gene_windows import region_flags
+
+# the priorities of the nodes come from a separate generator so building trees doesn't change the
+# state of the random generators used by the transformations
+_priorities = random.Random(0)
+
+
+class _Node(object):
+    """
+    A tree node holding one region
+
+    Attributes:
+        flipped: lazy reversal tag. If True then the order of the regions in the subtree and the regions
+            themselves have to be reversed. The tag is pushed down to the children before the node is used.
+        own_weight: the breakable length of the region (see breakable_length)
+        weight: the sum of the breakable lengths in the subtree
+        genes: the number of genes in the subtree
+    """
+    __slots__ = ('region', 'priority', 'left', 'right', 'parent', 'size', 'flipped', 'own_weight', 'weight', 'genes')
+
+    def __init__(self, region):
+        self.region = region
+        self.priority = _priorities.random()
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1
+        self.flipped = False
+        self.own_weight = self.weight = breakable_length(region)
+        self.genes = 1 if region.is_gene else 0
+
+
+def _size(node):
+    return node.size if node is not None else 0
+
+
+def _weight(node):
+    return node.weight if node is not None else 0
+
+
+def _genes(node):
+    return node.genes if node is not None else 0
+
+
+def _push(node):
+    """
+    Applies the lazy reversal tag of the node
+    """
+    if node.flipped:
+        node.left, node.right = node.right, node.left
+        if node.left is not None:
+            node.left.flipped = not node.left.flipped
+        if node.right is not None:
+            node.right.flipped = not node.right.flipped
+        node.region.reverse()
+        node.flipped = False
+
+
+def _update(node):
+    """
+    Recomputes the size, the weight and the gene count of the node and fixes the parent pointers of its children
+    """
+    node.size = 1 + _size(node.left) + _size(node.right)
+    node.weight = node.own_weight + _weight(node.left) + _weight(node.right)
+    node.genes = (1 if node.region.is_gene else 0) + _genes(node.left) + _genes(node.right)
+    if node.left is not None:
+        node.left.parent = node
+    if node.right is not None:
+        node.right.parent = node
+
+
+def _split(node, count):
+    """
+    Splits the tree into two trees: the first one contains the first count nodes, the second one the rest
+    """
+    if node is None:
+        return None, None
+
+    _push(node)
+    if _size(node.left) >= count:
+        left, node.left = _split(node.left, count)
+        _update(node)
+        if left is not None:
+            left.parent = None
+        return left, node
+    else:
+        node.right, right = _split(node.right, count - _size(node.left) - 1)
+        _update(node)
+        if right is not None:
+            right.parent = None
+        return node, right
+
+
+def _merge(left, right):
+    """
+    Joins two trees. All nodes of left come before the nodes of right.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+
+    if left.priority > right.priority:
+        _push(left)
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    else:
+        _push(right)
+        right.left = _merge(left, right.left)
+        _update(right)
+        return right
+
+
+def _build(regions):
+    """
+    Builds a tree from the region list in O(n)
+
+    :returns the root node
+    """
+    stack = []
+    for region in regions:
+        node = _Node(region)
+        region._treap_node = node
+
+        last = None
+        while stack and stack[-1].priority < node.priority:
+            last = stack.pop()
+            _update(last)
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+
+    root = stack[0] if stack else None
+    while stack:
+        _update(stack.pop())
+
+    return root
+
+
+def _iterate(node):
+    """
+    Yields the regions of the tree in order
+    """
+    stack = []
+    while stack or node is not None:
+        if node is not None:
+            _push(node)
+            stack.append(node)
+            node = node.left
+        else:
+            node = stack.pop()
+            yield node.region
+            node = node.right
+
+
+class TreapChromosome(Chromosome):
+    """
+    A chromosome storing its regions in an implicit treap.
+
+    region_at, index, count_genes, reverse_regions, cut, paste, replace_regions and set_region_content run in
+    O(log n) (plus the number of new regions for replace_regions). Reading the regions attribute builds a new list in
+    O(n), so the transformations use the methods above.
+
+    The segments returned by cut are trees (with the flags of their regions if the chromosome has collected them, see
+    gene_windows) and can only be pasted into a TreapChromosome.
+    """
+    def __init__(self, regions):
+        self._root = None
+        Chromosome.__init__(self, regions)
+
+    @property
+    def regions(self):
+        return list(_iterate(self._root))
+
+    @regions.setter
+    def regions(self, regions):
+        self._root = _build(regions)
+
+        # see Chromosome
+        self._flags = None
+        self._gene_windows = None
+
+    @staticmethod
+    def from_chromosome(chromosome):
+        return TreapChromosome(chromosome.regions)
+
+    def reverse(self):
+        """
+        Reverses the region list and the regions themselves in O(1)
+        """
+        if self._root is not None:
+            self._root.flipped = not self._root.flipped
+        self._reverse_flags(0, _size(self._root))
+
+    def region_count(self):
+        return _size(self._root)
+
+    def region_at(self, index):
+        if index < 0:
+            index += _size(self._root)
+        if not 0 <= index < _size(self._root):
+            raise IndexError("region index out of range")
+
+        node = self._root
+        while True:
+            _push(node)
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.region
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def index(self, region):
+        node = getattr(region, '_treap_node', None)
+        if node is None:
+            raise ValueError("the region is not in the chromosome")
+
+        path = [node]
+        while path[-1].parent is not None:
+            path.append(path[-1].parent)
+        if path[-1] is not self._root:
+            raise ValueError("the region is not in the chromosome")
+
+        # the pending reversals above the node change its position
+        for ancestor in reversed(path):
+            _push(ancestor)
+
+        position = _size(node.left)
+        while node.parent is not None:
+            if node is node.parent.right:
+                position += _size(node.parent.left) + 1
+            node = node.parent
+        return position
+
+    def reverse_regions(self, start, stop, lazy=True):
+        """
+        Reverses the regions between start and stop by tagging the subtree. The regions are always reversed lazily.
+        """
+        if stop <= start:
+            return
+
+        left, middle, right = self._split_range(start, stop)
+        middle.flipped = not middle.flipped
+        self._root = _merge(_merge(left, middle), right)
+        self._reverse_flags(start, stop)
+
+    def count_genes(self, stop):
+        """
+        Counts the genes from the gene counts of the subtrees in O(log n)
+        """
+        result = 0
+        node = self._root
+        while node is not None and stop > 0:
+            _push(node)
+            left_size = _size(node.left)
+            if stop <= left_size:
+                node = node.left
+            else:
+                result += _genes(node.left) + (1 if node.region.is_gene else 0)
+                stop -= left_size + 1
+                node = node.right
+        return result
+
+    def cut(self, start, stop):
+        left, middle, right = self._split_range(start, stop)
+        self._root = _merge(left, right)
+
+        # the flags of the segment are kept, so pasting it doesn't have to visit its regions
+        flags = self._flags[start:stop].copy() if self._flags is not None else None
+        self._replace_flags(start, stop, [])
+        return _Segment(middle, flags)
+
+    def paste(self, index, segment):
+        if self._flags is not None:
+            flags = segment.flags if segment.flags is not None else region_flags(_iterate(segment.root))
+            self._flags = numpy.concatenate((self._flags[:index], flags, self._flags[index:]))
+            self._gene_windows = None
+        left, right = _split(self._root, index)
+        self._root = _merge(_merge(left, segment.root), right)
+
+    def replace_regions(self, start, stop, regions):
+        left, middle, right = self._split_range(start, stop)
+        if middle is not None:
+            for region in _iterate(middle):
+                region._treap_node = None
+        self._root = _merge(_merge(left, _build(regions)), right)
+        self._replace_flags(start, stop, regions)
+
+    def set_region_content(self, index, content):
+        region = self.region_at(index)
+        region.content = content
+
+        node = region._treap_node
+        delta = breakable_length(region) - node.own_weight
+        if delta:
+            node.own_weight += delta
+            while node is not None:
+                node.weight += delta
+                node = node.parent
+
+    def length_index(self):
+        """
+        The breakable lengths are aggregated in the tree nodes, so the index is a view of the tree
+        """
+        return _LengthIndex(self)
+
+    def _split_range(self, start, stop):
+        left, rest = _split(self._root, start)
+        middle, right = _split(rest, stop - start)
+        return left, middle, right
+
+
+class _Segment(object):
+    """
+    The regions cut from a TreapChromosome (see TreapChromosome.cut)
+
+    Attributes:
+        root: the root of the tree of the regions
+        flags: the flags of the regions (see region_flags) or None if the chromosome had no flags
+    """
+    __slots__ = ('root', 'flags')
+
+    def __init__(self, root, flags):
+        self.root = root
+        self.flags = flags
+
+
+class _LengthIndex(object):
+    """
+    Breakable length index of a TreapChromosome (see Chromosome.length_index). The queries run in O(log n).
+    """
+    def __init__(self, chromosome):
+        self.chromosome = chromosome
+
+    def total(self):
+        return _weight(self.chromosome._root)
+
+    def prefix_sum(self, count):
+        result = 0
+        node = self.chromosome._root
+        while node is not None and count > 0:
+            _push(node)
+            left_size = _size(node.left)
+            if count <= left_size:
+                node = node.left
+            else:
+                result += _weight(node.left) + node.own_weight
+                count -= left_size + 1
+                node = node.right
+        return result
+
+    def get(self, index):
+        return self.chromosome.region_at(index)._treap_node.own_weight
+
+    def locate(self, value):
+        position = 0
+        node = self.chromosome._root
+        while node is not None:
+            _push(node)
+            left_weight = _weight(node.left)
+            if value < left_weight:
+                node = node.left
+            elif value < left_weight + node.own_weight:
+                return position + _size(node.left), value - left_weight
+            else:
+                value -= left_weight + node.own_weight
+                position += _size(node.left) + 1
+                node = node.right
+        return position, value
+
+    def locate_many(self, values):
+        located = [self.locate(value) for value in numpy.asarray(values).tolist()]
+        return (numpy.array([index for index, offset in located], dtype=numpy.int64),
+                numpy.array([offset for index, offset in located], dtype=numpy.int64))
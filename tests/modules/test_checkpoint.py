@@ -0,0 +1,108 @@
+import copy
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.checkpoint import STATE_FILE, STEPS_FILE, Checkpointer
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.simulation import run_simulation
+from applications.GeneticModeling.modules.treap_chromosome import TreapChromosome
+
+
+class KilledSimulation(Exception):
+    pass
+
+
+class FailingCheckpointer(Checkpointer):
+    """
+    Stops the simulation after writing the checkpoint of a step (like a killed worker)
+    """
+    def __init__(self, folder, stop_step, **kwargs):
+        Checkpointer.__init__(self, folder, **kwargs)
+        self.stop_step = stop_step
+
+    def save(self, step, *args):
+        Checkpointer.save(self, step, *args)
+        if step == self.stop_step:
+            raise KilledSimulation()
+
+
+class TestCheckpoint(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    PARAMETERS = dict(number_of_transformations=20, rate_of_translocations=40, random_error=0.0,
+                      compute_distances=True, distance_interval=3, compact_history=True, keyframe_interval=4)
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_resume(self):
+        for buffered_random in [False, True]:
+            self._check_resume(buffered_random=buffered_random)
+
+    def test_resume_treap(self):
+        self._check_resume(convert=TreapChromosome.from_chromosome)
+
+    def test_lines_after_the_checkpoint(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        expected = run_simulation(copy.deepcopy(left), copy.deepcopy(right), seed=5, **self.PARAMETERS)
+
+        folder = os.path.join(self.folder, 'lines')
+        self._kill(left, right, folder, 8, seed=5)
+        # a killed simulation may have written steps after its last checkpoint
+        with open(os.path.join(folder, STEPS_FILE), 'ab') as steps_file:
+            steps_file.write('{"transformation": "Inversion"}\n{"transf')
+
+        resumed = run_simulation(copy.deepcopy(left), copy.deepcopy(right), checkpointer=Checkpointer(folder, 0),
+                                 **self.PARAMETERS)
+
+        self.assertEqual(self._normalize(expected), self._normalize(resumed))
+
+    def test_interval(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        folder = os.path.join(self.folder, 'interval')
+
+        checkpointer = Checkpointer(folder, interval=3600)
+        run_simulation(left, right, seed=1, checkpointer=checkpointer, **self.PARAMETERS)
+
+        # only the first checkpoint is written within the interval
+        with open(os.path.join(folder, STATE_FILE)) as state_file:
+            self.assertEqual(0, json.load(state_file)['step'])
+
+        checkpointer.clear()
+        self.assertFalse(os.path.exists(folder))
+
+    def _check_resume(self, convert=None, **parameters):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        if convert is not None:
+            left, right = convert(left), convert(right)
+        parameters.update(self.PARAMETERS)
+
+        expected = run_simulation(copy.deepcopy(left), copy.deepcopy(right), seed=3, **parameters)
+
+        folder = os.path.join(self.folder, 'resume')
+        self._kill(left, right, folder, 11, seed=3, convert=convert, **parameters)
+
+        # the chromosomes of the resumed simulation are the ones of the checkpoint
+        resumed = run_simulation(Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT),
+                                 checkpointer=Checkpointer(folder, 0, convert=convert), **parameters)
+
+        self.assertEqual(self._normalize(expected), self._normalize(resumed))
+        shutil.rmtree(folder)
+
+    def _kill(self, left, right, folder, stop_step, **parameters):
+        checkpointer = FailingCheckpointer(folder, stop_step, interval=0, convert=parameters.pop('convert', None))
+        parameters = dict(self.PARAMETERS, **parameters)
+        self.assertRaises(KilledSimulation, run_simulation, copy.deepcopy(left), copy.deepcopy(right),
+                          checkpointer=checkpointer, **parameters)
+
+    @staticmethod
+    def _normalize(result):
+        # the resumed history is read from JSON
+        return json.loads(json.dumps(result))
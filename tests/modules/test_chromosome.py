@@ -1,3 +1,4 @@
+from StringIO import StringIO
 from unittest import TestCase
 
 from applications.GeneticModeling.modules.chromosome import Chromosome
@@ -159,4 +160,45 @@ class TestChromosome(TestCase):
         # change the order
         chromosome.regions[0] = chromosome.regions[-1]
         chromosome.regions = chromosome.regions[:-1]
-        self.assertEqual([original_ordinals[2], original_ordinals[0], original_ordinals[1]], chromosome.get_gene_ordinals())
\ No newline at end of file
+        self.assertEqual([original_ordinals[2], original_ordinals[0], original_ordinals[1]], chromosome.get_gene_ordinals())
+
+    def test_index(self):
+        regions = [IntergenicRegion('TCTA'), Gene('AAAGTA'), IntergenicRegion('CCCCCGTG'), Gene('ATCTGA'),
+                   IntergenicRegion('GGT'), Gene('TTTATTTA'), IntergenicRegion('CA')]
+        chromosome = Chromosome(regions[:])
+
+        for position, region in enumerate(regions):
+            self.assertEqual(position, chromosome.index(region))
+
+        # the index follows the structural changes
+        chromosome.reverse_regions(1, 4)
+        segment = chromosome.cut(4, 6)
+        chromosome.paste(0, segment)
+        new_region = IntergenicRegion('AAA')
+        chromosome.replace_regions(3, 4, [new_region, IntergenicRegion('CCC')])
+
+        for position, region in enumerate(chromosome.regions):
+            self.assertEqual(position, chromosome.index(region))
+        self.assertRaises(ValueError, chromosome.index, regions[3])
+
+        # and also the direct modifications of the region list
+        chromosome.regions.insert(0, regions[3])
+        self.assertEqual(0, chromosome.index(regions[3]))
+        self.assertEqual(4, chromosome.index(new_region))
+
+    def test_parse_file(self):
+        chromosome_descripton = '<ADCGTGGG>{AAAGT(DAC)TT;TGACU(UUTG;AAA)}AGT(GT;)<CCCGTU>'
+
+        for use_coexpression in [True, False]:
+            expected = Chromosome.parse(chromosome_descripton, use_coexpression=use_coexpression)
+
+            # the boundaries are split between the chunks
+            for chunk_size in [1, 2, 3, 7, 100]:
+                chromosome = Chromosome.parse_file(StringIO(chromosome_descripton), use_coexpression=use_coexpression,
+                                                   chunk_size=chunk_size)
+
+                self.assertEqual(expected.describe(), chromosome.describe())
+                self.assertEqual([(region.is_gene, region.can_break, getattr(region, 'is_essential', None))
+                                  for region in expected.regions],
+                                 [(region.is_gene, region.can_break, getattr(region, 'is_essential', None))
+                                  for region in chromosome.regions])
@@ -13,3 +13,22 @@ class TestChromosomeRegion(TestCase):
     def test_represent(self):
         region = ChromosomeRegion('ATTGTGT')
         self.assertEqual(region.content, region.represent())
+
+    def test_lazy_reverse(self):
+        region = ChromosomeRegion('ATTGTGT')
+        region.reverse()
+
+        # the orientation changes immediately, the content when it's read
+        self.assertTrue(region.reversed)
+        self.assertEqual(7, region.length())
+        self.assertEqual('ACACAAT', region.content)
+
+        # reversing twice restores the original content
+        region.reverse()
+        region.reverse()
+        self.assertTrue(region.reversed)
+        self.assertEqual('ACACAAT', region.represent())
+
+        region.reverse(lazy=False)
+        self.assertFalse(region.reversed)
+        self.assertEqual('ATTGTGT', region.represent())
@@ -0,0 +1,71 @@
+from StringIO import StringIO
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.compact_chromosome import CompactChromosome
+
+
+class TestCompactChromosome(TestCase):
+    DESCRIPTION = '<ATAATG>GTCT(GGTC;)GGGTA(AAAT)TCTC{CCA(GTTA)AC}<TGCTG>'
+
+    def test_represent(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        compact = CompactChromosome.from_chromosome(chromosome)
+
+        self.assertEqual(chromosome.represent(), compact.represent())
+        self.assertEqual(len(chromosome.regions), compact.region_count())
+
+    def test_describe(self):
+        compact = CompactChromosome.parse(self.DESCRIPTION)
+
+        self.assertEqual(Chromosome.parse(self.DESCRIPTION).describe(), compact.describe())
+
+    def test_reverse(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION, use_coexpression=True)
+        compact = CompactChromosome.from_chromosome(chromosome)
+
+        chromosome.reverse()
+        compact.reverse()
+
+        self.assertEqual(chromosome.represent(), compact.represent())
+        self.assertEqual(chromosome.describe(), compact.describe())
+        self.assertEqual(chromosome.get_gene_ordinals(), compact.get_gene_ordinals())
+        self.assertEqual([region.content for region in chromosome.get_breakable_regions()],
+                         [region.content for region in compact.get_breakable_regions()])
+
+    def test_get_gene_ordinals(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        compact = CompactChromosome.from_chromosome(chromosome)
+
+        self.assertEqual(chromosome.get_gene_ordinals(), compact.get_gene_ordinals())
+
+    def test_get_breakable_regions(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION, use_coexpression=True)
+        compact = CompactChromosome.from_chromosome(chromosome)
+
+        expected = [region.content for region in chromosome.get_breakable_regions()]
+        breakable = compact.get_breakable_regions()
+
+        self.assertEqual(expected, [region.content for region in breakable])
+        self.assertTrue(all(region.can_break for region in breakable))
+
+    def test_to_chromosome(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        compact = CompactChromosome.from_chromosome(chromosome)
+        compact.reverse()
+
+        converted = compact.to_chromosome()
+
+        self.assertEqual(compact.describe(), converted.describe())
+        self.assertEqual(compact.get_gene_ordinals(), converted.get_gene_ordinals())
+        self.assertTrue(all(region.reversed for region in converted.regions))
+
+    def test_parse_file(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION, use_coexpression=True)
+        compact = CompactChromosome.parse_file(StringIO(self.DESCRIPTION), use_coexpression=True, chunk_size=4)
+
+        self.assertEqual(chromosome.describe(), compact.describe())
+        self.assertEqual([region.content for region in chromosome.get_breakable_regions()],
+                         [region.content for region in compact.get_breakable_regions()])
+        self.assertEqual([region.is_essential for region in chromosome.regions if region.is_gene],
+                         compact.is_essential[compact.is_gene].tolist())
@@ -0,0 +1,117 @@
+import random
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.distance import DistanceTracker, bounded_edit_distance, \
+    common_prefix_length, common_suffix_length, edit_distance, myers_edit_distance, trim
+
+
+def levenshtein(first, second):
+    previous = range(len(second) + 1)
+    for i, first_character in enumerate(first, 1):
+        current = [i]
+        for j, second_character in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (first_character != second_character)))
+        previous = current
+    return previous[-1]
+
+
+class TestDistance(TestCase):
+    def setUp(self):
+        self.random = random.Random(7)
+
+    def _mutate(self, sequence, edits):
+        result = list(sequence)
+        for i in range(edits):
+            operation = self.random.randint(0, 2)
+            position = self.random.randint(0, len(result))
+            if operation == 0:
+                result.insert(position, self.random.choice('ACGT'))
+            elif position < len(result):
+                if operation == 1:
+                    del result[position]
+                else:
+                    result[position] = self.random.choice('ACGT')
+        return ''.join(result)
+
+    def _random_sequence(self, length):
+        return ''.join(self.random.choice('ACGT') for i in range(length))
+
+    def test_affixes(self):
+        self.assertEqual(0, common_prefix_length('', 'ACGT'))
+        self.assertEqual(3, common_prefix_length('ACGT', 'ACGA'))
+        self.assertEqual(2, common_prefix_length('TTACGT', 'ACGA', 3, 1))
+        self.assertEqual(1000, common_prefix_length('A' * 1000, 'A' * 1000 + 'C'))
+        self.assertEqual(2, common_suffix_length('ACGT', 'TTGT'))
+        self.assertEqual(1, common_suffix_length('ACGT', 'TTGT', limit=1))
+        self.assertEqual(('C', 'TT'), trim('AACGG', 'AATTGG'))
+        self.assertEqual(('', 'A'), trim('AA', 'AAA'))
+
+        for i in range(50):
+            first = self._random_sequence(self.random.randint(0, 300))
+            second = self._random_sequence(self.random.randint(0, 300))
+            prefix = first[:self.random.randint(0, 200)]
+            length = common_prefix_length(prefix + first, prefix + second)
+            self.assertEqual(prefix + first[:length - len(prefix)], (prefix + second)[:length])
+
+    def test_bounded_edit_distance(self):
+        self.assertEqual(0, bounded_edit_distance('', '', 0))
+        self.assertEqual(0, bounded_edit_distance('ACGT', 'ACGT', 0))
+        self.assertEqual(None, bounded_edit_distance('ACGT', 'ACGA', 0))
+        self.assertEqual(1, bounded_edit_distance('ACGT', 'ACGA', 1))
+        self.assertEqual(None, bounded_edit_distance('A', 'ACGT', 2))
+        self.assertEqual(3, bounded_edit_distance('', 'ACG', 3))
+
+        for i in range(300):
+            first = self._random_sequence(self.random.randint(0, 40))
+            second = self._mutate(first, self.random.randint(0, 10))
+            expected = levenshtein(first, second)
+            limit = self.random.randint(0, 12)
+
+            self.assertEqual(expected if expected <= limit else None, bounded_edit_distance(first, second, limit))
+
+    def test_myers_edit_distance(self):
+        self.assertEqual(0, myers_edit_distance('', ''))
+        self.assertEqual(3, myers_edit_distance('ACG', ''))
+        self.assertEqual(2, myers_edit_distance('A', 'TAC'))
+
+        for i in range(300):
+            first = self._random_sequence(self.random.randint(0, 80))
+            if self.random.random() < 0.5:
+                second = self._random_sequence(self.random.randint(0, 80))
+            else:
+                second = self._mutate(first, self.random.randint(0, 20))
+
+            self.assertEqual(levenshtein(first, second), myers_edit_distance(first, second))
+
+    def test_edit_distance(self):
+        for i in range(300):
+            first = self._random_sequence(self.random.randint(0, 40))
+            if self.random.random() < 0.3:
+                second = self._random_sequence(self.random.randint(0, 40))
+            else:
+                second = self._mutate(first, self.random.randint(0, 10))
+            expected = levenshtein(first, second)
+
+            self.assertEqual(expected, edit_distance(first, second))
+            self.assertEqual(expected, edit_distance(first, second, limit=self.random.randint(0, 5)))
+            self.assertEqual(expected, edit_distance(first, second, limit=2, fallback=levenshtein))
+
+    def test_tracker(self):
+        original = self._random_sequence(300)
+        calls = []
+
+        def fallback(first, second):
+            calls.append((first, second))
+            return levenshtein(first, second)
+
+        tracker = DistanceTracker(original, band_limit=20, fallback=fallback)
+
+        current = original
+        for edits in [1, 5, 10, 20]:
+            current = self._mutate(current, edits)
+            self.assertEqual(levenshtein(original, current), tracker.update(current))
+
+        # only the differing middles are passed to the fallback
+        self.assertTrue(calls)
+        self.assertTrue(all(len(first) < len(original) for first, second in calls))
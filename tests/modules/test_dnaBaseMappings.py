@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import DnaBaseMappings
+
+
+class TestDnaBaseMappings(TestCase):
+    def test_map_string(self):
+        self.assertEqual('TACG', DnaBaseMappings.map_string('ATGC'))
+        self.assertEqual('TACG', DnaBaseMappings.map_string('atgc'))
+        self.assertEqual(u'TACG', DnaBaseMappings.map_string(u'ATGC'))
+
+        self.assertRaises(KeyError, DnaBaseMappings.map_string, 'ATXG')
+
+    def test_reverse_complement(self):
+        self.assertEqual('ACACAAT', DnaBaseMappings.reverse_complement('ATTGTGT'))
+        self.assertEqual('', DnaBaseMappings.reverse_complement(''))
+
+    def test_reverse_complement_array(self):
+        sequence = 'ATTGTGTCCAg'
+        bases = numpy.frombuffer(sequence, dtype=numpy.uint8)
+
+        result = DnaBaseMappings.reverse_complement_array(bases)
+
+        self.assertEqual(DnaBaseMappings.reverse_complement(sequence), result.tobytes())
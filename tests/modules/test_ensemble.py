@@ -0,0 +1,63 @@
+import math
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.ensemble import run_ensemble, summarize
+from applications.GeneticModeling.modules.randomness import spawn_seeds
+
+
+class TestEnsemble(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    PARAMETERS = dict(number_of_transformations=12, rate_of_translocations=30, random_error=0.0,
+                      compute_distances=True, distance_interval=4, compute_gene_order=True)
+
+    def test_pool_matches_serial(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        original = left.represent(), right.represent()
+
+        serial = run_ensemble(left, right, seeds=[1, 2, 3, 4], processes=1, **self.PARAMETERS)
+        pooled = run_ensemble(left, right, seeds=[1, 2, 3, 4], processes=2, **self.PARAMETERS)
+
+        self.assertEqual(serial, pooled)
+        # the replicates work on copies
+        self.assertEqual(original, (left.represent(), right.represent()))
+
+    def test_statistics(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+
+        result = run_ensemble(left, right, replicates=3, seed=5, processes=1, **self.PARAMETERS)
+
+        self.assertEqual(5, result['seed'])
+        self.assertEqual(spawn_seeds(5, 3), result['seeds'])
+        self.assertEqual(12, result['step_count'])
+        self.assertEqual(set(['distance', 'gene_order.BreakpointDistance', 'gene_order.Adjacencies',
+                              'gene_order.ReversalDistance']), set(result['statistics']))
+
+        distance = result['statistics']['distance']
+        # the distance is computed in every 4th and in the last step
+        self.assertEqual([3 if index % 4 == 3 or index == 11 else 0 for index in range(12)], distance['count'])
+        self.assertEqual([None, None, None], distance['mean'][:3])
+        self.assertIsNotNone(distance['mean'][3])
+
+        # the gene order metrics are sampled in the same steps
+        reversal = result['statistics']['gene_order.ReversalDistance']
+        self.assertEqual(distance['count'], reversal['count'])
+        for index in [3, 7, 11]:
+            quantiles = [reversal['quantiles'][quantile][index] for quantile in (0.05, 0.25, 0.5, 0.75, 0.95)]
+            self.assertEqual(sorted(quantiles), quantiles)
+
+    def test_summarize(self):
+        series = numpy.array([[1.0, numpy.nan, 2.0],
+                              [3.0, numpy.nan, numpy.nan]])
+
+        statistics = summarize(series, quantiles=(0.5, 1.0))
+
+        self.assertEqual([2, 0, 1], statistics['count'])
+        self.assertEqual([2.0, None, 2.0], statistics['mean'])
+        self.assertEqual([2.0, None, 2.0], statistics['quantiles'][0.5])
+        self.assertEqual([3.0, None, 2.0], statistics['quantiles'][1.0])
+        self.assertFalse(any(isinstance(value, float) and math.isnan(value) for value in statistics['mean']))
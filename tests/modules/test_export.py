@@ -0,0 +1,89 @@
+import copy
+import gzip
+from StringIO import StringIO
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.export import FORMATS, chunks, export_offsets, format_lines, gzip_chunks, \
+    is_byte_range, parse_range, slice_stream
+from applications.GeneticModeling.modules.history import CHROMOSOME_KEYS, history_items, iterate_history, replay
+from applications.GeneticModeling.modules.simulation import run_simulation
+
+
+class TestExport(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def setUp(self):
+        self.history = run_simulation(Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT),
+                                      number_of_transformations=30, rate_of_translocations=30, random_error=0.0,
+                                      compute_distances=True, diff_strategy='Hamming', distance_interval=4,
+                                      compact_history=True, keyframe_interval=8, seed=3)['history']
+
+    def test_formats(self):
+        items = list(iterate_history(self.history))
+
+        lines = list(format_lines(self.history, 'right'))
+        self.assertEqual([', '.join(str(ordinal) for ordinal in item['right']['ordinals']) + '\n' for item in items],
+                         lines)
+
+        rows = [line.rstrip('\n').split('\t') for line in format_lines(self.history, 'left', 'tsv')]
+        self.assertEqual(['step', 'transformation', 'distance', 'ordinals'], rows[0])
+        self.assertEqual(len(items) + 1, len(rows))
+        self.assertEqual(['4', items[3]['transformation'], str(items[3]['distance']),
+                          ' '.join(str(ordinal) for ordinal in items[3]['left']['ordinals'])], rows[4])
+        self.assertEqual('', rows[1][2])
+
+        self.assertEqual(4, len(list(format_lines(self.history, 'left', 'csv'))[4].split(',')))
+        self.assertRaises(ValueError, list, format_lines(self.history, 'left', 'xml'))
+
+    def test_offsets(self):
+        offsets = export_offsets(replay(copy.deepcopy(self.history['initial']), self.history['steps']), 8)
+
+        for key in CHROMOSOME_KEYS:
+            for file_format in FORMATS:
+                text = ''.join(format_lines(self.history, key, file_format))
+                self.assertEqual(len(text), offsets[key][file_format][-1])
+                self.assertEqual(5, len(offsets[key][file_format]))
+
+                # the export of a segment is the text from its offset
+                for segment, offset in enumerate(offsets[key][file_format][:-1]):
+                    orders = copy.deepcopy(self.history['keyframes'][segment - 1] if segment
+                                           else self.history['initial'])
+                    items = history_items(replay(orders, self.history['steps'][segment * 8:]))
+                    self.assertEqual(text[offset:], ''.join(format_lines(items, key, file_format,
+                                                                         first_step=segment * 8)))
+
+    def test_gzip(self):
+        text = ''.join(format_lines(self.history, 'left'))
+        compressed = ''.join(gzip_chunks(chunks(format_lines(self.history, 'left'), chunk_size=100)))
+
+        self.assertEqual(text, gzip.GzipFile(fileobj=StringIO(compressed)).read())
+        # the same stream is generated again for the ranges
+        self.assertEqual(compressed, ''.join(gzip_chunks(chunks(format_lines(self.history, 'left')))))
+
+    def test_chunks(self):
+        self.assertEqual(['abc', 'de', 'f'], list(chunks(['a', 'bc', 'de', 'f'], chunk_size=2)))
+        self.assertEqual([], list(chunks([])))
+
+    def test_ranges(self):
+        data = [str(i) * 7 for i in range(10)]
+        text = ''.join(data)
+
+        for start, stop in [(0, 70), (0, 1), (3, 9), (7, 14), (69, 70), (20, 45)]:
+            self.assertEqual(text[start:stop], ''.join(slice_stream(data, start, stop)))
+
+        self.assertEqual((10, 21), parse_range('bytes=10-20', 70))
+        self.assertEqual((10, 70), parse_range('bytes=10-', 70))
+        self.assertEqual((10, 70), parse_range('bytes=10-100', 70))
+        self.assertEqual((60, 70), parse_range('bytes=-10', 70))
+        self.assertEqual((0, 70), parse_range('bytes=-100', 70))
+
+        self.assertEqual(None, parse_range('bytes=10-5', 70))
+        self.assertRaises(ValueError, parse_range, 'bytes=70-', 70)
+        self.assertRaises(ValueError, parse_range, 'bytes=-0', 70)
+
+        self.assertTrue(is_byte_range('bytes=0-'))
+        self.assertFalse(is_byte_range('bytes=0-1,5-6'))
+        self.assertFalse(is_byte_range('bytes=-'))
+        self.assertFalse(is_byte_range(None))
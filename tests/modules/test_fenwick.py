@@ -0,0 +1,37 @@
+import random
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.fenwick import FenwickTree
+
+
+class TestFenwickTree(TestCase):
+    def test_prefix_sums(self):
+        generator = random.Random(3)
+        for size in [0, 1, 2, 7, 8, 33]:
+            weights = [generator.randint(0, 5) for i in range(size)]
+            tree = FenwickTree(weights)
+
+            for i in range(50):
+                if size:
+                    index = generator.randint(0, size - 1)
+                    delta = generator.randint(-weights[index], 5)
+                    weights[index] += delta
+                    tree.add(index, delta)
+
+                self.assertEqual(sum(weights), tree.total())
+                for count in range(size + 1):
+                    self.assertEqual(sum(weights[:count]), tree.prefix_sum(count))
+                for index in range(size):
+                    self.assertEqual(weights[index], tree.get(index))
+
+    def test_locate(self):
+        weights = [3, 0, 2, 0, 0, 1, 4]
+        tree = FenwickTree(weights)
+
+        expected = [(0, 0), (0, 1), (0, 2), (2, 0), (2, 1), (5, 0), (6, 0), (6, 1), (6, 2), (6, 3)]
+        self.assertEqual(expected, [tree.locate(value) for value in range(sum(weights))])
+
+        indices, offsets = tree.locate_many(numpy.arange(sum(weights)))
+        self.assertEqual(expected, zip(indices.tolist(), offsets.tolist()))
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.gene_order import adjacency_count, breakpoint_count, reversal_distance, \
+    signed_permutation
+
+
+def sorting_distances(size):
+    """
+    Computes the reversal distance of every signed permutation of 1..size with a breadth first search from the
+    identity
+    """
+    identity = tuple(range(1, size + 1))
+    distances = {identity: 0}
+    frontier = [identity]
+    while frontier:
+        following = []
+        for permutation in frontier:
+            for start in range(size):
+                for end in range(start + 1, size + 1):
+                    reversed_permutation = permutation[:start] + tuple(-value for value in permutation[start:end][::-1]) \
+                        + permutation[end:]
+                    if reversed_permutation not in distances:
+                        distances[reversed_permutation] = distances[permutation] + 1
+                        following.append(reversed_permutation)
+        frontier = following
+    return distances
+
+
+class TestGeneOrder(TestCase):
+    def test_signed_permutation(self):
+        original_ordinals = numpy.array([7, 3, 5, 9])
+        original_reversed = numpy.array([False, False, True, False])
+
+        permutation = signed_permutation(original_ordinals, original_reversed,
+                                         numpy.array([5, 3, 7, 9]), numpy.array([False, True, True, False]))
+        self.assertEqual([-3, -2, -1, 4], permutation.tolist())
+
+        # the gene 3 is missing
+        permutation = signed_permutation(original_ordinals, original_reversed,
+                                         numpy.array([9, 5, 7]), numpy.array([False, False, False]))
+        self.assertEqual([3, -2, 1], permutation.tolist())
+
+    def test_breakpoints(self):
+        self.assertEqual(0, breakpoint_count([1, 2, 3, 4]))
+        self.assertEqual(4, adjacency_count([1, 2, 3]))
+
+        self.assertEqual(2, breakpoint_count([-3, -2, -1, 4]))
+        self.assertEqual(3, adjacency_count([-3, -2, -1, 4]))
+
+        # the same neighbors in the other orientation are a breakpoint
+        self.assertEqual(2, breakpoint_count([1, -2, 3]))
+        self.assertEqual(3, breakpoint_count([2, 1]))
+
+    def test_reversal_distance(self):
+        self.assertEqual(0, reversal_distance([]))
+        self.assertEqual(0, reversal_distance([1, 2, 3]))
+        self.assertEqual(1, reversal_distance([-3, -2, -1, 4]))
+        # unoriented: the hurdle costs an extra reversal
+        self.assertEqual(3, reversal_distance([2, 1]))
+        self.assertEqual(3, reversal_distance([3, 2, 1]))
+
+    def test_all_permutations(self):
+        for size in range(1, 6):
+            for permutation, distance in sorting_distances(size).items():
+                self.assertEqual(distance, reversal_distance(list(permutation)), permutation)
+
+    def test_long_permutation(self):
+        numpy.random.seed(0)
+        permutation = numpy.arange(1, 10001)
+        for i in range(20):
+            start, end = sorted(numpy.random.randint(0, len(permutation) + 1, 2))
+            permutation[start:end] = -permutation[start:end][::-1]
+
+        distance = reversal_distance(permutation)
+        self.assertLessEqual(distance, 20)
+        self.assertLessEqual(distance, breakpoint_count(permutation))
+        self.assertGreaterEqual(distance, breakpoint_count(permutation) // 2)
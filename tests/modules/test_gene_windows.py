@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.gene_windows import GeneWindows, region_flags
+from applications.GeneticModeling.modules.transformation import Inversion, Translocation
+from applications.GeneticModeling.modules.treap_chromosome import TreapChromosome
+
+
+class TestGeneWindows(TestCase):
+    DESCRIPTION = '<GTACG>AGCG(AGTC;)<ATAA>(AGTA)GGTGC(GTCGC;)GCAAC(CCAT;)TTAG(GGCA)CCTA(ACTC)'
+
+    def test_windows(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        windows = GeneWindows(region_flags(chromosome.regions), 2)
+
+        self.assertEqual([2, 4, 6, 8, 10, 12], windows.gene_positions.tolist())
+        self.assertEqual([1, 1, 2, 1, 0], windows.essentials.tolist())
+        self.assertEqual([0, 1, 1, 1, 1], windows.breakables.tolist())
+        self.assertEqual(5, len(windows))
+
+        self.assertEqual([1, 3, 4], windows.eligible(2).tolist())
+        self.assertEqual([4], windows.eligible(1).tolist())
+        self.assertEqual([0, 1, 3, 4], windows.eligible(2, breakable_only=False).tolist())
+        self.assertEqual((10, 13), windows.span(4))
+
+    def test_few_genes(self):
+        chromosome = Chromosome.parse('<GTACG>AGCG(AGTC;)ATAA')
+        windows = GeneWindows(region_flags(chromosome.regions), 2)
+
+        self.assertEqual(1, windows.gene_count())
+        self.assertEqual(0, len(windows))
+        self.assertEqual([], windows.eligible(1).tolist())
+
+    def test_brute_force(self):
+        random_state = numpy.random.RandomState(3)
+        for i in range(20):
+            flags = random_state.randint(0, 8, size=random_state.randint(0, 40)).astype(numpy.uint8)
+            window_size = random_state.randint(1, 5)
+            windows = GeneWindows(flags, window_size)
+
+            genes = [position for position, flag in enumerate(flags) if flag & 1]
+            expected = [sum(1 for position in genes[start:start + window_size] if flags[position] & 2)
+                        for start in range(len(genes) - window_size + 1)]
+            self.assertEqual(expected, windows.essentials.tolist())
+
+            for window in range(len(windows)):
+                start, stop = windows.span(window)
+                self.assertEqual(sum(1 for flag in flags[start:stop] if flag & 4), windows.breakables[window])
+
+    def test_maintained_by_transformations(self):
+        for backend in [Chromosome, TreapChromosome]:
+            numpy.random.seed(5)
+            left = backend(Chromosome.parse(self.DESCRIPTION).regions)
+            right = backend(Chromosome.parse(self.DESCRIPTION).regions)
+
+            for step in range(30):
+                # build the windows before the transformation so the chromosomes have to update them
+                left.gene_windows(2)
+                right.gene_windows(2)
+                if step % 2:
+                    Inversion(left, essential_genes_window_size=2, essential_genes_in_window=2).transform()
+                else:
+                    Translocation(left, right, essential_genes_window_size=2, essential_genes_in_window=2).transform()
+
+                for chromosome in [left, right]:
+                    expected = GeneWindows(region_flags(chromosome.regions), 2)
+                    windows = chromosome.gene_windows(2)
+                    self.assertEqual(expected.flags.tolist(), windows.flags.tolist())
+                    self.assertEqual(expected.essentials.tolist(), windows.essentials.tolist())
+                    self.assertEqual(expected.gene_positions.tolist(), windows.gene_positions.tolist())
+
+            left.reverse()
+            self.assertEqual(region_flags(left.regions).tolist(), left.gene_windows(3).flags.tolist())
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.benchmarks.parse import generate_description
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.history import HistoryRecorder, gene_order, iterate_history, order_at
+from applications.GeneticModeling.modules.randomness import create_random_source
+from applications.GeneticModeling.modules.simulation import run_simulation
+from applications.GeneticModeling.modules.transformation import Inversion, Translocation
+from applications.GeneticModeling.modules.treap_chromosome import TreapChromosome
+
+
+class TestHistory(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def test_replay(self):
+        numpy.random.seed(0)
+        descriptions = [generate_description(40, 5, 20), generate_description(30, 5, 20)]
+
+        backends = [Chromosome.parse,
+                    lambda description: TreapChromosome.from_chromosome(Chromosome.parse(description))]
+        for backend in backends:
+            for random_error in [0.0, 0.3]:
+                left, right = [backend(description) for description in descriptions]
+                recorder = HistoryRecorder(left, right, keyframe_interval=7)
+                expected = self._transform(recorder, left, right, random_error, 60)
+
+                history = recorder.to_dict()
+                self.assertEqual(8, len(history['keyframes']))
+                for step in range(-1, 60):
+                    self.assertEqual(expected[step + 1], order_at(history, step), (backend, random_error, step))
+
+                items = list(iterate_history(history))
+                self.assertEqual([dict((key, dict(ordinals=orders[key]['ordinals'])) for key in orders)
+                                  for orders in expected[1:]],
+                                 [dict(left=item['left'], right=item['right']) for item in items])
+
+    def test_without_keyframes(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        recorder = HistoryRecorder(left, right)
+        expected = self._transform(recorder, left, right, 0.0, 10)
+
+        history = recorder.to_dict()
+        self.assertEqual([], history['keyframes'])
+        self.assertEqual(expected[-1], order_at(history, 9))
+        self.assertEqual(expected[0], order_at(history, -1))
+
+    def test_simulation(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        compact = run_simulation(left, right, number_of_transformations=20, rate_of_translocations=30,
+                                 random_error=0.0, compact_history=True, keyframe_interval=5, seed=1)['history']
+        self.assertEqual(20, len(compact['steps']))
+        self.assertEqual(dict(left=gene_order(left), right=gene_order(right)), order_at(compact, 19))
+
+        # the same simulation on new chromosomes: the gene ordinals are shifted
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        shift = left.get_gene_ordinals()[0] - compact['initial']['left']['ordinals'][0]
+        history = run_simulation(left, right, number_of_transformations=20, rate_of_translocations=30,
+                                 random_error=0.0, seed=1)['history']
+
+        items = list(iterate_history(compact))
+        for item in items:
+            for key in ['left', 'right']:
+                item[key]['ordinals'] = [ordinal + shift for ordinal in item[key]['ordinals']]
+        self.assertEqual(history, items)
+
+    @staticmethod
+    def _transform(recorder, left, right, random_error, count):
+        """
+        Executes random transformations and records them
+
+        :returns the gene orders before the first and after each transformation
+        """
+        rng = create_random_source(5)
+        orders = [dict(left=gene_order(left), right=gene_order(right))]
+        for i in range(count):
+            if rng.random() < 0.5:
+                transformation = Translocation(left, right, random_error=random_error, rng=rng)
+            else:
+                selected = rng.choice([left, right])
+                transformation = Inversion(selected, random_error=random_error, rng=rng)
+
+            transformation.transform()
+            operation = transformation.operation
+            if operation is not None and operation['type'] == 'Inversion':
+                operation['chromosome'] = 'left' if selected is left else 'right'
+            recorder.record(operation)
+            orders.append(dict(left=gene_order(left), right=gene_order(right)))
+        return orders
@@ -1,3 +1,4 @@
+import random
 from unittest import TestCase
 
 from applications.GeneticModeling.modules.chromosome import IntergenicRegion, Gene, Chromosome
@@ -30,6 +31,31 @@ class TestInversion(TestCase):
 
         self.assertEqual(len(original_representation), len(chromosome.represent()))
 
+    def test_lazy_and_eager_inversions_are_identical(self):
+        description = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+        lazy = Chromosome.parse(description)
+        eager = Chromosome.parse(description)
+
+        generator = random.Random(42)
+        for i in range(100):
+            breakable = [index for index, region in enumerate(lazy.regions) if region.can_break]
+            left_index, right_index = sorted(generator.sample(breakable, 2))
+            left_breaking_point = generator.randint(0, lazy.regions[left_index].length())
+            right_breaking_point = generator.randint(0, lazy.regions[right_index].length())
+
+            for chromosome, is_lazy in [(lazy, True), (eager, False)]:
+                Inversion(chromosome, lazy=is_lazy).transform_with_regions(
+                    left_region=chromosome.regions[left_index],
+                    right_region=chromosome.regions[right_index],
+                    left_region_breaking_point=left_breaking_point,
+                    right_region_breaking_point=right_breaking_point)
+
+            if i % 10 == 9:
+                self.assertEqual(eager.describe(), lazy.describe())
+
+        self.assertEqual(eager.represent(), lazy.represent())
+        self.assertEqual([region.reversed for region in eager.regions], [region.reversed for region in lazy.regions])
+
     def _create_regions(self):
         regions = [
             IntergenicRegion('TCGTTC'),
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.mapped_chromosome import MappedSequence, load_mapped_chromosome, \
+    scan_region_table, REGION_TABLE_SUFFIX
+from applications.GeneticModeling.modules.transformation import Inversion, Translocation
+
+
+class TestMappedChromosome(TestCase):
+    DESCRIPTION = '<ATAATG>GTCT(GG;TC;)GGGTA(AAAT)TCTC{CCA(GTTA)AC}()<TGCTG>'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'chromosome.txt')
+        with open(self.file_name, 'wb') as chromosome_file:
+            chromosome_file.write(self.DESCRIPTION)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load(self):
+        for use_coexpression in (False, True):
+            expected = Chromosome.parse(self.DESCRIPTION, use_coexpression=use_coexpression)
+            mapped = load_mapped_chromosome(self.file_name, use_coexpression=use_coexpression, cache=False)
+
+            self.assertEqual(expected.describe(), mapped.describe())
+            self.assertEqual([(region.content, region.can_break, region.is_gene) for region in expected.regions],
+                             [(region.content, region.can_break, region.is_gene) for region in mapped.regions])
+
+    def test_region_table_cache(self):
+        load_mapped_chromosome(self.file_name)
+        self.assertTrue(os.path.exists(self.file_name + REGION_TABLE_SUFFIX))
+
+        cached = load_mapped_chromosome(self.file_name)
+        self.assertEqual(Chromosome.parse(self.DESCRIPTION).describe(), cached.describe())
+
+        # the coexpression setting changes the table, so the cache is not used
+        coexpression = load_mapped_chromosome(self.file_name, use_coexpression=True)
+        self.assertEqual([region.can_break for region in Chromosome.parse(self.DESCRIPTION, True).regions],
+                         [region.can_break for region in coexpression.regions])
+
+    def test_scan_windows(self):
+        expected = scan_region_table(self.DESCRIPTION)
+        for window_size in (1, 3, 7):
+            table = scan_region_table(self.DESCRIPTION, window_size=window_size)
+            for name in expected:
+                self.assertEqual(expected[name].tolist(), table[name].tolist())
+
+    def test_transformations(self):
+        description = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+        file_name = os.path.join(self.directory, 'right.txt')
+        with open(file_name, 'wb') as chromosome_file:
+            chromosome_file.write(description)
+
+        left, right = Chromosome.parse(self.DESCRIPTION), Chromosome.parse(description)
+        mapped_left, mapped_right = load_mapped_chromosome(self.file_name), load_mapped_chromosome(file_name)
+
+        for seed in range(8):
+            for first, second in ((left, right), (mapped_left, mapped_right)):
+                numpy.random.seed(seed)
+                Inversion(second).transform()
+                Translocation(first, second).transform()
+
+            self.assertEqual(left.describe(), mapped_left.describe())
+            self.assertEqual(right.describe(), mapped_right.describe())
+            self.assertEqual(self._relative_ordinals(left, right), self._relative_ordinals(mapped_left, mapped_right))
+
+    @staticmethod
+    def _relative_ordinals(left, right):
+        # the ordinals of the two parses differ by a constant
+        ordinals = left.get_gene_ordinals() + right.get_gene_ordinals()
+        return [ordinal - min(ordinals) for ordinal in ordinals]
+
+    def test_untouched_regions_stay_mapped(self):
+        chromosome = load_mapped_chromosome(self.file_name)
+        breakable = chromosome.get_breakable_regions()
+
+        Inversion(chromosome).transform_with_regions(breakable[0], breakable[1], 1, 1)
+
+        self.assertNotIsInstance(breakable[0].content, MappedSequence)
+        self.assertIsInstance(chromosome.regions[-1].content, MappedSequence)
+
+    def test_mapped_sequence(self):
+        buffer = 'xxACGTTGxx'
+        sequence = MappedSequence(buffer, 2, 8)
+
+        self.assertEqual('ACGTTG', str(sequence))
+        self.assertEqual(6, len(sequence))
+        self.assertEqual('CGT', sequence[1:4])
+        self.assertIsInstance(sequence[1:4], MappedSequence)
+        self.assertEqual('GTTGCA', sequence[::-1])
+        self.assertEqual('G', sequence[-1])
+        self.assertEqual('AACGTTG', 'A' + sequence)
+        self.assertEqual('ACGTTGA', sequence + 'A')
+        self.assertEqual('ACGTTGACGTTG', sequence + sequence)
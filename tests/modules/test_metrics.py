@@ -0,0 +1,113 @@
+import copy
+import math
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.metrics import METRICS, Adjacencies, BreakpointDistance, EditDistance, \
+    Entropy, GeneLevelLevenshtein, Hamming, ReversalDistance, SMC, get_metric, trim_arrays
+from applications.GeneticModeling.modules.transformation import Inversion
+from applications.GeneticModeling.tests.modules.test_distance import levenshtein
+
+
+class TestMetrics(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def test_gene_metrics(self):
+        original = numpy.array([1, 2, 3, 4, 5, 6])
+        metric = GeneLevelLevenshtein([])
+
+        self.assertEqual(0, metric.compare(original, original))
+        self.assertEqual(2, metric.compare(original, numpy.array([1, 2, 4, 3, 5, 6])))
+        self.assertEqual(levenshtein([1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]),
+                         metric.compare(original, numpy.array([6, 5, 4, 3, 2, 1])))
+
+        metric = Entropy([])
+        self.assertEqual(0.0, metric.compare(original, original))
+        # five genes moved by one
+        self.assertAlmostEqual(-(5 / 6.0) * math.log(5 / 6.0, 2) - (1 / 6.0) * math.log(1 / 6.0, 2),
+                               metric.compare(original, numpy.array([6, 1, 2, 3, 4, 5])))
+        # displacements 0, 0, 1, -1, 0, 0
+        self.assertAlmostEqual(-(4 / 6.0) * math.log(4 / 6.0, 2) - 2 * (1 / 6.0) * math.log(1 / 6.0, 2),
+                               metric.compare(original, numpy.array([1, 2, 4, 3, 5, 6])))
+        self.assertAlmostEqual(math.log(6, 2), metric.compare(original, numpy.array([6, 5, 4, 3, 2, 1])))
+
+    def test_base_metrics(self):
+        metric = Hamming([])
+        self.assertEqual(0, metric.compare('ACGT', 'ACGT'))
+        self.assertEqual(2, metric.compare('ACGT', 'TCGA'))
+        self.assertEqual(2, metric.compare('ACGT', 'AC'))
+
+        metric = SMC([])
+        self.assertEqual(1.0, metric.compare('', ''))
+        self.assertEqual(1.0, metric.compare('ACGT', 'ACGT'))
+        self.assertEqual(0.5, metric.compare('ACGT', 'TCGA'))
+        self.assertEqual(0.5, metric.compare('ACGT', 'AC'))
+
+        self.assertEqual(2, EditDistance([]).compare('ACGT', 'TCGA'))
+
+    def test_trim_arrays(self):
+        first, second = trim_arrays(numpy.array([1, 2, 3, 4, 5]), numpy.array([1, 2, 4, 5]))
+        self.assertEqual([3], first.tolist())
+        self.assertEqual([], second.tolist())
+
+        first, second = trim_arrays(numpy.array([1, 2]), numpy.array([1, 2]))
+        self.assertEqual(([], []), (first.tolist(), second.tolist()))
+
+    def test_measure(self):
+        numpy.random.seed(1)
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        original_bases = left.represent() + right.represent()
+        original_ordinals = left.get_gene_ordinals() + right.get_gene_ordinals()
+
+        metrics = dict((name, get_metric(name)([left, right])) for name in METRICS)
+        initial = dict(SMC=1.0, Adjacencies=len(original_ordinals) + 1)
+        for name, metric in metrics.items():
+            self.assertEqual(initial.get(name, 0), metric.measure([left, right]))
+
+        for i in range(5):
+            Inversion(left, random_error=0.0).transform()
+            bases = left.represent() + right.represent()
+            ordinals = left.get_gene_ordinals() + right.get_gene_ordinals()
+
+            self.assertEqual(levenshtein(original_bases, bases), metrics['EditDistance'].measure([left, right]))
+            self.assertEqual(levenshtein(original_ordinals, ordinals),
+                             metrics['GeneLevelLevenshtein'].measure([left, right]))
+            self.assertEqual(sum(1 for a, b in zip(original_bases, bases) if a != b),
+                             metrics['Hamming'].measure([left, right]))
+            # an inversion reverses a segment of the genes of the chromosomes one after the other
+            self.assertLessEqual(metrics['ReversalDistance'].measure([left, right]), i + 1)
+            self.assertEqual(len(ordinals) + 1, metrics['BreakpointDistance'].measure([left, right])
+                             + metrics['Adjacencies'].measure([left, right]))
+
+        self.assertRaises(ValueError, get_metric, 'Unknown')
+
+    def test_gene_order_metrics(self):
+        left = Chromosome.parse(self.LEFT)
+        ordinals = numpy.array(left.get_gene_ordinals())
+        orientations = numpy.array(left.get_gene_orientations())
+        self.assertEqual([False] * 5, orientations.tolist())
+
+        # reversing the chromosome reverses the order and the orientation of the genes
+        left.reverse()
+        current = (numpy.array(left.get_gene_ordinals()), numpy.array(left.get_gene_orientations()))
+        self.assertEqual(ordinals[::-1].tolist(), current[0].tolist())
+        self.assertEqual([True] * 5, current[1].tolist())
+
+        self.assertEqual(1, ReversalDistance([]).compare((ordinals, orientations), current))
+        self.assertEqual(2, BreakpointDistance([]).compare((ordinals, orientations), current))
+        self.assertEqual(4, Adjacencies([]).compare((ordinals, orientations), current))
+
+    def test_chromosome_diff(self):
+        first = Chromosome.parse(self.LEFT)
+        second = copy.deepcopy(first)
+
+        self.assertEqual(0, first.diff(second, 'EditDistance'))
+        self.assertEqual(1.0, first.diff(second, 'SMC'))
+
+        Inversion(second).transform_with_region_indices(1, 5, 2, 3)
+        self.assertEqual(levenshtein(first.represent(), second.represent()), first.diff(second, 'EditDistance'))
+        self.assertEqual(levenshtein(first.get_gene_ordinals(), second.get_gene_ordinals()),
+                         first.diff(second, 'GeneLevelLevenshtein'))
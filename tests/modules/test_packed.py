@@ -0,0 +1,100 @@
+import random
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, DnaBaseMappings
+from applications.GeneticModeling.modules.packed import PackedSequence, can_pack, pack_bases, unpack_bases, \
+    unpack_codes
+from applications.GeneticModeling.modules.transformation import Inversion, Translocation
+
+
+class TestPacked(TestCase):
+    def test_round_trip(self):
+        for bases in ['', 'A', 'ACG', 'ACGT', 'TTGCA', 'GATTACAGATTACA' * 7]:
+            packed = pack_bases(bases)
+
+            self.assertEqual((len(bases) + 3) // 4, len(packed))
+            self.assertEqual(bases, unpack_bases(packed, len(bases)))
+
+    def test_codes(self):
+        self.assertEqual('\x1b', pack_bases('ACGT'))
+        self.assertEqual([0, 1, 2, 3], unpack_codes('\x1b', 4).tolist())
+        self.assertEqual('CGT', unpack_bases('\x00\x6c', 3, offset=1))
+        self.assertEqual('\xc0', pack_bases('T'))
+
+    def test_can_pack(self):
+        self.assertTrue(can_pack('ACGT'))
+        self.assertFalse(can_pack('ACGN'))
+        self.assertFalse(can_pack('acgt'))
+
+        self.assertRaises(ValueError, pack_bases, 'ACGN')
+
+
+class TestPackedSequence(TestCase):
+    def test_slicing(self):
+        bases = 'GATTACAGATTACAC'
+        sequence = PackedSequence.pack(bases)
+
+        self.assertEqual(len(bases), len(sequence))
+        self.assertEqual(bases, str(sequence))
+        for start in range(len(bases) + 1):
+            for stop in range(start, len(bases) + 1):
+                self.assertEqual(bases[start:stop], str(sequence[start:stop]))
+                self.assertIsInstance(sequence[start:stop], PackedSequence)
+
+        self.assertEqual(bases[-1], sequence[-1])
+        self.assertEqual(bases[::-1], sequence[::-1])
+        self.assertEqual(bases[5:2], str(sequence[5:2]))
+
+    def test_reverse_complement(self):
+        generator = random.Random(0)
+        for i in range(200):
+            bases = "".join(generator.choice('ACGT') for j in range(generator.randint(0, 20)))
+            start = generator.randint(0, len(bases))
+            sequence = PackedSequence.pack(bases)[start:]
+
+            result = DnaBaseMappings.reverse_complement(sequence)
+
+            self.assertIsInstance(result, PackedSequence)
+            self.assertEqual(DnaBaseMappings.reverse_complement(bases[start:]), str(result))
+
+    def test_concatenation(self):
+        generator = random.Random(1)
+        for i in range(200):
+            left = "".join(generator.choice('ACGT') for j in range(generator.randint(0, 12)))
+            right = "".join(generator.choice('ACGT') for j in range(generator.randint(0, 12)))
+            left_start, right_start = generator.randint(0, len(left)), generator.randint(0, len(right))
+
+            result = PackedSequence.pack(left)[left_start:] + PackedSequence.pack(right)[right_start:]
+
+            self.assertIsInstance(result, PackedSequence)
+            self.assertEqual(left[left_start:] + right[right_start:], str(result))
+
+        self.assertEqual('ACGTT', PackedSequence.pack('ACG') + 'TT')
+        self.assertEqual('TTACG', 'TT' + PackedSequence.pack('ACG'))
+
+    def test_equality(self):
+        self.assertEqual(PackedSequence.pack('ACGTA'), 'ACGTA')
+        self.assertEqual(PackedSequence.pack('ACGTA')[1:], PackedSequence.pack('CGTA'))
+        self.assertNotEqual(PackedSequence.pack('ACGTA'), PackedSequence.pack('ACGTT'))
+
+    def test_packed_chromosome(self):
+        # the transformations give the same result on packed and on string content
+        left_description = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+        right_description = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+        left, right = Chromosome.parse(left_description), Chromosome.parse(right_description)
+        packed_left, packed_right = Chromosome.parse(left_description), Chromosome.parse(right_description)
+        packed_left.pack()
+        packed_right.pack()
+
+        for seed in range(8):
+            for first, second in ((left, right), (packed_left, packed_right)):
+                numpy.random.seed(seed)
+                Inversion(second).transform()
+                Translocation(first, second).transform()
+
+            self.assertEqual(left.describe(), packed_left.describe())
+            self.assertEqual(right.describe(), packed_right.describe())
+
+        self.assertTrue(all(isinstance(region.content, PackedSequence) for region in packed_left.regions))
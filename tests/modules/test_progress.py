@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.progress import ProgressReporter
+from applications.GeneticModeling.modules.simulation import run_simulation
+
+
+class Clock(object):
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+class TestProgress(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def test_throttling(self):
+        reports = []
+        clock = Clock()
+        reporter = ProgressReporter(reports.append, interval=2.0, clock=clock)
+
+        reporter.start(0, 10)
+        self.assertEqual(dict(step=0, total=10, steps_per_second=None, eta=None, distance=None, updated=100.0),
+                         reports[-1])
+
+        for step in range(1, 5):
+            clock.time += 0.5
+            reporter.update(step, distance=step * 10 if step % 2 == 0 else None)
+        self.assertEqual(2, len(reports))
+        self.assertEqual(dict(step=4, total=10, steps_per_second=2.0, eta=3.0, distance=40, updated=102.0),
+                         reports[-1])
+
+        # the last step is always reported
+        clock.time += 0.25
+        reporter.update(10)
+        self.assertEqual(10, reports[-1]['step'])
+        self.assertEqual(24.0, reports[-1]['steps_per_second'])
+        self.assertEqual(0.0, reports[-1]['eta'])
+
+    def test_resumed(self):
+        reports = []
+        clock = Clock()
+        reporter = ProgressReporter(reports.append, interval=1.0, clock=clock)
+
+        reporter.start(6, 10)
+        clock.time += 1.0
+        reporter.update(7)
+
+        self.assertEqual(1.0, reports[-1]['steps_per_second'])
+        self.assertEqual(3.0, reports[-1]['eta'])
+
+    def test_simulation(self):
+        reports = []
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+
+        result = run_simulation(left, right, number_of_transformations=8, rate_of_translocations=50, random_error=0.0,
+                                compute_distances=True, distance_interval=3, seed=2,
+                                progress=ProgressReporter(reports.append, interval=0))
+
+        self.assertEqual(range(9), [report['step'] for report in reports])
+        self.assertEqual(8, reports[-1]['total'])
+        self.assertEqual(result['history'][-1]['distance'], reports[-1]['distance'])
@@ -0,0 +1,75 @@
+import json
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.randomness import SEED_WORDS, BufferedRandomSource, RandomSource, \
+    create_generator, create_random_source, new_seed, spawn_seeds
+
+
+class TestRandomSource(TestCase):
+    def test_ranges(self):
+        for rng in [RandomSource(numpy.random.RandomState(1)), BufferedRandomSource(numpy.random.RandomState(1),
+                                                                                   block_size=7)]:
+            values = [rng.randint(5) for i in range(500)]
+            self.assertEqual(set(range(5)), set(values))
+
+            uniforms = [rng.random() for i in range(100)]
+            self.assertTrue(all(0.0 <= value < 1.0 for value in uniforms))
+
+            self.assertEqual((10,), rng.randint(3, size=10).shape)
+            self.assertTrue(rng.choice(['a', 'b']) in ['a', 'b'])
+
+            sample = rng.weighted_sample(numpy.arange(4), 2, probabilities=[0.5, 0.0, 0.5, 0.0])
+            self.assertEqual([0, 2], sorted(sample.tolist()))
+
+    def test_seed(self):
+        for buffered in [False, True]:
+            first = create_random_source(5, buffered=buffered, block_size=16)
+            second = create_random_source(5, buffered=buffered, block_size=16)
+
+            self.assertEqual([first.randint(1000) for i in range(100)], [second.randint(1000) for i in range(100)])
+
+    def test_global_state(self):
+        # the default source uses the global numpy state
+        numpy.random.seed(3)
+        first = [RandomSource().randint(1000) for i in range(10)]
+        numpy.random.seed(3)
+        second = [RandomSource().randint(1000) for i in range(10)]
+
+        self.assertEqual(first, second)
+
+    def test_spawn_seeds(self):
+        seeds = spawn_seeds(12, 5)
+
+        self.assertEqual(seeds, spawn_seeds(12, 5))
+        self.assertEqual(seeds[:3], spawn_seeds(12, 3))
+        self.assertNotEqual(seeds, spawn_seeds(13, 5))
+        self.assertEqual(5, len(set(tuple(seed) for seed in seeds)))
+        for seed in seeds:
+            self.assertEqual(SEED_WORDS, len(seed))
+
+        # the streams of the spawned seeds differ
+        streams = [RandomSource(create_generator(seed)).randint(2 ** 30, size=4).tolist() for seed in seeds]
+        self.assertEqual(5, len(set(tuple(stream) for stream in streams)))
+
+    def test_large_seeds(self):
+        seed = new_seed()
+        self.assertTrue(0 <= seed < 2 ** 63)
+
+        for seed in [2 ** 40 + 1, [1, 2, 3, 4]]:
+            first = RandomSource(create_generator(seed)).random(5).tolist()
+            second = RandomSource(create_generator(seed)).random(5).tolist()
+            self.assertEqual(first, second)
+
+    def test_state(self):
+        for buffered in [False, True]:
+            rng = create_random_source(9, buffered=buffered, block_size=16)
+            [rng.random() for i in range(5)]
+
+            state = json.loads(json.dumps(rng.get_state()))
+            expected = [rng.randint(1000) for i in range(40)]
+
+            restored = create_random_source(1, buffered=buffered, block_size=16)
+            restored.set_state(state)
+            self.assertEqual(expected, [restored.randint(1000) for i in range(40)])
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.export import format_lines
+from applications.GeneticModeling.modules.history import history_items, iterate_history, order_at
+from applications.GeneticModeling.modules.result_store import FINAL_CHROMOSOME_FILES, ResultStore, gene_order_columns, \
+    is_manifest
+from applications.GeneticModeling.modules.simulation import run_simulation
+
+
+class TestResultStore(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_save_and_load(self):
+        result = run_simulation(Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT),
+                                number_of_transformations=12, rate_of_translocations=30, random_error=0.0,
+                                compute_distances=True, diff_strategy='Hamming', distance_interval=5,
+                                compute_gene_order=True, gene_order_interval=3, compact_history=True, seed=7)
+        store = ResultStore(self.folder)
+
+        manifest = store.save('0123-abcd', result)
+        self.assertTrue(is_manifest(manifest))
+        self.assertFalse(is_manifest(result))
+        self.assertEqual(12, manifest['step_count'])
+        self.assertEqual(7, manifest['seed'])
+
+        columns = store.load_steps(manifest)
+        steps = result['history']['steps']
+        self.assertEqual([step['transformation'] for step in steps], columns['transformation'].tolist())
+        self.assertEqual([step['distance'] for step in steps if 'distance' in step],
+                         columns['distance'][~numpy.isnan(columns['distance'])].tolist())
+        reversal = gene_order_columns(columns)['ReversalDistance']
+        self.assertEqual([step['gene_order']['ReversalDistance'] for step in steps if 'gene_order' in step],
+                         reversal[~numpy.isnan(reversal)].tolist())
+        self.assertEqual([2, 5, 8, 11], numpy.flatnonzero(~numpy.isnan(reversal)).tolist())
+
+        history = store.load_history(manifest)
+        self.assertEqual(order_at(result['history'], 11), order_at(history, 11))
+
+        for key, file_name in FINAL_CHROMOSOME_FILES.items():
+            with open(store.path('0123-abcd', file_name)) as chromosome_file:
+                self.assertEqual(result['final_' + key], chromosome_file.read())
+
+    def test_replay(self):
+        result = run_simulation(Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT),
+                                number_of_transformations=14, rate_of_translocations=50, random_error=0.0,
+                                compute_distances=True, distance_interval=3, compact_history=True,
+                                keyframe_interval=5, seed=2)
+        store = ResultStore(self.folder)
+        manifest = store.save('replay', result)
+        index = store.load_history_index(manifest)
+        items = json.loads(json.dumps(list(iterate_history(result['history']))))
+
+        self.assertEqual(5, index['keyframe_interval'])
+        for segment in range(3):
+            self.assertEqual(items[segment * 5:], list(history_items(store.replay_history(manifest, index, segment))))
+
+        # the lengths of the exports are recorded when the result is stored
+        for file_format in ['txt', 'csv']:
+            text = ''.join(format_lines(result['history'], 'right', file_format))
+            self.assertEqual(len(text), index['exports']['right'][file_format][-1])
+
+    def test_paths(self):
+        store = ResultStore(self.folder)
+        self.assertEqual(os.path.join(self.folder, 'task', 'steps.npz'), store.path('task', 'steps.npz'))
+
+        self.assertRaises(ValueError, store.path, '..', 'steps.npz')
+        self.assertRaises(ValueError, store.path, 'task', '..')
+        self.assertRaises(ValueError, store.path, 'task', '../task/steps.npz')
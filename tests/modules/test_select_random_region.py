@@ -1,7 +1,9 @@
+from collections import Counter
 from unittest import TestCase
 
-from applications.GeneticModeling.modules.chromosome import IntergenicRegion, Gene
-from applications.GeneticModeling.modules.transformation import select_random_region
+from applications.GeneticModeling.modules.chromosome import Chromosome, IntergenicRegion, Gene
+from applications.GeneticModeling.modules.transformation import select_random_region, select_random_region_indices, \
+    select_random_region_indices_by_length, select_random_breakpoints, draw_breakpoints
 
 
 class TestSelect_random_region(TestCase):
@@ -30,4 +32,66 @@ class TestSelect_random_region(TestCase):
 
         # test with random error == 1.0
         choices = select_random_region(non_breakable, random_error=1.0)
-        self.assertEqual(len(choices), 1)
\ No newline at end of file
+        self.assertEqual(len(choices), 1)
+
+    def test_select_random_region_indices(self):
+        regions = [IntergenicRegion('AGTTCG'), Gene('AGTCCCCC')] * 5
+
+        for i in range(20):
+            indices = select_random_region_indices(regions, count=3)
+
+            self.assertEqual(3, len(indices))
+            self.assertEqual(sorted(set(indices)), indices)
+            self.assertTrue(all(regions[index].can_break for index in indices))
+
+        self.assertEqual(None, select_random_region_indices(regions, count=6))
+
+    def test_select_random_region_indices_by_length(self):
+        regions = [IntergenicRegion('A'), Gene('AGTCCCCC'), IntergenicRegion(''), IntergenicRegion('AGT'),
+                   IntergenicRegion('ACGTAC')]
+        length_index = Chromosome(regions).length_index()
+
+        counts = Counter()
+        for i in range(2000):
+            indices = select_random_region_indices_by_length(length_index, count=2)
+
+            self.assertEqual(2, len(indices))
+            self.assertEqual(sorted(set(indices)), indices)
+            counts.update(indices)
+
+        # only the breakable regions with content can break
+        self.assertEqual(set([0, 3, 4]), set(counts))
+        # the longest region is selected in most of the draws
+        self.assertTrue(counts[4] > counts[3] > counts[0])
+
+        self.assertEqual([0, 3, 4], select_random_region_indices_by_length(length_index, count=3))
+        self.assertEqual(None, select_random_region_indices_by_length(length_index, count=4))
+
+    def test_select_random_breakpoints(self):
+        regions = [IntergenicRegion('AC'), Gene('AGTCCCCC'), IntergenicRegion('AGT'), IntergenicRegion('ACGTAC')]
+        length_index = Chromosome(regions).length_index()
+
+        # every breakable base is drawn with the same probability
+        counts = Counter()
+        for i in range(3000):
+            breakpoints = select_random_breakpoints(length_index, count=1)
+            counts.update(breakpoints)
+
+        self.assertEqual(set([(0, 0), (0, 1), (2, 0), (2, 1), (2, 2)] + [(3, offset) for offset in range(6)]),
+                         set(counts))
+        self.assertTrue(all(200 < count < 350 for count in counts.values()))
+
+        for i in range(20):
+            breakpoints = select_random_breakpoints(length_index, count=3)
+            self.assertEqual([0, 2, 3], [index for index, offset in breakpoints])
+            self.assertTrue(all(offset < regions[index].length() for index, offset in breakpoints))
+
+        self.assertEqual(None, select_random_breakpoints(length_index, count=4))
+
+    def test_draw_breakpoints(self):
+        regions = [IntergenicRegion('AC'), Gene('AGTCCCCC'), IntergenicRegion('AGT')]
+        indices, offsets = draw_breakpoints(Chromosome(regions).length_index(), 1000)
+
+        self.assertEqual(1000, len(indices))
+        self.assertEqual(set([0, 2]), set(indices.tolist()))
+        self.assertTrue(all(offset < regions[index].length() for index, offset in zip(indices, offsets)))
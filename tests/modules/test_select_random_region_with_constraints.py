@@ -1,7 +1,9 @@
 from unittest import TestCase
 
-from applications.GeneticModeling.modules.chromosome import IntergenicRegion, Gene
-from applications.GeneticModeling.modules.transformation import select_random_region_with_constraints
+from applications.GeneticModeling.modules.chromosome import Chromosome, IntergenicRegion, Gene
+from applications.GeneticModeling.modules.randomness import create_random_source
+from applications.GeneticModeling.modules.transformation import Inversion, select_random_region_with_constraints, \
+    select_random_region_indices_with_constraints
 
 
 class TestSelect_random_region_with_constraints(TestCase):
@@ -28,3 +30,41 @@ class TestSelect_random_region_with_constraints(TestCase):
 
         self.assertEqual(2, len(selected))
         self.assertTrue(len([s for s in selected if s in regions]))
+
+    def test_essential_windows(self):
+        # the non-breakable intergenic regions are not genes and the windows are counted on the genes only
+        chromosome = Chromosome.parse('<GTACG>AGCG(AGTC;)<ATAA>(AGTA)GGTGC(GTCGC;)GCAAC(CCAT;)TTAG(GGCA)CCTA(ACTC)')
+        regions = chromosome.regions
+
+        # only the window (GGCA)CCTA(ACTC) has less than 1 essential gene
+        for seed in range(20):
+            selected = select_random_region_indices_with_constraints(regions,
+                                                                     essential_genes_window_size=2,
+                                                                     essential_genes_in_window=1,
+                                                                     rng=create_random_source(seed))
+            self.assertEqual([11], selected)
+
+        # the two regions can't be selected from the same window
+        self.assertEqual(None, select_random_region_indices_with_constraints(regions,
+                                                                             essential_genes_window_size=2,
+                                                                             essential_genes_in_window=1,
+                                                                             count=2))
+
+        selected = select_random_region_with_constraints(regions,
+                                                         essential_genes_window_size=2,
+                                                         essential_genes_in_window=2,
+                                                         count=2)
+        self.assertEqual(2, len(selected))
+        self.assertTrue(all(region.can_break for region in selected))
+
+    def test_no_eligible_window(self):
+        chromosome = Chromosome.parse('AGCG(AGTC;)ATAA(AGTA;)GGTGC(GTCGC;)GCAAC')
+
+        self.assertEqual(None, select_random_region_with_constraints(chromosome.regions,
+                                                                     essential_genes_window_size=2,
+                                                                     essential_genes_in_window=1))
+
+        # the inversion doesn't find breakpoints and leaves the chromosome unchanged
+        representation = chromosome.represent()
+        Inversion(chromosome, essential_genes_window_size=2, essential_genes_in_window=1).transform()
+        self.assertEqual(representation, chromosome.represent())
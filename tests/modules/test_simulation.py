@@ -0,0 +1,79 @@
+import copy
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.simulation import run_simulation
+from applications.GeneticModeling.tests.modules.test_distance import levenshtein
+
+
+class TestSimulation(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def test_seed(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+
+        for buffered_random in [False, True]:
+            results = [self._run(copy.deepcopy(left), copy.deepcopy(right), seed=11, buffered_random=buffered_random)
+                       for i in range(2)]
+
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(20, len(results[0]['history']))
+
+    def test_history(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        gene_count = len(left.get_gene_ordinals() + right.get_gene_ordinals())
+
+        result = self._run(left, right, seed=2)
+
+        self.assertEqual(left.represent(), result['final_left'])
+        self.assertEqual(right.represent(), result['final_right'])
+        for item in result['history']:
+            self.assertEqual(0, item['distance'])
+            self.assertEqual(gene_count, len(item['left']['ordinals'] + item['right']['ordinals']))
+        self.assertEqual(set(['Inversion', 'Translocation']), set(item['transformation'] for item in result['history']))
+
+    def test_distance_interval(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        original = left.represent() + right.represent()
+
+        result = self._run(left, right, seed=4, compute_distances=True, distance_interval=3)
+
+        history = result['history']
+        self.assertEqual([index for index in range(20) if index % 3 == 2] + [19],
+                         [index for index, item in enumerate(history) if 'distance' in item])
+        self.assertEqual(levenshtein(original, left.represent() + right.represent()), history[-1]['distance'])
+
+    def test_gene_order(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        gene_count = len(left.get_gene_ordinals() + right.get_gene_ordinals())
+
+        # only inversions: each of them reverses a segment of the genes of the chromosomes one after the other
+        result = run_simulation(left, right, number_of_transformations=10, rate_of_translocations=0,
+                                random_error=0.0, compute_gene_order=True, seed=3)
+
+        for index, item in enumerate(result['history']):
+            gene_order = item['gene_order']
+            self.assertEqual(gene_count + 1, gene_order['BreakpointDistance'] + gene_order['Adjacencies'])
+            self.assertLessEqual(gene_order['ReversalDistance'], index + 1)
+            self.assertLessEqual(gene_order['ReversalDistance'], gene_order['BreakpointDistance'])
+
+        # the gene order metrics are not computed by default
+        self.assertTrue(all('gene_order' not in item for item in self._run(left, right, seed=3)['history']))
+
+    def test_gene_order_interval(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+
+        # the gene order metrics are sampled like the distances by default
+        history = self._run(copy.deepcopy(left), copy.deepcopy(right), seed=4, compute_distances=True,
+                            distance_interval=3, compute_gene_order=True)['history']
+        self.assertEqual([index for index, item in enumerate(history) if 'distance' in item],
+                         [index for index, item in enumerate(history) if 'gene_order' in item])
+
+        history = self._run(left, right, seed=4, compute_gene_order=True, gene_order_interval=8)['history']
+        self.assertEqual([7, 15, 19], [index for index, item in enumerate(history) if 'gene_order' in item])
+
+    @staticmethod
+    def _run(left, right, **kwargs):
+        return run_simulation(left, right, number_of_transformations=20, rate_of_translocations=30, random_error=0.0,
+                              longer_breaks_often=True, **kwargs)
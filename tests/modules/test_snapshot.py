@@ -0,0 +1,76 @@
+from StringIO import StringIO
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, Gene
+from applications.GeneticModeling.modules.snapshot import SnapshotError, decode_varints, encode_varints
+from applications.GeneticModeling.modules.transformation import Inversion
+
+
+class TestSnapshot(TestCase):
+    DESCRIPTION = '<ATAATG>GTCT(GGTC;)GGGTA(AAAT)TCTC{CCA(GTTA)AC}()<TGCTG>'
+
+    def test_round_trip(self):
+        for use_coexpression in (False, True):
+            chromosome = Chromosome.parse(self.DESCRIPTION, use_coexpression=use_coexpression)
+            loaded = self._round_trip(chromosome)
+
+            self.assertEqual(chromosome.describe(), loaded.describe())
+            self.assertEqual(Chromosome.parse(loaded.describe(), use_coexpression=use_coexpression).represent(),
+                             loaded.represent())
+            self.assertEqual(self._attributes(chromosome), self._attributes(loaded))
+
+    def test_round_trip_after_transformations(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        breakable = chromosome.get_breakable_regions()
+        Inversion(chromosome).transform_with_regions(breakable[0], breakable[3], 2, 1)
+        chromosome.reverse()
+
+        loaded = self._round_trip(chromosome)
+
+        self.assertEqual(chromosome.describe(), loaded.describe())
+        self.assertEqual(self._attributes(chromosome), self._attributes(loaded))
+
+    def test_raw_bases(self):
+        chromosome = Chromosome.parse('<ACNNT>acgt(GGTC;)AC<TT>')
+        loaded = self._round_trip(chromosome)
+
+        self.assertEqual(chromosome.describe(), loaded.describe())
+
+    def test_ordinals(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        loaded = self._round_trip(chromosome)
+
+        self.assertEqual(chromosome.get_gene_ordinals(), loaded.get_gene_ordinals())
+        self.assertTrue(Gene('A').ordinal > max(loaded.get_gene_ordinals()))
+
+    def test_size(self):
+        chromosome = Chromosome.parse('<' + 'ACGT' * 1000 + '>(' + 'GATTACA' * 1000 + ')<TTAG>')
+        snapshot = StringIO()
+        chromosome.save_binary(snapshot)
+
+        self.assertTrue(len(snapshot.getvalue()) < len(chromosome.describe()) / 3)
+
+    def test_invalid_snapshot(self):
+        self.assertRaises(SnapshotError, Chromosome.load_binary, StringIO('<ACGT>'))
+
+        snapshot = StringIO()
+        Chromosome.parse(self.DESCRIPTION).save_binary(snapshot)
+        self.assertRaises(SnapshotError, Chromosome.load_binary, StringIO(snapshot.getvalue()[:-2]))
+
+    def test_varints(self):
+        values = [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63]
+        encoded = encode_varints(values)
+
+        self.assertEqual((values, len(encoded)), decode_varints(encoded, 0, len(values)))
+        self.assertEqual('\xac\x02', encode_varints([300]))
+
+    @staticmethod
+    def _round_trip(chromosome):
+        snapshot = StringIO()
+        chromosome.save_binary(snapshot)
+        return Chromosome.load_binary(StringIO(snapshot.getvalue()))
+
+    @staticmethod
+    def _attributes(chromosome):
+        return [(region.represent(), region.is_gene, getattr(region, 'is_essential', False), region.can_break,
+                 region.reversed, getattr(region, 'ordinal', None)) for region in chromosome.regions]
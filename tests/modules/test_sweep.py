@@ -0,0 +1,64 @@
+import copy
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.chromosome import Chromosome
+from applications.GeneticModeling.modules.simulation import run_simulation
+from applications.GeneticModeling.modules.sweep import describe, expand_grid, parse_values, run_sweep, sort_rows, \
+    split_points
+
+
+class TestSweep(TestCase):
+    LEFT = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+    RIGHT = '<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC(TTGA)GCATAAC<GTCA>'
+
+    def test_parse_values(self):
+        self.assertEqual([0, 5, 10, 30, 50], parse_values('0, 5, 10:50:20', int))
+        self.assertEqual([0, 25, 50, 75], parse_values('0:80:25', int))
+        self.assertEqual([0.0, 0.1, 0.2, 0.3], parse_values('0.0:0.3:0.1', float))
+        self.assertEqual([1, 2], parse_values('1, 2, 1', int))
+        self.assertEqual([], parse_values('', int))
+        self.assertEqual([], parse_values(None, int))
+
+        for text in ['a', '1:2', '5:1:1', '0:10:0', '1.5']:
+            self.assertRaises(ValueError, parse_values, text, int)
+
+    def test_expand_grid(self):
+        points = expand_grid(dict(random_error=[0.0, 0.1], rate_of_translocations=[0, 50, 100],
+                                  essential_genes_window_size=[]))
+
+        self.assertEqual(6, len(points))
+        self.assertEqual(dict(random_error=0.0, rate_of_translocations=0), points[0])
+        self.assertEqual(dict(random_error=0.0, rate_of_translocations=50), points[1])
+        self.assertEqual(dict(random_error=0.1, rate_of_translocations=100), points[-1])
+
+    def test_split_points(self):
+        self.assertEqual([[0, 3], [1, 4], [2]], split_points(range(5), 3))
+        self.assertEqual([[0], [1]], split_points(range(2), 4))
+        self.assertEqual([[0, 1]], split_points(range(2), 0))
+
+    def test_run_sweep(self):
+        left, right = Chromosome.parse(self.LEFT), Chromosome.parse(self.RIGHT)
+        points = expand_grid(dict(rate_of_translocations=[0, 100], number_of_transformations=[4, 8]))
+
+        rows = run_sweep(left, right, points, seeds=[3, 4], processes=2, random_error=0.0, compute_distances=True,
+                         diff_strategy='GeneLevelLevenshtein')
+
+        self.assertEqual(points, [row['parameters'] for row in rows])
+        for row in rows:
+            self.assertEqual(2, row['replicates'])
+
+        # the final values of a grid point are the ones of the simulations with its parameters and the seeds
+        for row in rows:
+            finals = []
+            for seed in [3, 4]:
+                result = run_simulation(copy.deepcopy(left), copy.deepcopy(right), random_error=0.0,
+                                        compute_distances=True, diff_strategy='GeneLevelLevenshtein', seed=seed,
+                                        **row['parameters'])
+                finals.append(result['history'][-1]['distance'])
+            self.assertEqual(describe(finals), row['final']['distance'])
+
+        self.assertEqual(rows, sort_rows(list(reversed(rows))))
+
+    def test_describe(self):
+        self.assertEqual(dict(mean=2.0, std=1.0, min=1.0, max=3.0), describe([1, 3, float('nan')]))
+        self.assertEqual(dict(mean=None, std=None, min=None, max=None), describe([]))
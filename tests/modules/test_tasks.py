@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from applications.GeneticModeling.modules.tasks import has_ended, task_status
+
+
+class Row(object):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class TestTasks(TestCase):
+    def test_without_run(self):
+        # the left join gives a run row with None fields before a worker picks the task up
+        for run in [Row(status=None, traceback=None), None]:
+            status = Row(scheduler_task=Row(status='QUEUED'), scheduler_run=run)
+            self.assertEqual('QUEUED', task_status(status))
+            self.assertFalse(has_ended(status))
+
+        status = Row(scheduler_task=Row(status='EXPIRED'), scheduler_run=Row(status=None))
+        self.assertEqual('EXPIRED', task_status(status))
+        self.assertTrue(has_ended(status))
+
+    def test_with_run(self):
+        status = Row(scheduler_task=Row(status='RUNNING'), scheduler_run=Row(status='RUNNING'))
+        self.assertFalse(has_ended(status))
+
+        for run_status in ['COMPLETED', 'FAILED', 'TIMEOUT', 'STOPPED']:
+            status = Row(scheduler_task=Row(status='QUEUED'), scheduler_run=Row(status=run_status))
+            self.assertEqual(run_status, task_status(status))
+            self.assertTrue(has_ended(status))
@@ -0,0 +1,158 @@
+import bisect
+import copy
+import random
+from unittest import TestCase
+
+import numpy
+
+from applications.GeneticModeling.modules.chromosome import Chromosome, IntergenicRegion, breakable_length
+from applications.GeneticModeling.modules.gene_windows import region_flags
+from applications.GeneticModeling.modules.transformation import Inversion, Translocation
+from applications.GeneticModeling.modules.treap_chromosome import TreapChromosome
+
+
+class TestTreapChromosome(TestCase):
+    DESCRIPTION = '<GTACG>AGCG(AGTC)ATAA(AGTA)GGTGC(GTCGC)GCAAC(CCAT)TTAG(GGCA;)CCTA<ACTC>'
+
+    def test_regions(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        treap = TreapChromosome.from_chromosome(chromosome)
+
+        self.assertEqual(chromosome.regions, treap.regions)
+        self.assertEqual(chromosome.describe(), treap.describe())
+        self.assertEqual(len(chromosome.regions), treap.region_count())
+
+        for index, region in enumerate(chromosome.regions):
+            self.assertTrue(region is treap.region_at(index))
+            self.assertEqual(index, treap.index(region))
+
+        self.assertRaises(ValueError, treap.index, IntergenicRegion('ACT'))
+        self.assertRaises(IndexError, treap.region_at, len(chromosome.regions))
+
+    def test_reverse(self):
+        chromosome = Chromosome.parse(self.DESCRIPTION)
+        treap = TreapChromosome(copy.deepcopy(chromosome.regions))
+
+        chromosome.reverse()
+        treap.reverse()
+
+        self.assertEqual(chromosome.describe(), treap.describe())
+        self.assertEqual(chromosome.get_gene_ordinals(), treap.get_gene_ordinals())
+
+    def test_random_operations(self):
+        # every operation is executed on a list backed and on a treap backed chromosome with the same contents
+        generator = random.Random(7)
+        contents = ["".join(generator.choice('ACGT') for j in range(generator.randint(0, 8))) for i in range(60)]
+        unbreakable = set(generator.sample(range(60), 20))
+        expected = Chromosome(self._create_regions(contents, unbreakable))
+        treap = TreapChromosome(self._create_regions(contents, unbreakable))
+
+        for i in range(300):
+            count = expected.region_count()
+            start = generator.randint(0, count - 1)
+            stop = generator.randint(start, count)
+            insertion_index = generator.randint(0, count - (stop - start))
+            operation = generator.choice(['reverse', 'move', 'replace', 'content'])
+            content = "".join(generator.choice('ACGT') for j in range(generator.randint(0, 6)))
+
+            for chromosome in [expected, treap]:
+                if operation == 'reverse':
+                    chromosome.reverse_regions(start, stop)
+                elif operation == 'move':
+                    chromosome.paste(insertion_index, chromosome.cut(start, stop))
+                elif operation == 'replace':
+                    chromosome.replace_regions(start, stop, [IntergenicRegion(content)])
+                else:
+                    chromosome.set_region_content(start, content)
+
+            self.assertEqual(expected.region_count(), treap.region_count())
+            self._check_length_index(expected, generator)
+            self._check_length_index(treap, generator)
+
+            region = treap.region_at(start)
+            self.assertEqual(start, treap.index(region))
+            self.assertEqual(expected.region_at(start).represent(), region.represent())
+
+        self.assertEqual(expected.represent(), treap.represent())
+        self.assertEqual([region.reversed for region in expected.regions],
+                         [region.reversed for region in treap.regions])
+
+    def test_gene_counts_and_flags(self):
+        # the moves keep the gene counts of the subtrees and the collected flags up to date
+        generator = random.Random(3)
+        expected = Chromosome.parse(self.DESCRIPTION)
+        treap = TreapChromosome(copy.deepcopy(expected.regions))
+        treap.gene_windows(2)
+
+        for i in range(50):
+            count = expected.region_count()
+            start = generator.randint(0, count - 1)
+            stop = generator.randint(start, count)
+            insertion_index = generator.randint(0, count - (stop - start))
+            reversed_range = sorted(generator.sample(range(count + 1), 2))
+
+            for chromosome in [expected, treap]:
+                chromosome.paste(insertion_index, chromosome.cut(start, stop))
+                chromosome.reverse_regions(*reversed_range)
+
+            self.assertEqual([expected.count_genes(stop) for stop in range(count + 1)],
+                             [treap.count_genes(stop) for stop in range(count + 1)])
+            self.assertEqual(region_flags(treap.regions).tolist(), treap.gene_windows(2).flags.tolist())
+
+    def test_transformations(self):
+        # the same transformations on both backends give the same result
+        left = Chromosome.parse(self.DESCRIPTION)
+        right = Chromosome.parse('<GACGG>TATT(CCAA)TATAC(ATTG)GTAG(AGCG)CCGAC<GTCA>')
+        treap_left = TreapChromosome(copy.deepcopy(left.regions))
+        treap_right = TreapChromosome(copy.deepcopy(right.regions))
+
+        for backend_left in [left, treap_left]:
+            Inversion(backend_left).transform_with_regions(left_region=backend_left.region_at(1),
+                                                           right_region=backend_left.region_at(9),
+                                                           left_region_breaking_point=2,
+                                                           right_region_breaking_point=1)
+
+        for backend_left, backend_right in [(left, right), (treap_left, treap_right)]:
+            Translocation(backend_left, backend_right).transform_with_parameters(
+                backend_left, target=backend_right,
+                left_source_region=backend_left.region_at(3),
+                right_source_region=backend_left.region_at(7),
+                target_insertion_region=backend_right.region_at(4),
+                split_left_source_region_at=1,
+                split_right_source_region_at=2,
+                split_target_region_at=2,
+                reverse=True)
+
+        self.assertEqual(left.describe(), treap_left.describe())
+        self.assertEqual(right.describe(), treap_right.describe())
+        self.assertEqual(left.get_gene_ordinals(), treap_left.get_gene_ordinals())
+        self.assertEqual(right.get_gene_ordinals(), treap_right.get_gene_ordinals())
+
+    @staticmethod
+    def _create_regions(contents, unbreakable):
+        regions = [IntergenicRegion(content) for content in contents]
+        for index in unbreakable:
+            regions[index].can_break = False
+        return regions
+
+    def _check_length_index(self, chromosome, generator):
+        weights = [breakable_length(region) for region in chromosome.regions]
+        prefix_sums = [sum(weights[:count]) for count in range(len(weights) + 1)]
+        length_index = chromosome.length_index()
+
+        self.assertEqual(prefix_sums[-1], length_index.total())
+
+        count = generator.randint(0, len(weights))
+        self.assertEqual(prefix_sums[count], length_index.prefix_sum(count))
+        if count < len(weights):
+            self.assertEqual(weights[count], length_index.get(count))
+
+        if prefix_sums[-1]:
+            value = generator.randint(0, prefix_sums[-1] - 1)
+            index = bisect.bisect_right(prefix_sums, value) - 1
+            self.assertEqual((index, value - prefix_sums[index]), length_index.locate(value))
+
+            values = numpy.array([generator.randint(0, prefix_sums[-1] - 1) for j in range(5)])
+            indices = [bisect.bisect_right(prefix_sums, value) - 1 for value in values]
+            self.assertEqual((indices, [value - prefix_sums[index] for index, value in zip(indices, values)]),
+                             tuple(result.tolist() for result in length_index.locate_many(values)))